@@ -1,7 +1,9 @@
 # backend/agents/funding_agent.py
 import json
 import re
-from backend.utils.claude_client import claude_ask
+from backend.utils.claude_client import ABORT_ERRORS, claude_ask, claude_ask_async
+from backend.config import AGENT_TOKEN_BUDGETS
+from backend.utils.prompt_utils import research_prompt
 
 def _safe_json_parse(s: str):
     if not s:
@@ -17,45 +19,71 @@ def _safe_json_parse(s: str):
                 return None
     return None
 
+FUNDING_MAX_TOKENS = 1000
+
+FUNDING_RUBRIC = (
+    "You are a SPRIND analyst evaluating FUNDING & EXIT ENVIRONMENT (10 points total):\n\n"
+    
+    "A. FUNDRAISING FIT (PUBLIC + PRIVATE) IN EU (5 points):\n"
+    "- Is there an accessible funding path (Horizon, EIC, national grants, VC interest)?\n"
+    "- Evidence: eligibility for Horizon/SPRIND/EIF funds; VC market size for the sector\n"
+    "- Consider Horizon Europe calls, EIC Accelerator, national funding programs\n"
+    "- Score 0-5 based on EU funding accessibility\n\n"
+    
+    "B. EXIT PROSPECTS/INVESTOR APPETITE IN EUROPE (5 points):\n"
+    "- Are there acquirers or IPO capacity in this domain in Europe?\n"
+    "- Evidence: M&A history, strategic acquirers, EU IPO market signals\n"
+    "- Consider sector-specific exit trends in Europe\n"
+    "- Score 0-5 based on European exit potential\n\n"
+    
+    "RETURN JSON: "
+    '{"funding_fit_score": 4, "exit_prospects_score": 3, "recommended_calls": ["Horizon Europe", "EIC"], "rationale": "detailed analysis", "funding_timeline": "X months"}\n\n'
+)
+
+def build_funding_prompt(text):
+    """Return (prefix, prompt); prefix is the shared paper block in shared-prefix mode"""
+    return research_prompt(FUNDING_RUBRIC, text, AGENT_TOKEN_BUDGETS["funding"])
+
+def parse_funding_output(output_text):
+    result = _safe_json_parse(output_text)
+    if not result:
+        raise ValueError("Failed to parse JSON")
+    return normalize_funding_result(result)
+
+def normalize_funding_result(result):
+    # Ensure all required fields exist
+    result.setdefault("funding_fit_score", 2)
+    result.setdefault("exit_prospects_score", 2)
+    result.setdefault("recommended_calls", [])
+    result.setdefault("rationale", "")
+    result.setdefault("funding_timeline", "Unknown")
+    return result
+
+def _funding_fallback(e):
+    return {
+        "funding_fit_score": 2, 
+        "exit_prospects_score": 2, 
+        "recommended_calls": [], 
+        "rationale": f"Analysis failed: {str(e)}",
+        "funding_timeline": "Unknown"
+    }
+
 def evaluate_funding(text):
-    prompt = (
-        "You are a SPRIND analyst evaluating FUNDING & EXIT ENVIRONMENT (10 points total):\n\n"
-        
-        "A. FUNDRAISING FIT (PUBLIC + PRIVATE) IN EU (5 points):\n"
-        "- Is there an accessible funding path (Horizon, EIC, national grants, VC interest)?\n"
-        "- Evidence: eligibility for Horizon/SPRIND/EIF funds; VC market size for the sector\n"
-        "- Consider Horizon Europe calls, EIC Accelerator, national funding programs\n"
-        "- Score 0-5 based on EU funding accessibility\n\n"
-        
-        "B. EXIT PROSPECTS/INVESTOR APPETITE IN EUROPE (5 points):\n"
-        "- Are there acquirers or IPO capacity in this domain in Europe?\n"
-        "- Evidence: M&A history, strategic acquirers, EU IPO market signals\n"
-        "- Consider sector-specific exit trends in Europe\n"
-        "- Score 0-5 based on European exit potential\n\n"
-        
-        "RETURN JSON: "
-        '{"funding_fit_score": 4, "exit_prospects_score": 3, "recommended_calls": ["Horizon Europe", "EIC"], "rationale": "detailed analysis", "funding_timeline": "X months"}\n\n'
-        f"Research text: {text[:12000]}\n\nAssistant:"
-    )
-
-    output_text = ""
     try:
-        output_text = claude_ask(prompt, max_tokens=1000)
-        result = _safe_json_parse(output_text)
-        if not result:
-            raise ValueError("Failed to parse JSON")
-        # Ensure all required fields exist
-        result.setdefault("funding_fit_score", 2)
-        result.setdefault("exit_prospects_score", 2)
-        result.setdefault("recommended_calls", [])
-        result.setdefault("rationale", "")
-        result.setdefault("funding_timeline", "Unknown")
-        return result
+        prefix, prompt = build_funding_prompt(text)
+        output_text = claude_ask(prompt, max_tokens=FUNDING_MAX_TOKENS, prefix=prefix)
+        return parse_funding_output(output_text)
+    except ABORT_ERRORS:
+        raise
+    except Exception as e:
+        return _funding_fallback(e)
+
+async def evaluate_funding_async(text):
+    try:
+        prefix, prompt = build_funding_prompt(text)
+        output_text = await claude_ask_async(prompt, max_tokens=FUNDING_MAX_TOKENS, prefix=prefix)
+        return parse_funding_output(output_text)
+    except ABORT_ERRORS:
+        raise
     except Exception as e:
-        return {
-            "funding_fit_score": 2, 
-            "exit_prospects_score": 2, 
-            "recommended_calls": [], 
-            "rationale": f"Analysis failed: {str(e)}",
-            "funding_timeline": "Unknown"
-        }
+        return _funding_fallback(e)
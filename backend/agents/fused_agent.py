@@ -0,0 +1,88 @@
+# backend/agents/fused_agent.py
+"""
+Fused "all criteria" analysis: one Claude request evaluates every criterion,
+so the paper's input tokens are paid once instead of once per agent.
+Results are returned in the same shapes the individual agents produce.
+"""
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from backend.config import AGENT_TOKEN_BUDGETS, PAPER_TOKEN_BUDGET
+from backend.utils.claude_client import claude_ask, claude_ask_async
+from backend.utils.prompt_utils import fit_text
+from backend.agents.tech_ip_agent import TECH_IP_RUBRIC, normalize_tech_ip_result, _intelligent_fallback_analysis, _safe_json_parse
+from backend.agents.market_agent import MARKET_RUBRIC, find_market_competitors, _market_analysis_fallback
+from backend.agents.team_agent import TEAM_RUBRIC, normalize_team_result, _team_fallback
+from backend.agents.scaling_agent import SCALING_RUBRIC, normalize_scaling_result, _scaling_fallback
+from backend.agents.funding_agent import FUNDING_RUBRIC, normalize_funding_result, _funding_fallback
+from backend.agents.impact_agent import IMPACT_RUBRIC, normalize_impact_result, _impact_fallback
+
+FUSED_AGENTS = ['tech_ip', 'market', 'team', 'scaling', 'funding', 'impact']
+FUSED_MAX_TOKENS = 4000
+
+RUBRICS = {
+    'tech_ip': TECH_IP_RUBRIC,
+    'market': MARKET_RUBRIC,
+    'team': TEAM_RUBRIC,
+    'scaling': SCALING_RUBRIC,
+    'funding': FUNDING_RUBRIC,
+    'impact': IMPACT_RUBRIC,
+}
+
+def build_fused_prompt(paper_text: str, authors_text: str = "", agents: Optional[List[str]] = None) -> str:
+    agents = [a for a in (agents or FUSED_AGENTS) if a in RUBRICS]
+    keys = ", ".join(f'"{a}"' for a in agents)
+    parts = [
+        "You are a SPRIND analyst evaluating research for unicorn potential. "
+        "Evaluate the research below against every criteria section that follows it.\n\n",
+        f"Research text: {fit_text(paper_text, PAPER_TOKEN_BUDGET)}\n\n",
+    ]
+    if 'team' in agents:
+        parts.append(f"Authors: {fit_text(authors_text or paper_text, AGENT_TOKEN_BUDGETS['team_authors'])}\n\n")
+    for agent in agents:
+        parts.append(f'=== SECTION "{agent}" ===\n{RUBRICS[agent]}')
+    parts.append(
+        f"RETURN a single JSON object with exactly these keys: {keys}. "
+        "The value for each key must be the JSON object requested in that section.\n\nAssistant:"
+    )
+    return "".join(parts)
+
+def parse_fused_output(output_text: str, paper_text: str, agents: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Split the fused answer into per-agent results, falling back per section"""
+    agents = [a for a in (agents or FUSED_AGENTS) if a in RUBRICS]
+    parsed = _safe_json_parse(output_text)
+    if not isinstance(parsed, dict):
+        parsed = {}
+
+    results = {}
+    for agent in agents:
+        block = parsed.get(agent)
+        error = ValueError(f"Fused response missing '{agent}' section")
+        if agent == 'tech_ip':
+            results[agent] = normalize_tech_ip_result(block) if isinstance(block, dict) else _intelligent_fallback_analysis(paper_text)
+        elif agent == 'market':
+            competitors, investors, fallback = find_market_competitors(paper_text)
+            results[agent] = {
+                "market_analysis": block if isinstance(block, dict) and block else _market_analysis_fallback(error),
+                "competitors": competitors,
+                "investors": investors,
+                "fallback_owler": fallback
+            }
+        elif agent == 'team':
+            results[agent] = normalize_team_result(block) if isinstance(block, dict) else _team_fallback(error)
+        elif agent == 'scaling':
+            results[agent] = normalize_scaling_result(block) if isinstance(block, dict) else _scaling_fallback(error)
+        elif agent == 'funding':
+            results[agent] = normalize_funding_result(block) if isinstance(block, dict) else _funding_fallback(error)
+        elif agent == 'impact':
+            results[agent] = normalize_impact_result(block) if isinstance(block, dict) else _impact_fallback(error)
+    return results
+
+def evaluate_all_criteria(paper_text: str, authors_text: str = "", agents: Optional[List[str]] = None) -> Dict[str, Any]:
+    output_text = claude_ask(build_fused_prompt(paper_text, authors_text, agents), max_tokens=FUSED_MAX_TOKENS)
+    return parse_fused_output(output_text, paper_text, agents)
+
+async def evaluate_all_criteria_async(paper_text: str, authors_text: str = "", agents: Optional[List[str]] = None) -> Dict[str, Any]:
+    output_text = await claude_ask_async(build_fused_prompt(paper_text, authors_text, agents), max_tokens=FUSED_MAX_TOKENS)
+    # Section fallbacks and the competitor lookup do blocking I/O
+    return await asyncio.to_thread(parse_fused_output, output_text, paper_text, agents)
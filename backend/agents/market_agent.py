@@ -1,10 +1,13 @@
 # backend/agents/market_agent.py
+import asyncio
 import json
 import re
 from rapidfuzz import fuzz, process
-from backend.utils.data_utils import load_searchventures, load_openvc
 from backend.utils.web_scraper import scrape_owler_company_page
-from backend.utils.faiss_utils import create_faiss_index, search_faiss
+from backend.utils.faiss_utils import get_searchventures_index, search_faiss
+from backend.utils.claude_client import ABORT_ERRORS, claude_ask, claude_ask_async
+from backend.config import AGENT_TOKEN_BUDGETS
+from backend.utils.prompt_utils import research_prompt
 
 def _safe_json_parse(s: str):
     if not s:
@@ -20,77 +23,70 @@ def _safe_json_parse(s: str):
                 return None
     return None
 
-SV_DF = load_searchventures()
-OV_DF = load_openvc()
-if not OV_DF.empty and "name" in OV_DF.columns:
-    OV_DF["company_lower"] = OV_DF["name"].str.lower()
-elif not OV_DF.empty and "investor_name" in OV_DF.columns:
-    OV_DF["company_lower"] = OV_DF["investor_name"].str.lower()
+MARKET_MAX_TOKENS = 1000
 
-FAISS_INDEX, FAISS_EMB = create_faiss_index(SV_DF) if not SV_DF.empty else (None, None)
-
-def analyze_market_business(text, top_n=5):
-    """
-    Analyze MARKET & BUSINESS criteria (25 points total) for European unicorn potential
-    """
-    from backend.utils.claude_client import claude_ask
-    import json
+MARKET_RUBRIC = (
+    "You are a SPRIND analyst evaluating MARKET & BUSINESS potential (25 points total):\n\n"
     
-    # Claude analysis for market criteria
-    market_prompt = (
-        "You are a SPRIND analyst evaluating MARKET & BUSINESS potential (25 points total):\n\n"
-        
-        "A. CUSTOMER & VALUE PROPOSITION CLARITY (8 points):\n"
-        "- Is the problem-to-customer mapping clear?\n"
-        "- Evidence: user segments, value metrics, customer pain points\n"
-        "- Score 0-5 based on clarity and specificity\n\n"
-        
-        "B. TOTAL ADDRESSABLE MARKET + EUROPEAN FRAGMENTATION (10 points):\n"
-        "- Is the market large enough and realistically addressable in Europe?\n"
-        "- Consider EU market fragmentation (language, regulations, reimbursement)\n"
-        "- Evidence: market reports, EU-specific data, addressable segments\n"
-        "- Score 0-5 based on market size and EU accessibility\n\n"
-        
-        "C. COMPETITIVE LANDSCAPE/DIFFERENTIATION (7 points):\n"
-        "- Existing startups/incumbents/substitutes analysis\n"
-        "- Evidence: Crunchbase/Dealroom data, scholarly citations\n"
-        "- Score 0-5 based on competitive advantage and differentiation\n\n"
-        
-        "RETURN JSON: "
-        '{"customer_clarity_score": 4, "tam_eu_score": 3, "competition_score": 4, "rationale": "analysis", "market_size_estimate": "€X billion"}\n\n'
-        f"Research text: {text[:15000]}\n\nAssistant:"
-    )
+    "A. CUSTOMER & VALUE PROPOSITION CLARITY (8 points):\n"
+    "- Is the problem-to-customer mapping clear?\n"
+    "- Evidence: user segments, value metrics, customer pain points\n"
+    "- Score 0-5 based on clarity and specificity\n\n"
     
-    try:
-        claude_output = claude_ask(market_prompt, max_tokens=1000)
-        market_analysis = _safe_json_parse(claude_output)
-        if not market_analysis:
-            raise ValueError("Failed to parse JSON")
-    except Exception as e:
-        market_analysis = {
-            "customer_clarity_score": 2, 
-            "tam_eu_score": 2, 
-            "competition_score": 2, 
-            "rationale": f"Analysis failed: {str(e)}",
-            "market_size_estimate": "Unknown"
-        }
+    "B. TOTAL ADDRESSABLE MARKET + EUROPEAN FRAGMENTATION (10 points):\n"
+    "- Is the market large enough and realistically addressable in Europe?\n"
+    "- Consider EU market fragmentation (language, regulations, reimbursement)\n"
+    "- Evidence: market reports, EU-specific data, addressable segments\n"
+    "- Score 0-5 based on market size and EU accessibility\n\n"
+    
+    "C. COMPETITIVE LANDSCAPE/DIFFERENTIATION (7 points):\n"
+    "- Existing startups/incumbents/substitutes analysis\n"
+    "- Evidence: Crunchbase/Dealroom data, scholarly citations\n"
+    "- Score 0-5 based on competitive advantage and differentiation\n\n"
+    
+    "RETURN JSON: "
+    '{"customer_clarity_score": 4, "tam_eu_score": 3, "competition_score": 4, "rationale": "analysis", "market_size_estimate": "€X billion"}\n\n'
+)
+
+def build_market_prompt(text):
+    """Return (prefix, prompt); prefix is the shared paper block in shared-prefix mode"""
+    return research_prompt(MARKET_RUBRIC, text, AGENT_TOKEN_BUDGETS["market"])
+
+def parse_market_output(output_text):
+    market_analysis = _safe_json_parse(output_text)
+    if not market_analysis:
+        raise ValueError("Failed to parse JSON")
+    return market_analysis
+
+def _market_analysis_fallback(e):
+    return {
+        "customer_clarity_score": 2, 
+        "tam_eu_score": 2, 
+        "competition_score": 2, 
+        "rationale": f"Analysis failed: {str(e)}",
+        "market_size_estimate": "Unknown"
+    }
 
+def find_market_competitors(text, top_n=5):
+    """Competitor lookup (FAISS, fuzzy fallback, Owler scrape) - no LLM involved"""
     # FAISS semantic search for competitors
+    # SearchVentures CSV & FAISS index, shared with the tech/IP agent and loaded on first use
+    sv_df, faiss_index = get_searchventures_index()
     matches = []
-    if FAISS_INDEX:
-        matches = search_faiss(FAISS_INDEX, SV_DF, text, top_k=top_n)
+    if faiss_index:
+        matches = search_faiss(faiss_index, sv_df, text, top_k=top_n)
         for m in matches:
             m["source"] = "faiss"
 
     # Fuzzy fallback
-    if len(matches) < top_n and not SV_DF.empty:
+    if len(matches) < top_n and not sv_df.empty:
         keywords = text.split()[:10]
         fuzzy_matches = []
         for kw in keywords:
-            choices = SV_DF["candidate_text"].tolist()
+            choices = sv_df["candidate_text"].tolist()
             results = process.extract(kw, choices, scorer=fuzz.WRatio, limit=5)
             for match_text, score, idx in results:
-                row = SV_DF.iloc[idx]
+                row = sv_df.iloc[idx]
                 fuzzy_matches.append({
                     "company": row.get("name"),
                     "description": row.get("short_description"),
@@ -110,10 +106,48 @@ def analyze_market_business(text, top_n=5):
         fallback = scrape_owler_company_page(text.split()[0])
 
     matches_sorted = sorted(matches, key=lambda x: x.get("score", 0), reverse=True)
+    return matches_sorted[:top_n], investors, fallback
+
+def analyze_market_business(text, top_n=5):
+    """
+    Analyze MARKET & BUSINESS criteria (25 points total) for European unicorn potential
+    """
+    # Claude analysis for market criteria
+    try:
+        prefix, prompt = build_market_prompt(text)
+        claude_output = claude_ask(prompt, max_tokens=MARKET_MAX_TOKENS, prefix=prefix)
+        market_analysis = parse_market_output(claude_output)
+    except ABORT_ERRORS:
+        raise
+    except Exception as e:
+        market_analysis = _market_analysis_fallback(e)
+
+    competitors, investors, fallback = find_market_competitors(text, top_n)
     
     return {
         "market_analysis": market_analysis,
-        "competitors": matches_sorted[:top_n], 
+        "competitors": competitors, 
+        "investors": investors, 
+        "fallback_owler": fallback
+    }
+
+async def analyze_market_business_async(text, top_n=5):
+    """Async twin of analyze_market_business"""
+    try:
+        prefix, prompt = build_market_prompt(text)
+        claude_output = await claude_ask_async(prompt, max_tokens=MARKET_MAX_TOKENS, prefix=prefix)
+        market_analysis = parse_market_output(claude_output)
+    except ABORT_ERRORS:
+        raise
+    except Exception as e:
+        market_analysis = _market_analysis_fallback(e)
+
+    # FAISS/fuzzy search is CPU bound and the Owler scrape blocks, keep them off the event loop
+    competitors, investors, fallback = await asyncio.to_thread(find_market_competitors, text, top_n)
+
+    return {
+        "market_analysis": market_analysis,
+        "competitors": competitors, 
         "investors": investors, 
         "fallback_owler": fallback
     }
@@ -0,0 +1,116 @@
+# backend/agents/registry.py
+"""
+Request-level view of the Claude-backed agents.
+Each agent is described by how to build its request and how to turn the raw
+completion into the result shape the agent function returns. Pipelines that
+don't call claude_ask directly (batch jobs, streaming) use this to drive the
+same prompts and parsing as the agents.
+"""
+import hashlib
+import json
+from typing import Any, Dict, Tuple
+
+from backend.config import AGENT_TOKEN_BUDGETS
+from backend.utils.claude_client import DEFAULT_MODEL
+from backend.agents.tech_ip_agent import (
+    TECH_IP_RUBRIC, TECH_IP_MAX_TOKENS, build_tech_ip_prompt, parse_tech_ip_output, _intelligent_fallback_analysis
+)
+from backend.agents.market_agent import (
+    MARKET_RUBRIC, MARKET_MAX_TOKENS, build_market_prompt, parse_market_output, find_market_competitors, _market_analysis_fallback
+)
+from backend.agents.team_agent import TEAM_RUBRIC, TEAM_MAX_TOKENS, build_team_prompt, parse_team_output, _team_fallback
+from backend.agents.scaling_agent import SCALING_RUBRIC, SCALING_MAX_TOKENS, build_scaling_prompt, parse_scaling_output, _scaling_fallback
+from backend.agents.funding_agent import FUNDING_RUBRIC, FUNDING_MAX_TOKENS, build_funding_prompt, parse_funding_output, _funding_fallback
+from backend.agents.impact_agent import IMPACT_RUBRIC, IMPACT_MAX_TOKENS, build_impact_prompt, parse_impact_output, _impact_fallback
+
+AGENT_NAMES = ['tech_ip', 'market', 'team', 'scaling', 'funding', 'impact']
+
+# Shared per-analysis artifacts each agent consumes; the orchestrator computes them
+# once before starting the agent. Every agent fits the paper's sections into its prompt,
+# the market agent searches competitors with the paper embedding.
+AGENT_INPUTS = {
+    'tech_ip': ('sections',),
+    'market': ('sections', 'paper_embedding'),
+    'team': ('sections',),
+    'scaling': ('sections',),
+    'funding': ('sections',),
+    'impact': ('sections',),
+}
+
+# Bump an agent's number when its parsing or non-LLM logic changes; prompt, token and
+# model changes are picked up by agent_version automatically
+AGENT_VERSIONS = {'tech_ip': 1, 'market': 1, 'team': 1, 'scaling': 1, 'funding': 1, 'impact': 1}
+
+_AGENT_PROMPTS = {
+    'tech_ip': (TECH_IP_RUBRIC, TECH_IP_MAX_TOKENS),
+    'market': (MARKET_RUBRIC, MARKET_MAX_TOKENS),
+    'team': (TEAM_RUBRIC, TEAM_MAX_TOKENS),
+    'scaling': (SCALING_RUBRIC, SCALING_MAX_TOKENS),
+    'funding': (FUNDING_RUBRIC, FUNDING_MAX_TOKENS),
+    'impact': (IMPACT_RUBRIC, IMPACT_MAX_TOKENS),
+}
+
+def agent_version(agent_name: str) -> str:
+    """Version of an agent's output: changes with its prompt, token limits, model or AGENT_VERSIONS entry"""
+    rubric, max_tokens = _AGENT_PROMPTS[agent_name]
+    budgets = {key: value for key, value in AGENT_TOKEN_BUDGETS.items() if key == agent_name or key.startswith(agent_name + "_")}
+    payload = json.dumps([AGENT_VERSIONS[agent_name], rubric, max_tokens, budgets, DEFAULT_MODEL], sort_keys=True)
+    return f"{AGENT_VERSIONS[agent_name]}-{hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]}"
+
+def is_fallback_result(agent_name: str, result: Any) -> bool:
+    """True for errors and for the heuristic results agents return when Claude's answer was unusable"""
+    if not isinstance(result, dict) or "error" in result:
+        return True
+    if agent_name == 'tech_ip':
+        return str(result.get("rationale", "")).startswith(("Fallback analysis", "Analysis failed"))
+    if agent_name == 'market':
+        result = result.get("market_analysis") or {}
+    return str(result.get("rationale", "")).startswith("Analysis failed")
+
+def build_agent_request(agent_name: str, paper_text: str, authors_text: str = "") -> Tuple[str, str, int]:
+    """Return (prefix, prompt, max_tokens) for one agent"""
+    if agent_name == 'tech_ip':
+        return (*build_tech_ip_prompt(paper_text), TECH_IP_MAX_TOKENS)
+    if agent_name == 'market':
+        return (*build_market_prompt(paper_text), MARKET_MAX_TOKENS)
+    if agent_name == 'team':
+        return (*build_team_prompt(authors_text or paper_text, paper_text), TEAM_MAX_TOKENS)
+    if agent_name == 'scaling':
+        return (*build_scaling_prompt(paper_text), SCALING_MAX_TOKENS)
+    if agent_name == 'funding':
+        return (*build_funding_prompt(paper_text), FUNDING_MAX_TOKENS)
+    if agent_name == 'impact':
+        return (*build_impact_prompt(paper_text), IMPACT_MAX_TOKENS)
+    raise ValueError(f"Unknown agent: {agent_name}. Valid: {AGENT_NAMES}")
+
+def finalize_agent_output(agent_name: str, output_text: str, paper_text: str, authors_text: str = "") -> Dict[str, Any]:
+    """Turn a raw completion into the agent's result, applying the agent's fallbacks"""
+    if agent_name == 'tech_ip':
+        parsed = parse_tech_ip_output(output_text)
+        return parsed if parsed is not None else _intelligent_fallback_analysis(paper_text)
+    if agent_name == 'market':
+        try:
+            market_analysis = parse_market_output(output_text)
+        except Exception as e:
+            market_analysis = _market_analysis_fallback(e)
+        competitors, investors, fallback = find_market_competitors(paper_text)
+        return {
+            "market_analysis": market_analysis,
+            "competitors": competitors,
+            "investors": investors,
+            "fallback_owler": fallback
+        }
+
+    parsers = {
+        'team': (parse_team_output, _team_fallback),
+        'scaling': (parse_scaling_output, _scaling_fallback),
+        'funding': (parse_funding_output, _funding_fallback),
+        'impact': (parse_impact_output, _impact_fallback),
+    }
+    if agent_name not in parsers:
+        raise ValueError(f"Unknown agent: {agent_name}. Valid: {AGENT_NAMES}")
+    parse, fallback = parsers[agent_name]
+    try:
+        return parse(output_text)
+    except Exception as e:
+        return fallback(e)
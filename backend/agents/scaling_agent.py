@@ -1,7 +1,9 @@
 # backend/agents/scaling_agent.py
 import json
 import re
-from backend.utils.claude_client import claude_ask
+from backend.utils.claude_client import ABORT_ERRORS, claude_ask, claude_ask_async
+from backend.config import AGENT_TOKEN_BUDGETS
+from backend.utils.prompt_utils import research_prompt
 
 def _safe_json_parse(s: str):
     if not s:
@@ -17,46 +19,72 @@ def _safe_json_parse(s: str):
                 return None
     return None
 
+SCALING_MAX_TOKENS = 1000
+
+SCALING_RUBRIC = (
+    "You are a SPRIND analyst evaluating SCALING & GO-TO-MARKET potential (15 points total):\n\n"
+    
+    "A. MANUFACTURING/SCALE FEASIBILITY (8 points):\n"
+    "- If physical product: EU supply chain readiness & cost analysis\n"
+    "- Evidence: supply chain complexity, component sources, manufacturing requirements\n"
+    "- Consider cleantech/healthcare specific challenges\n"
+    "- Score 0-5 based on EU manufacturing feasibility\n\n"
+    
+    "B. REGULATORY PATHWAY (EU) (7 points):\n"
+    "- Is there a clear path (CE mark, MDR, EMA, GDPR compliance)?\n"
+    "- What is the expected time/cost for regulatory approval?\n"
+    "- Evidence: regulatory class, known standards, compliance requirements\n"
+    "- Major weight for medtech, energy, agri sectors\n"
+    "- Score 0-5 based on EU regulatory clarity and feasibility\n\n"
+    
+    "RETURN JSON: "
+    '{"manufacturing_score": 4, "regulatory_score": 3, "risks": ["risk1", "risk2"], "rationale": "detailed analysis", "time_to_market": "X years"}\n\n'
+)
+
+def build_scaling_prompt(text):
+    """Return (prefix, prompt); prefix is the shared paper block in shared-prefix mode"""
+    return research_prompt(SCALING_RUBRIC, text, AGENT_TOKEN_BUDGETS["scaling"])
+
+def parse_scaling_output(output_text):
+    result = _safe_json_parse(output_text)
+    if not result:
+        raise ValueError("Failed to parse JSON")
+    return normalize_scaling_result(result)
+
+def normalize_scaling_result(result):
+    # Ensure all required fields exist
+    result.setdefault("manufacturing_score", 2)
+    result.setdefault("regulatory_score", 2)
+    result.setdefault("risks", [])
+    result.setdefault("rationale", "")
+    result.setdefault("time_to_market", "Unknown")
+    return result
+
+def _scaling_fallback(e):
+    return {
+        "manufacturing_score": 2, 
+        "regulatory_score": 2, 
+        "risks": [], 
+        "rationale": f"Analysis failed: {str(e)}",
+        "time_to_market": "Unknown"
+    }
+
 def evaluate_scaling(text):
-    prompt = (
-        "You are a SPRIND analyst evaluating SCALING & GO-TO-MARKET potential (15 points total):\n\n"
-        
-        "A. MANUFACTURING/SCALE FEASIBILITY (8 points):\n"
-        "- If physical product: EU supply chain readiness & cost analysis\n"
-        "- Evidence: supply chain complexity, component sources, manufacturing requirements\n"
-        "- Consider cleantech/healthcare specific challenges\n"
-        "- Score 0-5 based on EU manufacturing feasibility\n\n"
-        
-        "B. REGULATORY PATHWAY (EU) (7 points):\n"
-        "- Is there a clear path (CE mark, MDR, EMA, GDPR compliance)?\n"
-        "- What is the expected time/cost for regulatory approval?\n"
-        "- Evidence: regulatory class, known standards, compliance requirements\n"
-        "- Major weight for medtech, energy, agri sectors\n"
-        "- Score 0-5 based on EU regulatory clarity and feasibility\n\n"
-        
-        "RETURN JSON: "
-        '{"manufacturing_score": 4, "regulatory_score": 3, "risks": ["risk1", "risk2"], "rationale": "detailed analysis", "time_to_market": "X years"}\n\n'
-        f"Research text: {text[:12000]}\n\nAssistant:"
-    )
-
-    output_text = ""
     try:
-        output_text = claude_ask(prompt, max_tokens=1000)
-        result = _safe_json_parse(output_text)
-        if not result:
-            raise ValueError("Failed to parse JSON")
-        # Ensure all required fields exist
-        result.setdefault("manufacturing_score", 2)
-        result.setdefault("regulatory_score", 2)
-        result.setdefault("risks", [])
-        result.setdefault("rationale", "")
-        result.setdefault("time_to_market", "Unknown")
-        return result
+        prefix, prompt = build_scaling_prompt(text)
+        output_text = claude_ask(prompt, max_tokens=SCALING_MAX_TOKENS, prefix=prefix)
+        return parse_scaling_output(output_text)
+    except ABORT_ERRORS:
+        raise
+    except Exception as e:
+        return _scaling_fallback(e)
+
+async def evaluate_scaling_async(text):
+    try:
+        prefix, prompt = build_scaling_prompt(text)
+        output_text = await claude_ask_async(prompt, max_tokens=SCALING_MAX_TOKENS, prefix=prefix)
+        return parse_scaling_output(output_text)
+    except ABORT_ERRORS:
+        raise
     except Exception as e:
-        return {
-            "manufacturing_score": 2, 
-            "regulatory_score": 2, 
-            "risks": [], 
-            "rationale": f"Analysis failed: {str(e)}",
-            "time_to_market": "Unknown"
-        }
+        return _scaling_fallback(e)
@@ -1,7 +1,9 @@
 # backend/agents/team_agent.py
 import json
 import re
-from backend.utils.claude_client import claude_ask
+from backend.utils.claude_client import ABORT_ERRORS, claude_ask, claude_ask_async
+from backend.config import AGENT_TOKEN_BUDGETS
+from backend.utils.prompt_utils import paper_block, shared_prefix_enabled, fit_text
 
 def _safe_json_parse(s: str):
     if not s:
@@ -17,47 +19,83 @@ def _safe_json_parse(s: str):
                 return None
     return None
 
-def evaluate_team(authors_text, paper_text=""):
-    prompt = (
-        "You are a SPRIND analyst evaluating TEAM & FOUNDING POTENTIAL (15 points total):\n\n"
-        
-        "A. RESEARCH TEAM'S TRANSLATIONAL TRACK RECORD (10 points):\n"
-        "- Have authors spun out startups, licensed tech, or commercialized before?\n"
-        "- Evidence: author bios, ORCID, LinkedIn, prior startups, industry experience\n"
-        "- SPRIND emphasizes expert leadership and translational experience\n"
-        "- Score 0-5 based on commercialization track record\n\n"
-        
-        "B. COMPLEMENTARY SKILLS & HIRING FEASIBILITY IN EU (5 points):\n"
-        "- Are required skills (hardware, software, clinical trials) available in target region?\n"
-        "- Evidence: job market/skills shortage reports (EURES/Eurostat)\n"
-        "- Consider EU talent availability and hiring challenges\n"
-        "- Score 0-5 based on EU skills availability\n\n"
-        
-        "RETURN JSON: "
-        '{"translational_score": 4, "eu_skills_score": 3, "missing_roles": ["CEO", "CTO"], "rationale": "detailed analysis", "founding_potential": "high/medium/low"}\n\n'
-        f"Authors: {authors_text[:5000]}\n"
-        f"Research context: {paper_text[:5000]}\n\nAssistant:"
+TEAM_MAX_TOKENS = 800
+
+TEAM_RUBRIC = (
+    "You are a SPRIND analyst evaluating TEAM & FOUNDING POTENTIAL (15 points total):\n\n"
+    
+    "A. RESEARCH TEAM'S TRANSLATIONAL TRACK RECORD (10 points):\n"
+    "- Have authors spun out startups, licensed tech, or commercialized before?\n"
+    "- Evidence: author bios, ORCID, LinkedIn, prior startups, industry experience\n"
+    "- SPRIND emphasizes expert leadership and translational experience\n"
+    "- Score 0-5 based on commercialization track record\n\n"
+    
+    "B. COMPLEMENTARY SKILLS & HIRING FEASIBILITY IN EU (5 points):\n"
+    "- Are required skills (hardware, software, clinical trials) available in target region?\n"
+    "- Evidence: job market/skills shortage reports (EURES/Eurostat)\n"
+    "- Consider EU talent availability and hiring challenges\n"
+    "- Score 0-5 based on EU skills availability\n\n"
+    
+    "RETURN JSON: "
+    '{"translational_score": 4, "eu_skills_score": 3, "missing_roles": ["CEO", "CTO"], "rationale": "detailed analysis", "founding_potential": "high/medium/low"}\n\n'
+)
+
+def build_team_prompt(authors_text, paper_text=""):
+    """Return (prefix, prompt); prefix is the shared paper block in shared-prefix mode"""
+    authors_text = fit_text(authors_text, AGENT_TOKEN_BUDGETS["team_authors"])
+    if shared_prefix_enabled() and paper_text:
+        return paper_block(paper_text), (
+            TEAM_RUBRIC +
+            "Use the research text provided above as context.\n"
+            f"Authors: {authors_text}\n\nAssistant:"
+        )
+    return "", (
+        TEAM_RUBRIC +
+        f"Authors: {authors_text}\n"
+        f"Research context: {fit_text(paper_text, AGENT_TOKEN_BUDGETS['team_context'])}\n\nAssistant:"
     )
 
-    output_text = ""
+def parse_team_output(output_text):
+    result = _safe_json_parse(output_text)
+    if not result:
+        raise ValueError("Failed to parse JSON")
+    return normalize_team_result(result)
+
+def normalize_team_result(result):
+    # Ensure all required fields exist
+    result.setdefault("translational_score", 2)
+    result.setdefault("eu_skills_score", 2)
+    result.setdefault("missing_roles", [])
+    result.setdefault("rationale", "")
+    result.setdefault("founding_potential", "medium")
+    return result
+
+def _team_fallback(e):
+    # fallback: return default
+    return {
+        "translational_score": 2, 
+        "eu_skills_score": 2, 
+        "missing_roles": [], 
+        "rationale": f"Analysis failed: {str(e)}",
+        "founding_potential": "medium"
+    }
+
+def evaluate_team(authors_text, paper_text=""):
+    try:
+        prefix, prompt = build_team_prompt(authors_text, paper_text)
+        output_text = claude_ask(prompt, max_tokens=TEAM_MAX_TOKENS, prefix=prefix)
+        return parse_team_output(output_text)
+    except ABORT_ERRORS:
+        raise
+    except Exception as e:
+        return _team_fallback(e)
+
+async def evaluate_team_async(authors_text, paper_text=""):
     try:
-        output_text = claude_ask(prompt, max_tokens=800)
-        result = _safe_json_parse(output_text)
-        if not result:
-            raise ValueError("Failed to parse JSON")
-        # Ensure all required fields exist
-        result.setdefault("translational_score", 2)
-        result.setdefault("eu_skills_score", 2)
-        result.setdefault("missing_roles", [])
-        result.setdefault("rationale", "")
-        result.setdefault("founding_potential", "medium")
-        return result
+        prefix, prompt = build_team_prompt(authors_text, paper_text)
+        output_text = await claude_ask_async(prompt, max_tokens=TEAM_MAX_TOKENS, prefix=prefix)
+        return parse_team_output(output_text)
+    except ABORT_ERRORS:
+        raise
     except Exception as e:
-        # fallback: return default
-        return {
-            "translational_score": 2, 
-            "eu_skills_score": 2, 
-            "missing_roles": [], 
-            "rationale": f"Analysis failed: {str(e)}",
-            "founding_potential": "medium"
-        }
+        return _team_fallback(e)
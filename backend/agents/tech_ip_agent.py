@@ -1,27 +1,16 @@
 # backend/agents/tech_ip_agent.py
+import asyncio
 import json
 import logging
 import re
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
-from backend.utils.claude_client import claude_ask
+from backend.utils.claude_client import ABORT_ERRORS, claude_ask, claude_ask_async
+from backend.config import AGENT_TOKEN_BUDGETS
+from backend.utils.prompt_utils import research_prompt, fit_text
 from backend.utils.logicmill_client import logicmill_patent_search
-from backend.utils.faiss_utils import create_faiss_index, search_faiss
-from backend.utils.data_utils import load_searchventures
-
-# Load SearchVentures CSV & build FAISS index
-try:
-    SV_DF = load_searchventures() or []
-except Exception:
-    SV_DF = []
-
-FAISS_INDEX = None
-try:
-    if hasattr(SV_DF, "empty") and not SV_DF.empty:
-        FAISS_INDEX, _ = create_faiss_index(SV_DF, text_column="candidate_text")
-except Exception:
-    logging.exception("Failed to create FAISS index at import")
-    FAISS_INDEX = None
+from backend.utils.faiss_utils import get_searchventures_index, search_faiss
+from backend.utils.artifacts import shared_artifact
 
 def _safe_json_parse(s: str) -> Any:
     if not s:
@@ -37,50 +26,87 @@ def _safe_json_parse(s: str) -> Any:
                 return None
     return None
 
+TECH_IP_MAX_TOKENS = 800
+
+TECH_IP_RUBRIC = (
+    "You are a SPRIND (German Federal Agency for Disruptive Innovation) analyst evaluating research for unicorn potential. "
+    "Analyze this research paper for TECHNOLOGY & IP criteria (25 points total):\n\n"
+    
+    "A. NOVELTY/SCIENTIFIC ADVANCEMENT (15 points):\n"
+    "- Does the research contain novel scientific/technical claims that materially outperform existing methods?\n"
+    "- Look for: novel methods, benchmarks, citation gaps, advancement potential\n"
+    "- Score 0-5 based on scientific advancement level\n\n"
+    
+    "B. TRL/ENGINEERING FEASIBILITY (5 points):\n"
+    "- Estimate Technology Readiness Level (1-9)\n"
+    "- Higher scores for: prototypes, reproducible code, replication shown\n"
+    "- Evidence: methods, experiments, datasets, implementation details\n\n"
+    
+    "C. IP & PATENTABILITY (5 points):\n"
+    "- Is it patentable/blocked by prior art?\n"
+    "- Are there existing patents in this domain?\n"
+    "- Consider EPO (European Patent Office) context\n\n"
+    
+    "RETURN JSON exactly: "
+    '{"novelty_bullets": ["bullet1", "bullet2"], "trl": 5, "novelty_score": 4, "ip_potential": 3, "rationale": "detailed analysis"}\n\n'
+)
+
+def build_tech_ip_prompt(text: str) -> Tuple[str, str]:
+    """Return (prefix, prompt); prefix is the shared paper block in shared-prefix mode"""
+    return research_prompt(TECH_IP_RUBRIC, text, AGENT_TOKEN_BUDGETS["tech_ip"])
+
+def parse_tech_ip_output(output_text: str) -> Any:
+    """Parse Claude's novelty JSON; returns None when the output is not usable"""
+    parsed = _safe_json_parse(output_text)
+    if isinstance(parsed, dict):
+        return normalize_tech_ip_result(parsed)
+    return None
+
+def normalize_tech_ip_result(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    parsed["novelty_bullets"] = parsed.get("novelty_bullets", []) or []
+    parsed["trl"] = int(parsed.get("trl", 1) or 1)
+    parsed["rationale"] = parsed.get("rationale", "") or ""
+    return parsed
+
 def claude_summarize_novelty(text: str) -> Dict[str, Any]:
     default = {"novelty_bullets": [], "trl": 1, "rationale": "", "novelty_score": 0, "ip_potential": 0}
     if not text:
         return default
 
-    prompt = (
-        "You are a SPRIND (German Federal Agency for Disruptive Innovation) analyst evaluating research for unicorn potential. "
-        "Analyze this research paper for TECHNOLOGY & IP criteria (25 points total):\n\n"
-        
-        "A. NOVELTY/SCIENTIFIC ADVANCEMENT (15 points):\n"
-        "- Does the research contain novel scientific/technical claims that materially outperform existing methods?\n"
-        "- Look for: novel methods, benchmarks, citation gaps, advancement potential\n"
-        "- Score 0-5 based on scientific advancement level\n\n"
-        
-        "B. TRL/ENGINEERING FEASIBILITY (5 points):\n"
-        "- Estimate Technology Readiness Level (1-9)\n"
-        "- Higher scores for: prototypes, reproducible code, replication shown\n"
-        "- Evidence: methods, experiments, datasets, implementation details\n\n"
-        
-        "C. IP & PATENTABILITY (5 points):\n"
-        "- Is it patentable/blocked by prior art?\n"
-        "- Are there existing patents in this domain?\n"
-        "- Consider EPO (European Patent Office) context\n\n"
-        
-        "RETURN JSON exactly: "
-        '{"novelty_bullets": ["bullet1", "bullet2"], "trl": 5, "novelty_score": 4, "ip_potential": 3, "rationale": "detailed analysis"}\n\n'
-        f"Research text: {text[:15000]}\n\nAssistant:"
-    )
-
     try:
-        output_text = claude_ask(prompt, max_tokens=800)
-        parsed = _safe_json_parse(output_text)
-        if isinstance(parsed, dict):
-            parsed["novelty_bullets"] = parsed.get("novelty_bullets", []) or []
-            parsed["trl"] = int(parsed.get("trl", 1) or 1)
-            parsed["rationale"] = parsed.get("rationale", "") or ""
+        prefix, prompt = build_tech_ip_prompt(text)
+        output_text = claude_ask(prompt, max_tokens=TECH_IP_MAX_TOKENS, prefix=prefix)
+        parsed = parse_tech_ip_output(output_text)
+        if parsed is not None:
             return parsed
         # If Claude response is not valid JSON, use fallback analysis
         return _intelligent_fallback_analysis(text)
+    except ABORT_ERRORS:
+        raise
     except Exception as e:
         logging.exception("Claude summarization failed")
         # Use fallback analysis instead of hardcoded values
         return _intelligent_fallback_analysis(text)
 
+async def claude_summarize_novelty_async(text: str) -> Dict[str, Any]:
+    """Async twin of claude_summarize_novelty"""
+    default = {"novelty_bullets": [], "trl": 1, "rationale": "", "novelty_score": 0, "ip_potential": 0}
+    if not text:
+        return default
+
+    try:
+        prefix, prompt = build_tech_ip_prompt(text)
+        output_text = await claude_ask_async(prompt, max_tokens=TECH_IP_MAX_TOKENS, prefix=prefix)
+        parsed = parse_tech_ip_output(output_text)
+        if parsed is not None:
+            return parsed
+    except ABORT_ERRORS:
+        raise
+    except Exception:
+        logging.exception("Claude summarization failed")
+    # The fallback does FAISS and LogicMill I/O, keep it off the event loop
+    return await asyncio.to_thread(_intelligent_fallback_analysis, text)
+
 def _intelligent_fallback_analysis(text: str) -> Dict[str, Any]:
     """Fallback analysis using FAISS and LogicMill data"""
     try:
@@ -126,17 +152,19 @@ def logicmill_search_wrapper(text: str):
     Wrapper around the LogicMill client returning the raw JSON or error dict.
     """
     try:
-        return logicmill_patent_search(text)
+        return shared_artifact("logicmill", text, lambda: logicmill_patent_search(text))
     except Exception as e:
         return {"error": f"LogicMill call failed: {str(e)}"}
 
 
 def faiss_similarities(text: str, top_k: int = 5) -> List[Dict[str, Any]]:
-    if FAISS_INDEX is None or SV_DF is None or getattr(SV_DF, "empty", True):
+    # SearchVentures CSV & FAISS index, shared with the market agent and loaded on first use
+    sv_df, faiss_index = get_searchventures_index()
+    if faiss_index is None or sv_df is None or getattr(sv_df, "empty", True):
         return []
 
     try:
-        results = search_faiss(FAISS_INDEX, SV_DF, text, top_k=top_k)
+        results = search_faiss(faiss_index, sv_df, text, top_k=top_k)
         out = []
         for r in results:
             out.append({
@@ -160,8 +188,10 @@ def analyze_tech_ip(text: str):
     # Claude
     try:
         result["summary"] = claude_ask(
-            f"Summarize novelty and TRL (1-9) for this research: {text[:15000]}"
+            f"Summarize novelty and TRL (1-9) for this research: {fit_text(text, AGENT_TOKEN_BUDGETS['tech_ip'])}"
         )
+    except ABORT_ERRORS:
+        raise
     except Exception as e:
         result["summary"]["rationale"] = f"Claude request failed: {str(e)}"
 
@@ -0,0 +1,257 @@
+"""
+Batch Scoring Pipeline
+Offline re-scoring of many papers through a message-batch job instead of
+6 synchronous Claude calls per paper.
+
+Every agent prompt for N papers is collected into one batch, submitted through a
+pluggable transport, polled until it ends, and the completions are fed back
+through the agents' parsers into calculate_comprehensive_score.
+
+Usage:
+    python -m backend.batch_pipeline papers_dir/ --out scores.jsonl
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional
+
+from backend.agents.registry import AGENT_NAMES, build_agent_request, finalize_agent_output
+from backend.comprehensive_scorer import calculate_comprehensive_score
+from backend.utils.claude_client import SYSTEM_PROMPT, build_message_params, get_claude_client, claude_ask, is_failure_text
+from backend.utils.faiss_utils import prefetch_searchventures, prefetched_searches
+from backend.utils.response_cache import get_response_cache, make_cache_key
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class BatchTransport(ABC):
+    """Submits message batches and fetches their results"""
+
+    @abstractmethod
+    def submit(self, requests: List[Dict[str, Any]]) -> str:
+        """Submit [{"custom_id": str, "params": messages-api body}], return a batch id"""
+
+    @abstractmethod
+    def is_done(self, batch_id: str) -> bool:
+        """True once every request of the batch has a result"""
+
+    @abstractmethod
+    def results(self, batch_id: str) -> Dict[str, Optional[str]]:
+        """Map custom_id -> completion text (None for failed requests)"""
+
+
+class AnthropicBatchTransport(BatchTransport):
+    """Anthropic Message Batches API, through the shared client"""
+
+    def __init__(self, client=None):
+        self.client = client or get_claude_client()
+        if self.client is None:
+            raise RuntimeError("Claude client not available for batch submission")
+
+    def submit(self, requests: List[Dict[str, Any]]) -> str:
+        batch = self.client.messages.batches.create(requests=requests)
+        return batch.id
+
+    def is_done(self, batch_id: str) -> bool:
+        return self.client.messages.batches.retrieve(batch_id).processing_status == "ended"
+
+    def results(self, batch_id: str) -> Dict[str, Optional[str]]:
+        outputs = {}
+        for entry in self.client.messages.batches.results(batch_id):
+            if entry.result.type == "succeeded":
+                outputs[entry.custom_id] = entry.result.message.content[0].text
+            else:
+                logger.warning(f"Batch request {entry.custom_id} {entry.result.type}")
+                outputs[entry.custom_id] = None
+        return outputs
+
+
+class LocalBatchTransport(BatchTransport):
+    """
+    In-process stand-in for a batch server, for tests and local runs.
+    Each request is answered by `responder(params) -> text` on a background thread.
+    """
+
+    def __init__(self, responder: Optional[Callable[[Dict[str, Any]], str]] = None):
+        self.responder = responder or self._ask_claude
+        self._batches: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _ask_claude(params: Dict[str, Any]) -> str:
+        content = params["messages"][0]["content"]
+        if isinstance(content, str):
+            prefix, prompt = "", content
+        else:
+            prefix, prompt = content[0]["text"], content[1]["text"]
+        text = claude_ask(prompt, max_tokens=params["max_tokens"], model=params["model"], prefix=prefix)
+        if is_failure_text(text):
+            # A failed request, not a completion: reported as None like a failed batch entry
+            raise RuntimeError(text)
+        return text
+
+    def submit(self, requests: List[Dict[str, Any]]) -> str:
+        batch_id = f"local_batch_{uuid.uuid4().hex[:12]}"
+        batch = {"done": threading.Event(), "results": {}}
+        with self._lock:
+            self._batches[batch_id] = batch
+
+        def work():
+            for request in requests:
+                try:
+                    batch["results"][request["custom_id"]] = self.responder(request["params"])
+                except Exception as e:
+                    logger.warning(f"Local batch request {request['custom_id']} failed: {e}")
+                    batch["results"][request["custom_id"]] = None
+            batch["done"].set()
+
+        threading.Thread(target=work, daemon=True).start()
+        return batch_id
+
+    def is_done(self, batch_id: str) -> bool:
+        return self._batches[batch_id]["done"].is_set()
+
+    def results(self, batch_id: str) -> Dict[str, Optional[str]]:
+        with self._lock:
+            batch = self._batches.pop(batch_id)
+        return dict(batch["results"])
+
+
+class BatchScoringPipeline:
+    """Collects agent prompts for many papers, runs them as batch jobs and scores the papers"""
+
+    def __init__(self, transport: BatchTransport, agents: Optional[List[str]] = None,
+                 poll_interval: float = 30.0, max_wait: float = 24 * 3600,
+                 max_requests_per_batch: int = 10000, use_cache: bool = True):
+        self.transport = transport
+        self.agents = agents or list(AGENT_NAMES)
+        self.poll_interval = poll_interval
+        self.max_wait = max_wait
+        self.max_requests_per_batch = max_requests_per_batch
+        self.cache = get_response_cache() if use_cache else None
+
+    def build_requests(self, papers: List[Dict[str, str]]):
+        """
+        Return (requests, outputs, cache_keys). Requests already answered by the
+        response cache are not submitted; their text is put in outputs directly.
+        """
+        requests = []
+        outputs: Dict[str, Optional[str]] = {}
+        cache_keys: Dict[str, str] = {}
+        for index, paper in enumerate(papers):
+            for agent_name in self.agents:
+                # custom_id must match ^[a-zA-Z0-9_-]{1,64}$
+                custom_id = f"p{index}-{agent_name}"
+                prefix, prompt, max_tokens = build_agent_request(agent_name, paper["text"], paper.get("authors", ""))
+                params = build_message_params(prompt, max_tokens, prefix=prefix)
+                if self.cache:
+                    key = make_cache_key(params["model"], SYSTEM_PROMPT, prompt, max_tokens, prefix)
+                    cached = self.cache.get(key)
+                    # Failure texts cached by older versions are not answers
+                    if cached is not None and not is_failure_text(cached):
+                        outputs[custom_id] = cached
+                        continue
+                    cache_keys[custom_id] = key
+                requests.append({"custom_id": custom_id, "params": params})
+        return requests, outputs, cache_keys
+
+    def _wait(self, batch_id: str) -> None:
+        deadline = time.monotonic() + self.max_wait
+        while not self.transport.is_done(batch_id):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Batch {batch_id} did not finish within {self.max_wait}s")
+            time.sleep(self.poll_interval)
+
+    def run(self, papers: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """
+        papers: [{"id": ..., "text": ..., "authors": ...}]
+        Returns one result dict per paper, in input order.
+        """
+        requests, outputs, cache_keys = self.build_requests(papers)
+        logger.info(f"Batch pipeline: {len(papers)} papers, {len(requests)} requests to submit, {len(outputs)} cached")
+
+        for start in range(0, len(requests), self.max_requests_per_batch):
+            chunk = requests[start:start + self.max_requests_per_batch]
+            batch_id = self.transport.submit(chunk)
+            logger.info(f"Submitted batch {batch_id} with {len(chunk)} requests")
+            self._wait(batch_id)
+            chunk_outputs = self.transport.results(batch_id)
+            for custom_id, text in chunk_outputs.items():
+                if is_failure_text(text):
+                    # claude_ask never caches these; a failed request is reported as failed
+                    text = None
+                outputs[custom_id] = text
+                if self.cache and text is not None and custom_id in cache_keys:
+                    self.cache.set(cache_keys[custom_id], text)
+
+        # Competitor lookups (market, tech/IP fallback) of all papers: one batched encode and FAISS search
+        prefetch = None
+        if {"market", "tech_ip"} & set(self.agents):
+            prefetch = prefetch_searchventures([paper["text"] for paper in papers])
+
+        scored = []
+        with prefetched_searches(prefetch):
+            for index, paper in enumerate(papers):
+                paper_text, authors_text = paper["text"], paper.get("authors", "")
+                results: Dict[str, Any] = {}
+                for agent_name in self.agents:
+                    output_text = outputs.get(f"p{index}-{agent_name}")
+                    if output_text is None:
+                        # Errored, expired or rate limited past its retries: no answer, so no fallback score either
+                        results[agent_name] = {"error": "Batch request failed", "agent": agent_name, "status": "failed"}
+                        continue
+                    results[agent_name] = finalize_agent_output(agent_name, output_text, paper_text, authors_text)
+                try:
+                    results.update(calculate_comprehensive_score(paper_text, authors_text, results))
+                except Exception as e:
+                    logger.error(f"Comprehensive scoring failed for paper {paper.get('id', index)}: {e}")
+                    results["error"] = f"Scoring failed: {str(e)}"
+                results["paper_id"] = paper.get("id", index)
+                scored.append(results)
+        return scored
+
+
+def load_papers(path: str) -> List[Dict[str, str]]:
+    """Load .txt and .pdf papers from a directory (or a single file)"""
+    files = [path] if os.path.isfile(path) else sorted(
+        os.path.join(path, name) for name in os.listdir(path)
+        if name.lower().endswith((".txt", ".pdf"))
+    )
+    papers = []
+    for file_path in files:
+        if file_path.lower().endswith(".pdf"):
+            from backend.utils.pdf_utils import extract_text_from_pdf
+            with open(file_path, "rb") as f:
+                text = extract_text_from_pdf(f)
+        else:
+            with open(file_path, "r", encoding="utf-8") as f:
+                text = f.read()
+        if text.strip():
+            papers.append({"id": os.path.basename(file_path), "text": text, "authors": ""})
+    return papers
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("papers", help="Directory of .txt/.pdf papers (or a single file)")
+    p.add_argument("--out", default="batch_scores.jsonl", help="Output JSONL file")
+    p.add_argument("--transport", choices=["anthropic", "local"], default="anthropic")
+    p.add_argument("--poll-interval", type=float, default=30.0)
+    p.add_argument("--agents", nargs="+", default=None, help=f"Subset of {AGENT_NAMES}")
+    args = p.parse_args()
+
+    transport = AnthropicBatchTransport() if args.transport == "anthropic" else LocalBatchTransport()
+    pipeline = BatchScoringPipeline(transport, agents=args.agents, poll_interval=args.poll_interval)
+    scored = pipeline.run(load_papers(args.papers))
+    with open(args.out, "w", encoding="utf-8") as f:
+        for row in scored:
+            f.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+    logger.info(f"Wrote {len(scored)} scored papers to {args.out}")
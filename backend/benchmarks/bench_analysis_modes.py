@@ -0,0 +1,63 @@
+# backend/benchmarks/bench_analysis_modes.py
+"""
+Compare the six-call ("split") analysis path against the fused single-call path
+and the shared-prefix (provider prompt caching) path.
+Reports API token usage, prompt-cache reads/writes and wall-clock per mode. The
+response cache is disabled so every run hits the API.
+
+Usage:
+    python -m backend.benchmarks.bench_analysis_modes paper.txt --authors "..." --runs 3
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+# Must be set before backend modules read the config
+os.environ.setdefault("CLAUDE_CACHE_ENABLED", "0")
+
+from backend.simple_orchestrator import SimpleOrchestrator
+from backend.utils.logger import save_run_log
+
+def run_mode(orchestrator, mode, text, authors, runs):
+    timings = []
+    usage_runs = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = orchestrator.run_analysis(text, authors, mode=mode)
+        timings.append(time.perf_counter() - start)
+        usage_runs.append(result.get("llm_usage") or {})
+    return {
+        "mode": mode,
+        "runs": runs,
+        "wall_clock_s_mean": round(statistics.mean(timings), 3),
+        "wall_clock_s_max": round(max(timings), 3),
+        "requests_per_run": statistics.mean(u.get("requests", 0) for u in usage_runs),
+        "input_tokens_per_run": statistics.mean(u.get("input_tokens", 0) for u in usage_runs),
+        "output_tokens_per_run": statistics.mean(u.get("output_tokens", 0) for u in usage_runs),
+        "cache_write_tokens_per_run": statistics.mean(u.get("cache_creation_input_tokens", 0) for u in usage_runs),
+        "cache_read_tokens_per_run": statistics.mean(u.get("cache_read_input_tokens", 0) for u in usage_runs),
+    }
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("paper", help="Path to a txt file with the paper text")
+    p.add_argument("--authors", default="", help="Authors text (for team agent)")
+    p.add_argument("--runs", type=int, default=3)
+    p.add_argument("--modes", nargs="+", default=["split", "fused", "shared_prefix"])
+    args = p.parse_args()
+
+    with open(args.paper, "r", encoding="utf-8") as f:
+        paper_text = f.read()
+
+    orchestrator = SimpleOrchestrator()
+    report = [run_mode(orchestrator, mode, paper_text, args.authors, args.runs) for mode in args.modes]
+
+    print(f"{'mode':<15}{'requests':>10}{'input tok':>12}{'cache wr':>10}{'cache rd':>10}{'output tok':>12}{'mean s':>10}{'max s':>10}")
+    for row in report:
+        print(f"{row['mode']:<15}{row['requests_per_run']:>10.1f}{row['input_tokens_per_run']:>12.0f}"
+              f"{row['cache_write_tokens_per_run']:>10.0f}{row['cache_read_tokens_per_run']:>10.0f}"
+              f"{row['output_tokens_per_run']:>12.0f}{row['wall_clock_s_mean']:>10.2f}{row['wall_clock_s_max']:>10.2f}")
+    save_run_log({"benchmark": "analysis_modes", "paper": args.paper, "results": report}, prefix="bench_modes")
+    print(json.dumps(report, indent=2))
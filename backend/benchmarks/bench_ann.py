@@ -0,0 +1,147 @@
+# backend/benchmarks/bench_ann.py
+"""
+Recall and latency of the FAISS index types (FAISS_INDEX_TYPE) per corpus size.
+Holds --queries vectors out of the corpus, indexes the rest with every type in
+--types, and for each search setting (IVF nprobe, HNSW efSearch) reports
+recall@k against exact IndexFlatL2 results, p50/p99 single-query latency (how
+the agents search), build time and index size. Use it to pick an index and its
+knobs for a corpus size before changing the config.
+
+The corpus is the SearchVentures embedding matrix (persisted by
+backend.build_index), or with --synthetic clustered unit vectors of --dim
+dimensions for each given size, to see how the options scale past the current
+dataset.
+
+Usage:
+    python -m backend.benchmarks.bench_ann --k 10
+    python -m backend.benchmarks.bench_ann --synthetic 10000,100000,1000000 --dim 384 --types flat,ivf_pq,hnsw
+"""
+import argparse
+import json
+import statistics
+import time
+
+import numpy as np
+
+
+def _percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100.0 * len(ordered))) - 1)]
+
+
+def synthetic_corpus(rows, dim, seed=0):
+    """Unit vectors around rows/100 random centres, roughly the shape of sentence embeddings"""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((max(1, rows // 100), dim), dtype=np.float32)
+    vectors = centres[rng.integers(0, len(centres), rows)] + 0.5 * rng.standard_normal((rows, dim), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def searchventures_corpus():
+    from backend.utils.data_utils import load_searchventures
+    from backend.utils.faiss_utils import load_persisted_searchventures_index
+
+    df = load_searchventures()
+    if df.empty:
+        raise SystemExit("SearchVentures CSV not found; use --synthetic")
+    _, embeddings, _ = load_persisted_searchventures_index(df)
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def _search_settings(index, nprobes, ef_searches):
+    """[(label, tune kwargs)] to sweep for this index"""
+    import faiss
+
+    try:
+        faiss.extract_index_ivf(index)
+        return [({"nprobe": n}, {"nprobe": n}) for n in nprobes]
+    except RuntimeError:
+        pass
+    if hasattr(index, "hnsw"):
+        return [({"ef_search": ef}, {"ef_search": ef}) for ef in ef_searches]
+    return [({}, {})]
+
+
+def _recall(found, truth, k):
+    hits = sum(len(set(row[row >= 0]) & set(expected)) for row, expected in zip(found, truth))
+    return hits / float(k * len(truth))
+
+
+def bench_corpus(vectors, queries_n, k, types, nprobes, ef_searches, seed, threads):
+    import faiss
+    from backend.utils.faiss_utils import build_faiss_index, index_factory_string, index_params, tune_index
+
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(len(vectors))
+    queries = np.ascontiguousarray(vectors[order[:queries_n]])
+    base = np.ascontiguousarray(vectors[order[queries_n:]])
+    rows, dim = base.shape
+
+    exact = faiss.IndexFlatL2(dim)
+    exact.add(base)
+    _, truth = exact.search(queries, k)
+
+    build_threads = faiss.omp_get_max_threads()
+    results = []
+    for index_type in types:
+        start = time.perf_counter()
+        index = build_faiss_index(base, index_type)
+        build_seconds = time.perf_counter() - start
+        index_mb = len(faiss.serialize_index(index)) / (1024 * 1024)
+        # Builds use every core, searches --threads (one request's search runs on one thread)
+        faiss.omp_set_num_threads(threads or build_threads)
+        for label, knobs in _search_settings(index, nprobes, ef_searches):
+            tune_index(index, **knobs)
+            latencies = []
+            found = []
+            for query in queries:
+                start = time.perf_counter()
+                _, ids = index.search(query.reshape(1, -1), k)
+                latencies.append(time.perf_counter() - start)
+                found.append(ids[0])
+            results.append({
+                "rows": rows,
+                "index_type": index_type,
+                "factory": index_factory_string(rows, dim, index_params(index_type)),
+                **label,
+                "recall_at_k": round(_recall(found, truth, k), 4),
+                "latency_p50_ms": round(statistics.median(latencies) * 1000, 3),
+                "latency_p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+                "build_s": round(build_seconds, 3),
+                "index_mb": round(index_mb, 2),
+            })
+        faiss.omp_set_num_threads(build_threads)
+    return results
+
+
+def _ints(text):
+    return [int(part) for part in text.split(",") if part.strip()]
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--types", default="flat,ivf_flat,ivf_pq,hnsw", help="Comma-separated FAISS_INDEX_TYPE values")
+    p.add_argument("--k", type=int, default=10)
+    p.add_argument("--queries", type=int, default=200, help="Vectors held out of the corpus and used as queries")
+    p.add_argument("--nprobe", default="1,4,16,64", help="IVF lists probed, swept per IVF index")
+    p.add_argument("--ef-search", default="16,64,256", help="HNSW efSearch, swept per HNSW index")
+    p.add_argument("--synthetic", default=None, help="Comma-separated corpus sizes of synthetic vectors instead of SearchVentures")
+    p.add_argument("--dim", type=int, default=384, help="Dimension of synthetic vectors (all-MiniLM-L6-v2: 384)")
+    p.add_argument("--threads", type=int, default=1, help="faiss OpenMP threads while searching (0 leaves the default)")
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    from backend.utils.logger import save_run_log
+
+    types = [name.strip() for name in args.types.split(",") if name.strip()]
+    corpora = ([synthetic_corpus(rows + args.queries, args.dim, args.seed) for rows in _ints(args.synthetic)]
+               if args.synthetic else [searchventures_corpus()])
+
+    report = {"k": args.k, "queries": args.queries, "threads": args.threads, "results": []}
+    for vectors in corpora:
+        report["results"].extend(bench_corpus(vectors, min(args.queries, len(vectors) // 2), args.k, types,
+                                              _ints(args.nprobe), _ints(args.ef_search), args.seed, args.threads))
+    save_run_log({"benchmark": "ann", "source": "synthetic" if args.synthetic else "searchventures", "results": report},
+                 prefix="bench_ann")
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,79 @@
+# backend/benchmarks/bench_embedding.py
+"""
+Embedding throughput for concurrent single-text requests.
+--threads threads each embed --requests distinct texts, once calling the model
+directly (every request its own forward pass) and once through the
+micro-batching service (utils/embedding_service.py). Reports embeddings/second
+and latency percentiles for both, and the service's queue-time and batch-size
+histograms.
+
+Usage:
+    python -m backend.benchmarks.bench_embedding --threads 16 --requests 50 --wait-ms 5
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+
+
+def _percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100.0 * len(ordered))) - 1)]
+
+
+def run_load(encode, threads, requests, text_words):
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(worker_id):
+        for i in range(requests):
+            text = " ".join(f"w{worker_id}_{i}_{j}" for j in range(text_words))
+            start = time.perf_counter()
+            encode(text)
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "embeddings_per_s": round(len(latencies) / elapsed, 1),
+        "latency_p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "latency_p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+    }
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--threads", type=int, default=16, help="Concurrent callers")
+    p.add_argument("--requests", type=int, default=50, help="Texts embedded per caller, one at a time")
+    p.add_argument("--words", type=int, default=200, help="Words per text")
+    p.add_argument("--batch-size", type=int, default=None, help="Max texts per batch (default: EMBED_BATCH_SIZE)")
+    p.add_argument("--wait-ms", type=float, default=None, help="Batching window (default: EMBED_BATCH_WAIT_MS)")
+    args = p.parse_args()
+
+    from backend.config import EMBED_BATCH_SIZE, EMBED_BATCH_WAIT_MS
+    from backend.utils.embedding_service import EmbeddingBatcher, _encode_with_model
+    from backend.utils.faiss_utils import get_embedding_model
+    from backend.utils.logger import save_run_log
+
+    model = get_embedding_model()
+    model.encode(["warm up"], convert_to_numpy=True)
+    batcher = EmbeddingBatcher(_encode_with_model, args.batch_size or EMBED_BATCH_SIZE,
+                               EMBED_BATCH_WAIT_MS if args.wait_ms is None else args.wait_ms)
+
+    report = {
+        "threads": args.threads,
+        "requests_per_thread": args.requests,
+        "direct": run_load(lambda text: model.encode([text], convert_to_numpy=True, batch_size=1),
+                           args.threads, args.requests, args.words),
+        "batched": run_load(lambda text: batcher.encode([text]), args.threads, args.requests, args.words),
+        "service": batcher.stats(),
+    }
+    save_run_log({"benchmark": "embedding", "results": report}, prefix="bench_embedding")
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,99 @@
+# backend/benchmarks/bench_import.py
+"""
+Cold-start cost of importing the app.
+Imports backend.main in --runs fresh interpreters and reports the import wall
+time (median/max), the slowest modules from `python -X importtime`, and
+whether any module that should only load on demand (embedding model, torch,
+FAISS; see utils/lazy.py) was imported. Exits with status 1 when the median
+exceeds --max-seconds or a lazy module was imported, so cold-start
+regressions can fail CI.
+
+Usage:
+    python -m backend.benchmarks.bench_import --runs 5 --max-seconds 3
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Heavy modules that must not be imported by `import backend.main`
+LAZY_MODULES = ("sentence_transformers", "torch", "faiss", "transformers")
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import backend.main
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "modules": sorted(m for m in sys.modules if "." not in m)}))
+"""
+
+
+def _parse_importtime(stderr: str):
+    """(self_us, cumulative_us, module) for every line of -X importtime output"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not (parts[0].strip().isdigit() and parts[1].strip().isdigit()):
+            continue
+        entries.append((int(parts[0]), int(parts[1]), parts[2].strip()))
+    return entries
+
+
+def measure_once(env):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE],
+        capture_output=True, text=True, env=env, check=False,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import backend.main failed:\n{proc.stderr[-2000:]}")
+    report = json.loads(proc.stdout.strip().splitlines()[-1])
+    report["importtime"] = _parse_importtime(proc.stderr)
+    return report
+
+
+def run(runs, top, forbid):
+    # Only the import is measured; the startup warm-up runs when the app starts serving
+    env = dict(os.environ)
+    samples = [measure_once(env) for _ in range(runs)]
+    seconds = [sample["seconds"] for sample in samples]
+    # Modules that spend the most time in their own body (excluding their imports), last run
+    slowest = sorted(samples[-1]["importtime"], reverse=True)[:top]
+    imported_lazy = sorted(set(forbid) & set(samples[-1]["modules"]))
+    return {
+        "runs": runs,
+        "import_median_s": round(statistics.median(seconds), 3),
+        "import_max_s": round(max(seconds), 3),
+        "slowest_modules": [
+            {"module": name, "self_ms": round(self_us / 1000.0, 1), "cumulative_ms": round(cumulative_us / 1000.0, 1)}
+            for self_us, cumulative_us, name in slowest
+        ],
+        "lazy_modules_imported": imported_lazy,
+    }
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("--runs", type=int, default=3)
+    p.add_argument("--top", type=int, default=15, help="How many of the slowest modules to list")
+    p.add_argument("--max-seconds", type=float, default=None, help="Fail when the median import takes longer")
+    p.add_argument("--allow", action="append", default=[], help="Lazy module that may be imported (repeatable)")
+    args = p.parse_args()
+
+    forbid = [name for name in LAZY_MODULES if name not in args.allow]
+    report = run(max(1, args.runs), args.top, forbid)
+
+    failures = []
+    if args.max_seconds is not None and report["import_median_s"] > args.max_seconds:
+        failures.append(f"median import {report['import_median_s']}s exceeds {args.max_seconds}s")
+    if report["lazy_modules_imported"]:
+        failures.append(f"imported at import time: {', '.join(report['lazy_modules_imported'])}")
+    report["failures"] = failures
+
+    from backend.utils.logger import save_run_log
+    save_run_log({"benchmark": "import", "results": report}, prefix="bench_import")
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if failures else 0)
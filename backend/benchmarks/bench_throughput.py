@@ -0,0 +1,126 @@
+# backend/benchmarks/bench_throughput.py
+"""
+Orchestrator throughput under concurrent load.
+Runs --requests analyses with --concurrency in flight on one event loop and
+reports analyses/second, latency percentiles, and the rate limiter, retry,
+hedging and response-cache counters.
+
+With --mock the deterministic local LLM server (backend/mock_llm_server.py) is
+started in-process and used instead of the real API, so runs are reproducible
+and need no API key.
+
+Usage:
+    python -m backend.benchmarks.bench_throughput paper.txt --requests 50 --concurrency 10 --mock --mock-rate-429 0.05
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import threading
+import time
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_mock_server(args) -> str:
+    """Start the mock LLM server on a background thread and return its base URL"""
+    import uvicorn
+    from backend.mock_llm_server import MockSettings, create_app
+
+    settings = MockSettings(
+        seed=args.seed,
+        latency=args.mock_latency,
+        error_rate=args.mock_error_rate,
+        rate_429=args.mock_rate_429,
+    )
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(create_app(settings), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}"
+
+
+def _percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100.0 * len(ordered))) - 1)]
+
+
+async def run_load(text, authors, requests, concurrency, mode, distinct):
+    from backend.simple_orchestrator import run_simple_analysis_async
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    failures = 0
+
+    async def one(index):
+        nonlocal failures
+        # Distinct suffixes defeat the response cache when measuring raw API throughput
+        paper = f"{text}\n\n[run {index}]" if distinct else text
+        async with semaphore:
+            start = time.perf_counter()
+            result = await run_simple_analysis_async(paper, authors, mode=mode)
+            latencies.append(time.perf_counter() - start)
+            if "error" in result:
+                failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "mode": mode,
+        "failures": failures,
+        "wall_clock_s": round(elapsed, 3),
+        "analyses_per_s": round(requests / elapsed, 3),
+        "latency_p50_s": round(statistics.median(latencies), 3),
+        "latency_p95_s": round(_percentile(latencies, 95), 3),
+        "latency_p99_s": round(_percentile(latencies, 99), 3),
+    }
+
+
+if __name__ == "__main__":
+    p = argparse.ArgumentParser()
+    p.add_argument("paper", help="Path to a txt file with the paper text")
+    p.add_argument("--authors", default="", help="Authors text (for team agent)")
+    p.add_argument("--requests", type=int, default=20)
+    p.add_argument("--concurrency", type=int, default=5)
+    p.add_argument("--mode", default=None, help="split, fused or shared_prefix (default: ANALYSIS_MODE)")
+    p.add_argument("--same-paper", action="store_true", help="Send the identical paper every time (exercises the response cache)")
+    p.add_argument("--mock", action="store_true", help="Run against the in-process mock LLM server")
+    p.add_argument("--mock-latency", default="lognormal:400,0.5")
+    p.add_argument("--mock-error-rate", type=float, default=0.0)
+    p.add_argument("--mock-rate-429", type=float, default=0.0)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    if args.mock:
+        # Must be set before the Claude client is first used
+        os.environ["ANTHROPIC_BASE_URL"] = start_mock_server(args)
+
+    from backend.utils.claude_client import get_usage_totals
+    from backend.utils.hedging import get_hedge_stats
+    from backend.utils.rate_limiter import get_limiter_stats
+    from backend.utils.response_cache import get_cache_stats
+    from backend.utils.logger import save_run_log
+
+    with open(args.paper, "r", encoding="utf-8") as f:
+        paper_text = f.read()
+
+    report = asyncio.run(run_load(paper_text, args.authors, args.requests, args.concurrency, args.mode, not args.same_paper))
+    report.update({
+        "mock": args.mock,
+        "claude_usage": get_usage_totals(),
+        "claude_limiter": get_limiter_stats(),
+        "claude_hedging": get_hedge_stats(),
+        "claude_cache": get_cache_stats(),
+    })
+    save_run_log({"benchmark": "throughput", "paper": args.paper, "results": report}, prefix="bench_throughput")
+    print(json.dumps(report, indent=2))
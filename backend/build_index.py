@@ -0,0 +1,57 @@
+# backend/build_index.py
+"""
+Build the persisted SearchVentures FAISS index ahead of deployment.
+Encodes the candidate_text of every row of SEARCHVENTURES_CSV with the
+embedding model and writes the index (FAISS_INDEX_TYPE) and the float32
+embedding matrix to INDEX_DIR, keyed by a hash of the CSV, the model name and
+the index build parameters (utils/index_store.py).
+Servers then memory-map it at startup instead of encoding the dataset. Without
+this step the first server start does the same build. Does nothing when an
+up-to-date build already exists, unless --force is given.
+
+Usage:
+    python -m backend.build_index [--csv data/searchventures.csv] [--index-type hnsw] [--force]
+"""
+import argparse
+import json
+import logging
+import os
+import time
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Build the persisted SearchVentures FAISS index")
+    p.add_argument("--csv", default=None, help="SearchVentures CSV (default: SEARCHVENTURES_CSV_PATH)")
+    p.add_argument("--index-dir", default=None, help="Output directory (default: INDEX_DIR)")
+    p.add_argument("--index-type", default=None, help="flat, ivf_flat, ivf_pq, hnsw or a factory string (default: FAISS_INDEX_TYPE)")
+    p.add_argument("--force", action="store_true", help="Rebuild even if an up-to-date build exists")
+    p.add_argument("--log-level", default="info")
+    args = p.parse_args()
+
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO))
+    # Read by backend.config, so they must be set before it is imported
+    if args.csv:
+        os.environ["SEARCHVENTURES_CSV_PATH"] = args.csv
+    if args.index_dir:
+        os.environ["INDEX_DIR"] = args.index_dir
+    if args.index_type:
+        os.environ["FAISS_INDEX_TYPE"] = args.index_type
+
+    from backend.config import INDEX_DIR, SEARCHVENTURES_CSV
+    from backend.utils.data_utils import load_searchventures
+    from backend.utils.faiss_utils import load_persisted_searchventures_index
+    from backend.utils.index_store import index_path
+
+    df = load_searchventures()
+    if df.empty:
+        raise SystemExit(f"No rows to index in {SEARCHVENTURES_CSV}")
+
+    start = time.perf_counter()
+    _, _, meta = load_persisted_searchventures_index(df, force=args.force)
+    meta["path"] = index_path("searchventures", meta["key"], INDEX_DIR)
+    meta["seconds"] = round(time.perf_counter() - start, 3)
+    print(json.dumps(meta, indent=2))
+
+
+if __name__ == "__main__":
+    main()
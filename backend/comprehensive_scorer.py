@@ -14,6 +14,16 @@ import pandas as pd
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Agent whose result each category is scored from
+CATEGORY_AGENTS = {
+    'technology_ip': 'tech_ip',
+    'market_business': 'market',
+    'team_founding': 'team',
+    'scaling_gtm': 'scaling',
+    'funding_exit': 'funding',
+    'impact_alignment': 'impact'
+}
+
 class ComprehensiveScorer:
     """Comprehensive scorer implementing the 100-point European-focused system"""
     
@@ -308,20 +318,35 @@ class ComprehensiveScorer:
             }
         }
     
+    def score_category(self, category: str, paper_text: str, authors_text: str, agent_results: Dict) -> Dict[str, Any]:
+        """Score one category; only needs the result of that category's agent (see CATEGORY_AGENTS)"""
+        if category == 'technology_ip':
+            return self.score_technology_ip(paper_text, agent_results)
+        if category == 'market_business':
+            return self.score_market_business(paper_text, agent_results)
+        if category == 'team_founding':
+            return self.score_team_founding(paper_text, authors_text, agent_results)
+        if category == 'scaling_gtm':
+            return self.score_scaling_gtm(paper_text, agent_results)
+        if category == 'funding_exit':
+            return self.score_funding_exit(paper_text, agent_results)
+        if category == 'impact_alignment':
+            return self.score_impact_alignment(paper_text, agent_results)
+        raise ValueError(f"Unknown category: {category}. Valid: {list(CATEGORY_AGENTS)}")
+    
     def calculate_comprehensive_score(self, paper_text: str, authors_text: str, agent_results: Dict) -> Dict[str, Any]:
         """Calculate the comprehensive 100-point score"""
         logger.info("Calculating comprehensive 100-point score")
         
         # Score each category
         scores = {
-            'technology_ip': self.score_technology_ip(paper_text, agent_results),
-            'market_business': self.score_market_business(paper_text, agent_results),
-            'team_founding': self.score_team_founding(paper_text, authors_text, agent_results),
-            'scaling_gtm': self.score_scaling_gtm(paper_text, agent_results),
-            'funding_exit': self.score_funding_exit(paper_text, agent_results),
-            'impact_alignment': self.score_impact_alignment(paper_text, agent_results)
+            category: self.score_category(category, paper_text, authors_text, agent_results)
+            for category in CATEGORY_AGENTS
         }
-        
+        return self.combine_category_scores(scores)
+    
+    def combine_category_scores(self, scores: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Total, grade and recommendation from the per-category scores"""
         # Calculate total score
         total_score = sum(score['total_score'] for score in scores.values())
         
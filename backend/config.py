@@ -6,6 +6,8 @@ load_dotenv("/Users/karthikgudibanda/Desktop/tumHACK/.env")
 
 # API keys
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
+# Optional Messages API endpoint override, e.g. a local backend/mock_llm_server.py for load tests
+ANTHROPIC_BASE_URL = os.getenv("ANTHROPIC_BASE_URL")
 LOGICMILL_API_KEY = os.getenv("LOGICMILL_API_KEY")
 LOGICMILL_URL = "https://api.logic-mill.net/api/v1/graphql/"
 
@@ -13,9 +15,116 @@ LOGICMILL_URL = "https://api.logic-mill.net/api/v1/graphql/"
 SEARCHVENTURES_CSV = os.getenv("SEARCHVENTURES_CSV_PATH", "./data/searchventures.csv")
 OPENVC_CSV = os.getenv("OPENVC_CSV_PATH", "./data/openvc_investors.csv")
 
+# Persisted FAISS indexes (python -m backend.build_index), memory-mapped at startup
+INDEX_PERSIST_ENABLED = os.getenv("INDEX_PERSIST_ENABLED", "1") == "1"
+INDEX_DIR = os.getenv("INDEX_DIR", "./cache/index")
+
+# FAISS index type: flat (exact), ivf_flat, ivf_pq, hnsw, or a faiss index_factory string
+# (compare them with backend/benchmarks/bench_ann.py)
+FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "flat")
+FAISS_NLIST = int(os.getenv("FAISS_NLIST", "0"))  # IVF lists; 0 = 4 * sqrt(rows)
+FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", "16"))
+FAISS_PQ_M = int(os.getenv("FAISS_PQ_M", "48"))  # PQ sub-quantizers; must divide the embedding dimension
+FAISS_PQ_NBITS = int(os.getenv("FAISS_PQ_NBITS", "8"))
+FAISS_HNSW_M = int(os.getenv("FAISS_HNSW_M", "32"))
+FAISS_HNSW_EF_CONSTRUCTION = int(os.getenv("FAISS_HNSW_EF_CONSTRUCTION", "80"))
+FAISS_HNSW_EF_SEARCH = int(os.getenv("FAISS_HNSW_EF_SEARCH", "64"))
+
+# Texts per embedding-model forward pass when many are encoded at once (batch analyses, index builds)
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+# Micro-batching of concurrent embedding requests (utils/embedding_service.py): requests arriving
+# within EMBED_BATCH_WAIT_MS of each other are encoded as one batch
+EMBED_BATCHING_ENABLED = os.getenv("EMBED_BATCHING_ENABLED", "1") == "1"
+EMBED_BATCH_WAIT_MS = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+
 # Claude max tokens
 MAX_CLAUDE_TOKENS = 800
 
 # Logging
 RUN_LOG_DIR = os.getenv("RUN_LOG_DIR", "./logs")
 os.makedirs(RUN_LOG_DIR, exist_ok=True)
+
+# Claude response cache (in-memory LRU in front of a SQLite file)
+CLAUDE_CACHE_ENABLED = os.getenv("CLAUDE_CACHE_ENABLED", "1") == "1"
+CLAUDE_CACHE_PATH = os.getenv("CLAUDE_CACHE_PATH", "./cache/claude_responses.sqlite")
+CLAUDE_CACHE_TTL_SECONDS = int(os.getenv("CLAUDE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+CLAUDE_CACHE_MAX_BYTES = int(os.getenv("CLAUDE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+CLAUDE_CACHE_MEMORY_ENTRIES = int(os.getenv("CLAUDE_CACHE_MEMORY_ENTRIES", "512"))
+
+# Per-agent result store (SQLite): reuse finished agents when a paper is analysed again
+RESULT_STORE_ENABLED = os.getenv("RESULT_STORE_ENABLED", "1") == "1"
+RESULT_STORE_PATH = os.getenv("RESULT_STORE_PATH", "./cache/agent_results.sqlite")
+RESULT_STORE_TTL_SECONDS = int(os.getenv("RESULT_STORE_TTL_SECONDS", str(30 * 24 * 3600)))
+
+# Analysis mode for SimpleOrchestrator: "split" (one request per agent), "fused" (one request for all
+# criteria) or "shared_prefix" (one request per agent, paper sent first as a provider-cached prefix)
+ANALYSIS_MODE = os.getenv("ANALYSIS_MODE", "split")
+# CrewAI orchestrator: "sequential" crew, "parallel" crew tasks, or "direct" tool calls without agent LLM steps
+CREWAI_EXECUTION_MODE = os.getenv("CREWAI_EXECUTION_MODE", "sequential")
+
+# Outbound Claude limits for the whole server (0 disables a limit). They are enforced per
+# process, so with WEB_CONCURRENCY worker processes each worker gets an equal share.
+WEB_CONCURRENCY = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+CLAUDE_MAX_CONCURRENCY = int(os.getenv("CLAUDE_MAX_CONCURRENCY", "8"))
+CLAUDE_REQUESTS_PER_MINUTE = int(os.getenv("CLAUDE_REQUESTS_PER_MINUTE", "50"))
+CLAUDE_INPUT_TOKENS_PER_MINUTE = int(os.getenv("CLAUDE_INPUT_TOKENS_PER_MINUTE", "50000"))
+# Retries for rate-limited/overloaded/transient failures, with exponential backoff
+CLAUDE_MAX_RETRIES = int(os.getenv("CLAUDE_MAX_RETRIES", "4"))
+CLAUDE_BACKOFF_BASE_SECONDS = float(os.getenv("CLAUDE_BACKOFF_BASE_SECONDS", "1.0"))
+CLAUDE_BACKOFF_MAX_SECONDS = float(os.getenv("CLAUDE_BACKOFF_MAX_SECONDS", "60"))
+
+# Fair scheduling of Claude requests (utils/scheduler.py): share of the concurrency slots
+# per priority class. Needs CLAUDE_MAX_CONCURRENCY > 0; without a slot limit nothing queues.
+SCHEDULER_WEIGHTS = {
+    "interactive": float(os.getenv("SCHEDULER_WEIGHT_INTERACTIVE", "16")),
+    "analysis": float(os.getenv("SCHEDULER_WEIGHT_ANALYSIS", "4")),
+    "batch": float(os.getenv("SCHEDULER_WEIGHT_BATCH", "1")),
+}
+# Messages one WebSocket connection may have in progress at once
+WS_MAX_PENDING_MESSAGES = int(os.getenv("WS_MAX_PENDING_MESSAGES", "8"))
+
+# Load the embedding model, datasets and FAISS index on a background thread at startup
+# (see utils/lazy.py); when off they load on first use and /ready is ready at once
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "1") == "1"
+
+# Prefork launcher (backend/serve.py): how often the master logs per-worker memory (0 disables)
+SERVER_MEMORY_REPORT_SECONDS = float(os.getenv("SERVER_MEMORY_REPORT_SECONDS", "300"))
+
+# Input token budgets for the paper text sent to Claude (see backend/utils/token_budget.py).
+# PAPER_TOKEN_BUDGET is used wherever one paper block is shared (shared-prefix and fused modes).
+PAPER_TOKEN_BUDGET = int(os.getenv("PAPER_TOKEN_BUDGET", "4000"))
+AGENT_TOKEN_BUDGETS = {
+    "tech_ip": int(os.getenv("TECH_IP_TOKEN_BUDGET", "4000")),
+    "market": int(os.getenv("MARKET_TOKEN_BUDGET", "4000")),
+    "scaling": int(os.getenv("SCALING_TOKEN_BUDGET", "3200")),
+    "funding": int(os.getenv("FUNDING_TOKEN_BUDGET", "3200")),
+    "impact": int(os.getenv("IMPACT_TOKEN_BUDGET", "3200")),
+    "team_authors": int(os.getenv("TEAM_AUTHORS_TOKEN_BUDGET", "1250")),
+    "team_context": int(os.getenv("TEAM_CONTEXT_TOKEN_BUDGET", "1250")),
+    "crewai_task": int(os.getenv("CREWAI_TASK_TOKEN_BUDGET", "300")),
+}
+
+# Per-agent deadlines (seconds); outbound calls inside an agent shrink their timeouts to fit
+AGENT_DEADLINE_SECONDS = float(os.getenv("AGENT_DEADLINE_SECONDS", "90"))
+AGENT_DEADLINES = {
+    agent: float(os.getenv(f"{agent.upper()}_DEADLINE_SECONDS", str(AGENT_DEADLINE_SECONDS)))
+    for agent in ("tech_ip", "market", "team", "scaling", "funding", "impact")
+}
+CLAUDE_TIMEOUT_SECONDS = float(os.getenv("CLAUDE_TIMEOUT_SECONDS", "120"))
+LOGICMILL_TIMEOUT_SECONDS = float(os.getenv("LOGICMILL_TIMEOUT_SECONDS", "10"))
+
+# Hedged Claude requests: send a backup when a request outlives the agent's latency percentile
+HEDGING_ENABLED = os.getenv("HEDGING_ENABLED", "0") == "1"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+HEDGE_MIN_DELAY_SECONDS = float(os.getenv("HEDGE_MIN_DELAY_SECONDS", "1.0"))
+
+# Background analysis jobs (POST /jobs)
+JOB_MAX_WORKERS = int(os.getenv("JOB_MAX_WORKERS", "4"))
+JOB_MAX_QUEUE = int(os.getenv("JOB_MAX_QUEUE", "100"))
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+JOB_MAX_RETAINED = int(os.getenv("JOB_MAX_RETAINED", "1000"))
+
+# Batch analysis (POST /analyze-batch)
+BATCH_MAX_PAPERS = int(os.getenv("BATCH_MAX_PAPERS", "500"))
+BATCH_MAX_CONCURRENT_PAPERS = int(os.getenv("BATCH_MAX_CONCURRENT_PAPERS", "4"))
@@ -7,6 +7,9 @@ import logging
 from typing import Dict, List, Any, Optional, Union
 import json
 import logging
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 # Import CrewAI components with error handling
 try:
@@ -24,9 +27,8 @@ except ImportError as e:
     class BaseModel:
         def __init__(self, **kwargs):
             pass
-    class Field:
-        def __init__(self, **kwargs):
-            pass
+    def Field(default=None, **kwargs):
+        return default
 
 # Import existing agent functions
 from backend.agents.tech_ip_agent import analyze_tech_ip
@@ -35,6 +37,8 @@ from backend.agents.team_agent import evaluate_team
 from backend.agents.scaling_agent import evaluate_scaling
 from backend.agents.funding_agent import evaluate_funding
 from backend.agents.impact_agent import evaluate_impact
+from backend.config import AGENT_TOKEN_BUDGETS, CREWAI_EXECUTION_MODE
+from backend.utils.prompt_utils import fit_text
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -163,95 +167,106 @@ class UnicornPotentialEvaluator(BaseTool):
             logger.error(f"Unicorn evaluation failed: {e}")
             return json.dumps({"error": str(e), "unicorn_potential_score": 0})
 
+# Agent definitions: role, goal, backstory and the tool the agent drives
+AGENT_SPECS = {
+    'tech_ip': (
+        "Technology and IP Analyst",
+        "Analyze the technological innovation and intellectual property potential of research papers",
+        "You are an expert in technology assessment and IP evaluation with deep knowledge of patent landscapes and technical readiness levels.",
+        TechIPTool
+    ),
+    'market': (
+        "Market Research Analyst",
+        "Identify market opportunities, competitors, and commercial potential",
+        "You are a seasoned market analyst with expertise in identifying market gaps, competitive landscapes, and commercial viability.",
+        MarketAnalysisTool
+    ),
+    'team': (
+        "Team and Talent Evaluator",
+        "Assess team composition, expertise, and entrepreneurial capabilities",
+        "You are an expert in team dynamics and talent assessment, specializing in evaluating research teams for startup potential.",
+        TeamAnalysisTool
+    ),
+    'scaling': (
+        "Scaling and Growth Strategist",
+        "Evaluate scaling potential, growth strategies, and operational risks",
+        "You are a growth strategist with experience in scaling startups and identifying operational challenges.",
+        ScalingAnalysisTool
+    ),
+    'funding': (
+        "Funding and Investment Advisor",
+        "Identify funding opportunities and investment readiness",
+        "You are an investment advisor with deep knowledge of funding landscapes, grant opportunities, and investor requirements.",
+        FundingAnalysisTool
+    ),
+    'impact': (
+        "Impact and Sustainability Assessor",
+        "Evaluate societal, environmental, and economic impact potential",
+        "You are an impact assessment expert with knowledge of SDGs, sustainability metrics, and societal benefit evaluation.",
+        ImpactAnalysisTool
+    ),
+    'evaluator': (
+        "Unicorn Potential Evaluator",
+        "Synthesize all analyses and calculate final unicorn potential score",
+        "You are a senior VC analyst who synthesizes multiple analyses to determine startup potential and unicorn likelihood.",
+        UnicornPotentialEvaluator
+    ),
+}
+
+ANALYSIS_AGENTS = ['tech_ip', 'market', 'team', 'scaling', 'funding', 'impact']
+
+# execution_mode values: "sequential" runs the crew one task after another (each tool call
+# goes through the agent's LLM reasoning loop), "parallel" runs the crew's tasks concurrently,
+# "direct" calls the tools' _run concurrently without any agent LLM round-trips.
+EXECUTION_MODES = ("sequential", "parallel", "direct")
+
 class ResearchAnalysisOrchestrator:
     """Main orchestrator class for research analysis using CrewAI"""
     
-    def __init__(self):
-        """Initialize the orchestrator with agents and tools"""
-        self.tools = [
-            TechIPTool(),
-            MarketAnalysisTool(),
-            TeamAnalysisTool(),
-            ScalingAnalysisTool(),
-            FundingAnalysisTool(),
-            ImpactAnalysisTool(),
-            UnicornPotentialEvaluator()
-        ]
-        
-        # Create specialized agents
-        self.tech_ip_agent = Agent(
-            role="Technology and IP Analyst",
-            goal="Analyze the technological innovation and intellectual property potential of research papers",
-            backstory="You are an expert in technology assessment and IP evaluation with deep knowledge of patent landscapes and technical readiness levels.",
-            tools=[TechIPTool()],
-            verbose=True,
-            allow_delegation=False
-        )
-        
-        self.market_agent = Agent(
-            role="Market Research Analyst",
-            goal="Identify market opportunities, competitors, and commercial potential",
-            backstory="You are a seasoned market analyst with expertise in identifying market gaps, competitive landscapes, and commercial viability.",
-            tools=[MarketAnalysisTool()],
-            verbose=True,
-            allow_delegation=False
-        )
-        
-        self.team_agent = Agent(
-            role="Team and Talent Evaluator",
-            goal="Assess team composition, expertise, and entrepreneurial capabilities",
-            backstory="You are an expert in team dynamics and talent assessment, specializing in evaluating research teams for startup potential.",
-            tools=[TeamAnalysisTool()],
-            verbose=True,
-            allow_delegation=False
-        )
-        
-        self.scaling_agent = Agent(
-            role="Scaling and Growth Strategist",
-            goal="Evaluate scaling potential, growth strategies, and operational risks",
-            backstory="You are a growth strategist with experience in scaling startups and identifying operational challenges.",
-            tools=[ScalingAnalysisTool()],
-            verbose=True,
-            allow_delegation=False
-        )
-        
-        self.funding_agent = Agent(
-            role="Funding and Investment Advisor",
-            goal="Identify funding opportunities and investment readiness",
-            backstory="You are an investment advisor with deep knowledge of funding landscapes, grant opportunities, and investor requirements.",
-            tools=[FundingAnalysisTool()],
-            verbose=True,
-            allow_delegation=False
-        )
-        
-        self.impact_agent = Agent(
-            role="Impact and Sustainability Assessor",
-            goal="Evaluate societal, environmental, and economic impact potential",
-            backstory="You are an impact assessment expert with knowledge of SDGs, sustainability metrics, and societal benefit evaluation.",
-            tools=[ImpactAnalysisTool()],
-            verbose=True,
-            allow_delegation=False
-        )
-        
-        self.evaluator_agent = Agent(
-            role="Unicorn Potential Evaluator",
-            goal="Synthesize all analyses and calculate final unicorn potential score",
-            backstory="You are a senior VC analyst who synthesizes multiple analyses to determine startup potential and unicorn likelihood.",
-            tools=[UnicornPotentialEvaluator()],
-            verbose=True,
-            allow_delegation=False
-        )
+    def __init__(self, execution_mode: str = CREWAI_EXECUTION_MODE):
+        """Initialize the orchestrator with tools; agents are created on first use"""
+        self.execution_mode = execution_mode
+        self.tools = {name: spec[3]() for name, spec in AGENT_SPECS.items()}
+        self._agents = {}
+        self._agents_lock = threading.Lock()
+    
+    def get_agent(self, name: str) -> "Agent":
+        """CrewAI Agent for `name` (see AGENT_SPECS), built the first time it is needed"""
+        if name not in self._agents:
+            with self._agents_lock:
+                if name not in self._agents:
+                    role, goal, backstory, tool_cls = AGENT_SPECS[name]
+                    self._agents[name] = Agent(
+                        role=role,
+                        goal=goal,
+                        backstory=backstory,
+                        tools=[tool_cls()],
+                        verbose=True,
+                        allow_delegation=False
+                    )
+        return self._agents[name]
+    
+    tech_ip_agent = property(lambda self: self.get_agent('tech_ip'))
+    market_agent = property(lambda self: self.get_agent('market'))
+    team_agent = property(lambda self: self.get_agent('team'))
+    scaling_agent = property(lambda self: self.get_agent('scaling'))
+    funding_agent = property(lambda self: self.get_agent('funding'))
+    impact_agent = property(lambda self: self.get_agent('impact'))
+    evaluator_agent = property(lambda self: self.get_agent('evaluator'))
     
-    def create_analysis_tasks(self, paper_text: str, authors_text: str = "", agents_to_run: Union[List[str], None] = None) -> List[Task]:
-        """Create analysis tasks based on requested agents"""
+    def create_analysis_tasks(self, paper_text: str, authors_text: str = "", agents_to_run: Union[List[str], None] = None,
+                              concurrent: bool = False) -> List["Task"]:
+        """Create analysis tasks based on requested agents; concurrent tasks run in parallel within the crew"""
         if agents_to_run is None:
-            agents_to_run = ['tech_ip', 'market', 'team', 'scaling', 'funding', 'impact']
+            agents_to_run = ANALYSIS_AGENTS
         
         tasks = []
+        # Task descriptions only carry a preview; the tools read the full text
+        task_text = fit_text(paper_text, AGENT_TOKEN_BUDGETS["crewai_task"])
         
         if 'tech_ip' in agents_to_run:
             tasks.append(Task(
-                description=f"Analyze the technology and intellectual property aspects of this research paper: {paper_text[:1000]}...",
+                description=f"Analyze the technology and intellectual property aspects of this research paper: {task_text}...",
                 expected_output="JSON with technology analysis including TRL, novelty assessment, and patent landscape",
                 agent=self.tech_ip_agent,
                 tools=[TechIPTool()]
@@ -259,7 +274,7 @@ class ResearchAnalysisOrchestrator:
         
         if 'market' in agents_to_run:
             tasks.append(Task(
-                description=f"Analyze the market potential and find competitors for this research: {paper_text[:1000]}...",
+                description=f"Analyze the market potential and find competitors for this research: {task_text}...",
                 expected_output="JSON with market analysis including competitors, market size, and commercial potential",
                 agent=self.market_agent,
                 tools=[MarketAnalysisTool()]
@@ -267,7 +282,7 @@ class ResearchAnalysisOrchestrator:
         
         if 'team' in agents_to_run:
             tasks.append(Task(
-                description=f"Evaluate the team composition and entrepreneurial capabilities: {authors_text or paper_text[:1000]}...",
+                description=f"Evaluate the team composition and entrepreneurial capabilities: {authors_text or task_text}...",
                 expected_output="JSON with team assessment including missing roles and entrepreneurial readiness",
                 agent=self.team_agent,
                 tools=[TeamAnalysisTool()]
@@ -275,7 +290,7 @@ class ResearchAnalysisOrchestrator:
         
         if 'scaling' in agents_to_run:
             tasks.append(Task(
-                description=f"Evaluate the scaling potential and growth strategies: {paper_text[:1000]}...",
+                description=f"Evaluate the scaling potential and growth strategies: {task_text}...",
                 expected_output="JSON with scaling analysis including growth potential and operational risks",
                 agent=self.scaling_agent,
                 tools=[ScalingAnalysisTool()]
@@ -283,7 +298,7 @@ class ResearchAnalysisOrchestrator:
         
         if 'funding' in agents_to_run:
             tasks.append(Task(
-                description=f"Identify funding opportunities and investment readiness: {paper_text[:1000]}...",
+                description=f"Identify funding opportunities and investment readiness: {task_text}...",
                 expected_output="JSON with funding analysis including recommended funding sources and investment readiness",
                 agent=self.funding_agent,
                 tools=[FundingAnalysisTool()]
@@ -291,29 +306,72 @@ class ResearchAnalysisOrchestrator:
         
         if 'impact' in agents_to_run:
             tasks.append(Task(
-                description=f"Evaluate the societal and environmental impact: {paper_text[:1000]}...",
+                description=f"Evaluate the societal and environmental impact: {task_text}...",
                 expected_output="JSON with impact assessment including SDG alignment and sustainability metrics",
                 agent=self.impact_agent,
                 tools=[ImpactAnalysisTool()]
             ))
         
+        if concurrent:
+            # A crew may end with at most one asynchronous task; the last one runs
+            # synchronously while the others are still in flight
+            for task in tasks[:-1]:
+                task.async_execution = True
+        
         return tasks
     
-    def run_analysis(self, paper_text: str, authors_text: str = "", agents_to_run: Union[List[str], None] = None) -> Dict[str, Any]:
-        """Run the complete analysis using CrewAI orchestration"""
+    def run_direct(self, paper_text: str, authors_text: str = "", agents_to_run: Union[List[str], None] = None) -> Dict[str, Any]:
+        """Call each requested tool's _run concurrently, skipping the agent reasoning loop"""
+        if agents_to_run is None:
+            agents_to_run = ANALYSIS_AGENTS
+        valid_agents = [name for name in agents_to_run if name in ANALYSIS_AGENTS]
+        if not valid_agents:
+            return {"error": "No valid agents specified"}
+        
+        results = {}
+        with ThreadPoolExecutor(max_workers=len(valid_agents)) as executor:
+            futures = {
+                name: executor.submit(contextvars.copy_context().run, self.tools[name]._run,
+                                      (authors_text or paper_text) if name == 'team' else paper_text)
+                for name in valid_agents
+            }
+            for name, future in futures.items():
+                try:
+                    results[name] = json.loads(future.result())
+                except Exception as e:
+                    logger.error(f"Direct {name} tool call failed: {e}")
+                    results[name] = {"error": str(e)}
+        return results
+    
+    def run_analysis(self, paper_text: str, authors_text: str = "", agents_to_run: Union[List[str], None] = None,
+                     execution_mode: Optional[str] = None) -> Dict[str, Any]:
+        """Run the complete analysis using CrewAI orchestration (execution_mode: see EXECUTION_MODES)"""
         try:
-            logger.info("Starting CrewAI orchestrated analysis")
+            execution_mode = execution_mode or self.execution_mode
+            if execution_mode not in EXECUTION_MODES:
+                return {"error": f"Unknown execution mode: {execution_mode}. Valid: {list(EXECUTION_MODES)}"}
+            logger.info(f"Starting CrewAI orchestrated analysis ({execution_mode})")
+            
+            if execution_mode == "direct":
+                results = self.run_direct(paper_text, authors_text, agents_to_run)
+                if "error" in results:
+                    return results
+                self._add_unicorn_score(results)
+                logger.info(f"Analysis completed with unicorn potential score: {results.get('unicorn_potential_score', 0)}")
+                return results
+            
+            if not CREWAI_AVAILABLE:
+                return {"error": "CrewAI is not installed; use execution_mode='direct'"}
             
             # Create tasks
-            tasks = self.create_analysis_tasks(paper_text, authors_text, agents_to_run)
+            tasks = self.create_analysis_tasks(paper_text, authors_text, agents_to_run, concurrent=execution_mode == "parallel")
             
             if not tasks:
                 return {"error": "No valid agents specified"}
             
-            # Create crew
+            # Create crew with only the agents that have a task
             crew = Crew(
-                agents=[self.tech_ip_agent, self.market_agent, self.team_agent, 
-                       self.scaling_agent, self.funding_agent, self.impact_agent, self.evaluator_agent],
+                agents=list(dict.fromkeys(task.agent for task in tasks)),
                 tasks=tasks,
                 process=Process.sequential,
                 verbose=True
@@ -341,23 +399,7 @@ class ResearchAnalysisOrchestrator:
                     results['impact'] = json.loads(task.output) if isinstance(task.output, str) else task.output
             
             # Calculate final score
-            score_keys = ['tech_ip', 'market', 'team', 'scaling', 'funding', 'impact']
-            scores = []
-            for k in score_keys:
-                if k not in results:
-                    continue
-                val = None
-                if k == 'tech_ip':
-                    val = results[k].get('summary', {}).get('trl', 1)
-                elif k == 'market':
-                    val = len(results[k].get('matches', [])) if results[k].get('matches') else 0
-                else:
-                    val = results[k].get(f"{k}_score_0_5", 2)
-                scores.append(val if isinstance(val, (int, float)) else 2)
-            
-            if scores:
-                final_score = sum(scores) / len(scores) * 20
-                results['unicorn_potential_score'] = round(final_score, 1)
+            self._add_unicorn_score(results)
             
             logger.info(f"Analysis completed with unicorn potential score: {results.get('unicorn_potential_score', 0)}")
             return results
@@ -365,10 +407,47 @@ class ResearchAnalysisOrchestrator:
         except Exception as e:
             logger.error(f"CrewAI orchestration failed: {e}")
             return {"error": f"Orchestration failed: {str(e)}"}
+    
+    def _add_unicorn_score(self, results: Dict[str, Any]) -> None:
+        score_keys = ['tech_ip', 'market', 'team', 'scaling', 'funding', 'impact']
+        scores = []
+        for k in score_keys:
+            if k not in results:
+                continue
+            val = None
+            if k == 'tech_ip':
+                # analyze_tech_ip's summary is Claude's raw text unless it was parsed upstream
+                summary = results[k].get('summary', {})
+                val = summary.get('trl', 1) if isinstance(summary, dict) else 1
+            elif k == 'market':
+                val = len(results[k].get('matches', [])) if results[k].get('matches') else 0
+            else:
+                val = results[k].get(f"{k}_score_0_5", 2)
+            scores.append(val if isinstance(val, (int, float)) else 2)
+        
+        if scores:
+            final_score = sum(scores) / len(scores) * 20
+            results['unicorn_potential_score'] = round(final_score, 1)
+
+# Global orchestrator instance, created on first use
+_orchestrator: Optional[ResearchAnalysisOrchestrator] = None
+_orchestrator_lock = threading.Lock()
+
+def get_orchestrator() -> ResearchAnalysisOrchestrator:
+    global _orchestrator
+    if _orchestrator is None:
+        with _orchestrator_lock:
+            if _orchestrator is None:
+                _orchestrator = ResearchAnalysisOrchestrator()
+    return _orchestrator
 
-# Global orchestrator instance
-orchestrator = ResearchAnalysisOrchestrator()
+def __getattr__(name: str):
+    # Keeps `from backend.crewai_orchestrator import orchestrator` working without building it at import
+    if name == "orchestrator":
+        return get_orchestrator()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-def run_crewai_analysis(paper_text: str, authors_text: str = "", agents_to_run: Union[List[str], None] = None) -> Dict[str, Any]:
+def run_crewai_analysis(paper_text: str, authors_text: str = "", agents_to_run: Union[List[str], None] = None,
+                        execution_mode: Optional[str] = None) -> Dict[str, Any]:
     """Convenience function to run CrewAI analysis"""
-    return orchestrator.run_analysis(paper_text, authors_text, agents_to_run)
+    return get_orchestrator().run_analysis(paper_text, authors_text, agents_to_run, execution_mode)
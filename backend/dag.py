@@ -0,0 +1,169 @@
+# backend/dag.py
+"""
+Dependency-aware execution of an analysis.
+Each node declares the nodes whose outputs it consumes and starts as soon as
+all of them are available, so shared artifacts are computed once before the
+agents that need them and downstream work (e.g. a category score) runs as soon
+as its agent finishes instead of after the slowest agent. Every node is timed.
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+OK, FAILED, SKIPPED = "ok", "failed", "skipped"
+
+# on_node_done(name, output, timing); may be a coroutine function
+NodeCallback = Callable[[str, Any, Dict[str, Any]], Any]
+
+
+class DAGError(ValueError):
+    """Raised for graphs that cannot run: duplicate names, unknown inputs, cycles"""
+
+
+class Node:
+    def __init__(self, name: str, fn: Callable[..., Any], inputs: Iterable[str] = (), in_thread: bool = True):
+        """
+        fn receives the outputs of `inputs` positionally, in declaration order.
+        Plain functions run in a worker thread unless in_thread=False (for
+        trivial work that is cheaper to run on the event loop); coroutine
+        functions are awaited.
+        """
+        self.name = name
+        self.fn = fn
+        self.inputs = tuple(inputs)
+        self.in_thread = in_thread
+
+
+class DAGRun:
+    """Outputs, errors and per-node timings of one execution"""
+
+    def __init__(self):
+        self.outputs: Dict[str, Any] = {}
+        self.errors: Dict[str, str] = {}
+        self.timings: Dict[str, Dict[str, Any]] = {}
+        self.wall_clock_s = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {"wall_clock_s": round(self.wall_clock_s, 3), "nodes": self.timings}
+
+
+class DAG:
+    def __init__(self):
+        self.nodes: Dict[str, Node] = {}
+
+    def add(self, name: str, fn: Callable[..., Any], inputs: Iterable[str] = (), in_thread: bool = True) -> Node:
+        if name in self.nodes:
+            raise DAGError(f"Duplicate node: {name}")
+        node = Node(name, fn, inputs, in_thread)
+        self.nodes[name] = node
+        return node
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.nodes
+
+    def validate(self) -> List[str]:
+        """Check inputs and acyclicity; returns the nodes in a topological order"""
+        for node in self.nodes.values():
+            unknown = [name for name in node.inputs if name not in self.nodes]
+            if unknown:
+                raise DAGError(f"Node {node.name} depends on unknown nodes: {unknown}")
+        pending = {name: set(node.inputs) for name, node in self.nodes.items()}
+        order = []
+        while pending:
+            ready = [name for name, deps in pending.items() if not deps]
+            if not ready:
+                raise DAGError(f"Cycle between nodes: {sorted(pending)}")
+            for name in ready:
+                del pending[name]
+                order.append(name)
+            for deps in pending.values():
+                deps.difference_update(ready)
+        return order
+
+    def _dependents(self) -> Dict[str, List[str]]:
+        dependents = {name: [] for name in self.nodes}
+        for node in self.nodes.values():
+            for name in node.inputs:
+                dependents[name].append(node.name)
+        return dependents
+
+    async def _call(self, node: Node, args: List[Any]) -> Any:
+        if inspect.iscoroutinefunction(node.fn):
+            return await node.fn(*args)
+        if node.in_thread:
+            return await asyncio.to_thread(node.fn, *args)
+        output = node.fn(*args)
+        return await output if inspect.isawaitable(output) else output
+
+    async def _notify(self, on_node_done: Optional[NodeCallback], name: str, output: Any, timing: Dict[str, Any]) -> None:
+        if on_node_done is None:
+            return
+        try:
+            outcome = on_node_done(name, output, timing)
+            if inspect.isawaitable(outcome):
+                await outcome
+        except Exception as e:
+            logger.warning(f"DAG callback failed for {name}: {e}")
+
+    async def run(self, on_node_done: Optional[NodeCallback] = None) -> DAGRun:
+        """
+        Execute every node once its inputs are done. A node that raises is recorded
+        as failed and the nodes downstream of it are skipped; the rest still run.
+        """
+        self.validate()
+        result = DAGRun()
+        dependents = self._dependents()
+        waiting = {name: set(node.inputs) for name, node in self.nodes.items()}
+        running: Dict[asyncio.Task, str] = {}
+        started_at: Dict[str, float] = {}
+        start = time.perf_counter()
+
+        def skip(name: str, reason: str) -> None:
+            for dependent in dependents[name]:
+                if dependent in waiting:
+                    del waiting[dependent]
+                    result.errors[dependent] = reason
+                    result.timings[dependent] = {"status": SKIPPED}
+                    skip(dependent, reason)
+
+        try:
+            while waiting or running:
+                for name in [name for name, deps in waiting.items() if not deps]:
+                    del waiting[name]
+                    node = self.nodes[name]
+                    started_at[name] = time.perf_counter()
+                    running[asyncio.create_task(self._call(node, [result.outputs[i] for i in node.inputs]))] = name
+                if not running:
+                    break
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = running.pop(task)
+                    finished = time.perf_counter()
+                    timing = {
+                        "start_s": round(started_at[name] - start, 3),
+                        "duration_s": round(finished - started_at[name], 3),
+                    }
+                    error = task.exception()
+                    if error is not None:
+                        logger.error(f"DAG node {name} failed: {error}")
+                        result.errors[name] = str(error)
+                        result.timings[name] = {**timing, "status": FAILED}
+                        skip(name, f"Upstream node {name} failed")
+                        continue
+                    result.outputs[name] = task.result()
+                    result.timings[name] = {**timing, "status": OK}
+                    for dependent in dependents[name]:
+                        if dependent in waiting:
+                            waiting[dependent].discard(name)
+                    await self._notify(on_node_done, name, result.outputs[name], result.timings[name])
+        finally:
+            # Cancelled from outside (client went away, deadline): stop whatever is still running
+            for task in running:
+                task.cancel()
+        result.wall_clock_s = time.perf_counter() - start
+        return result
@@ -0,0 +1,200 @@
+# backend/jobs.py
+"""
+Background analysis jobs.
+Requests are queued and answered immediately with a job id; a fixed number of
+workers on the event loop run the analyses, so many papers can be in flight
+without any request holding its connection open for the whole analysis.
+Each job keeps an event log (status changes, per-agent results) that clients
+can replay and follow until the job finishes.
+Jobs are background work: their Claude requests are scheduled in the batch
+class on behalf of the client that submitted them (see utils/scheduler.py).
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+from backend.config import JOB_MAX_WORKERS, JOB_MAX_QUEUE, JOB_RETENTION_SECONDS, JOB_MAX_RETAINED
+from backend.utils.scheduler import scheduling, BATCH
+
+logger = logging.getLogger(__name__)
+
+# runner(paper_text, authors_text, on_event, agents_to_run, mode) -> results
+JobRunner = Callable[..., Awaitable[Dict[str, Any]]]
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+TERMINAL_EVENTS = ("job_complete", "job_failed")
+
+
+class JobQueueFull(Exception):
+    """Raised by JobManager.submit when the backlog is at capacity"""
+
+
+class Job:
+    def __init__(self, paper_text: str, authors_text: str = "", agents_to_run: Optional[List[str]] = None, mode: Optional[str] = None,
+                 client_id: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.paper_text = paper_text
+        self.authors_text = authors_text
+        self.agents_to_run = agents_to_run
+        self.mode = mode
+        self.client_id = client_id
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.events: List[Dict[str, Any]] = []
+        self._listeners: Set[asyncio.Queue] = set()
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Append to the event log and push to live listeners (event loop thread only)"""
+        event = {**event, "job_id": self.id}
+        self.events.append(event)
+        for queue in self._listeners:
+            queue.put_nowait(event)
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "agents_completed": [e["agent"] for e in self.events if e.get("type") == "agent_complete"],
+        }
+        if self.error:
+            data["error"] = self.error
+        if include_result and self.result is not None:
+            data["result"] = self.result
+        return data
+
+
+class JobManager:
+    """Bounded job queue drained by max_workers worker tasks"""
+
+    def __init__(self, runner: JobRunner, max_workers: int = JOB_MAX_WORKERS, max_queue: int = JOB_MAX_QUEUE,
+                 retention_seconds: float = JOB_RETENTION_SECONDS, max_retained: int = JOB_MAX_RETAINED):
+        self.runner = runner
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retention_seconds = retention_seconds
+        self.max_retained = max_retained
+        self.jobs: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._counters = {"submitted": 0, "rejected": 0, "succeeded": 0, "failed": 0}
+
+    def _ensure_workers(self) -> None:
+        # Created lazily so they bind to the server's running event loop
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.max_workers)]
+
+    def submit(self, paper_text: str, authors_text: str = "", agents_to_run: Optional[List[str]] = None, mode: Optional[str] = None,
+               client_id: Optional[str] = None) -> Job:
+        """Queue an analysis; raises JobQueueFull when the backlog is at max_queue"""
+        self._ensure_workers()
+        self._prune()
+        job = Job(paper_text, authors_text, agents_to_run, mode, client_id)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self._counters["rejected"] += 1
+            raise JobQueueFull(f"Job queue is full ({self.max_queue} waiting)")
+        self.jobs[job.id] = job
+        self._counters["submitted"] += 1
+        job.publish({"type": "job_status", "status": QUEUED})
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    async def events(self, job: Job) -> AsyncIterator[Dict[str, Any]]:
+        """Replay the job's events so far, then follow it until it finishes"""
+        queue: asyncio.Queue = asyncio.Queue()
+        history = list(job.events)
+        job._listeners.add(queue)
+        try:
+            for event in history:
+                yield event
+            if job.done:
+                return
+            while True:
+                event = await queue.get()
+                yield event
+                if event["type"] in TERMINAL_EVENTS:
+                    return
+        finally:
+            job._listeners.discard(queue)
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.publish({"type": "job_status", "status": RUNNING})
+
+        async def on_event(event: Dict[str, Any]) -> None:
+            job.publish(event)
+
+        try:
+            with scheduling(job.client_id, BATCH):
+                result = await self.runner(job.paper_text, job.authors_text, on_event, job.agents_to_run, job.mode)
+            if "error" in result and len(result) == 1:
+                raise RuntimeError(result["error"])
+            job.result = result
+            job.status = SUCCEEDED
+            self._counters["succeeded"] += 1
+            job.finished_at = time.time()
+            job.publish({"type": "job_complete", "status": SUCCEEDED, "result": result})
+        except Exception as e:
+            logger.error(f"Job {job.id} failed: {e}")
+            job.error = str(e)
+            job.status = FAILED
+            self._counters["failed"] += 1
+            job.finished_at = time.time()
+            job.publish({"type": "job_failed", "status": FAILED, "error": job.error})
+        finally:
+            # The inputs are no longer needed once the analysis has run
+            job.paper_text = job.authors_text = ""
+
+    def _prune(self) -> None:
+        """Forget finished jobs past the retention period, and the oldest ones beyond max_retained"""
+        cutoff = time.time() - self.retention_seconds
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.done and job.finished_at < cutoff]:
+            del self.jobs[job_id]
+        finished = sorted((job for job in self.jobs.values() if job.done), key=lambda job: job.finished_at)
+        for job in finished[:max(0, len(self.jobs) - self.max_retained)]:
+            del self.jobs[job.id]
+
+    def stats(self) -> Dict[str, Any]:
+        statuses = [job.status for job in self.jobs.values()]
+        return {
+            **self._counters,
+            "queued": statuses.count(QUEUED),
+            "running": statuses.count(RUNNING),
+            "retained": len(self.jobs),
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+        }
+
+    async def shutdown(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
@@ -1,6 +1,6 @@
 # backend/main.py
 from fastapi import FastAPI, Request, UploadFile, File, HTTPException, WebSocket, WebSocketDisconnect
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from io import BytesIO
 import logging
@@ -14,6 +14,9 @@ logger = logging.getLogger(__name__)
 # Force use simple orchestrator with real AI
 try:
     from backend.simple_orchestrator import run_simple_analysis as run_crewai_analysis
+    from backend.simple_orchestrator import run_simple_analysis_async as run_analysis_async
+    from backend.simple_orchestrator import stream_simple_analysis
+    from backend.simple_orchestrator import analyze_simple_batch
     ORCHESTRATOR_TYPE = "simple"
     logger.info("Using simple orchestrator with real AI")
 except Exception as e:
@@ -29,7 +32,26 @@ except Exception as e:
             return {"error": "No orchestrator available"}
         ORCHESTRATOR_TYPE = "none"
 
+if ORCHESTRATOR_TYPE != "simple":
+    async def run_analysis_async(paper_text, authors_text="", agents_to_run=None, mode=None, on_progress=None):
+        # Sync-only orchestrators run in a worker thread so they don't block the event loop;
+        # they report no per-agent progress
+        return await asyncio.to_thread(run_crewai_analysis, paper_text, authors_text, agents_to_run)
+
+    async def stream_simple_analysis(paper_text, authors_text="", on_event=None, agents_to_run=None, mode=None):
+        # No per-agent streaming here, the client only gets the final result
+        return await run_analysis_async(paper_text, authors_text, agents_to_run)
+
+    async def analyze_simple_batch(papers, agents_to_run=None, mode=None):
+        # No cross-paper scheduling here, papers are analysed one after another
+        for index, paper in enumerate(papers):
+            yield index, await run_analysis_async(paper.get("text", ""), paper.get("authors", ""), agents_to_run)
+
 from backend.utils.pdf_utils import extract_text_from_pdf
+from backend.jobs import JobManager, JobQueueFull
+from backend.config import BATCH_MAX_PAPERS, WS_MAX_PENDING_MESSAGES, WARMUP_ON_STARTUP
+from backend.utils.scheduler import scheduling, INTERACTIVE, ANALYSIS, BATCH
+from backend.utils.cancellation import CancelToken, RequestCancelled, cancellation_scope
 
 app = FastAPI(
     title="Research Paper Unicorn Potential Analyzer",
@@ -41,16 +63,25 @@ app = FastAPI(
 class ConnectionManager:
     def __init__(self):
         self.active_connections: List[WebSocket] = []
+        # Cancelled on disconnect, so work started for the connection stops (see utils/cancellation.py)
+        self.cancel_tokens: Dict[WebSocket, CancelToken] = {}
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
         self.active_connections.append(websocket)
+        self.cancel_tokens[websocket] = CancelToken()
         logger.info(f"WebSocket connected. Total connections: {len(self.active_connections)}")
 
     def disconnect(self, websocket: WebSocket):
         if websocket in self.active_connections:
             self.active_connections.remove(websocket)
-        logger.info(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
+            logger.info(f"WebSocket disconnected. Total connections: {len(self.active_connections)}")
+        token = self.cancel_tokens.pop(websocket, None)
+        if token is not None:
+            token.cancel("WebSocket client disconnected")
+
+    def cancel_token(self, websocket: WebSocket) -> CancelToken:
+        return self.cancel_tokens.setdefault(websocket, CancelToken())
 
     async def send_personal_message(self, message: str, websocket: WebSocket):
         try:
@@ -69,6 +100,44 @@ class ConnectionManager:
 
 manager = ConnectionManager()
 
+# Priority class of the Claude requests made for each WebSocket message type
+WS_MESSAGE_PRIORITIES = {
+    "chat": INTERACTIVE,
+    "patent_search": INTERACTIVE,
+    "research_gap_analysis": INTERACTIVE,
+    "startup_analysis": ANALYSIS,
+    "deep_analysis": ANALYSIS,
+    "stream_analysis": ANALYSIS,
+}
+
+def client_id(connection) -> str:
+    """Who a request or WebSocket belongs to for fair scheduling (the client's address)"""
+    return connection.client.host if connection.client else "unknown"
+
+# How often a running REST analysis checks whether its client is still connected
+DISCONNECT_POLL_SECONDS = 1.0
+
+async def run_until_disconnected(request: Request, run):
+    """
+    Await run() under a cancel token, cancelling it (and the threads it started)
+    as soon as the HTTP client disconnects; raises RequestCancelled in that case.
+    """
+    token = CancelToken()
+    with cancellation_scope(token):
+        task = asyncio.create_task(run())
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                token.cancel("HTTP client disconnected")
+                raise RequestCancelled(token.reason)
+    finally:
+        if not task.done():
+            token.cancel("request aborted")
+            task.cancel()
+
 # Add CORS middleware for frontend access
 app.add_middleware(
     CORSMiddleware,
@@ -78,6 +147,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Background analysis jobs, run by a bounded set of workers on the event loop
+job_manager = JobManager(stream_simple_analysis)
+
+@app.on_event("startup")
+async def startup_event():
+    """Load the model, datasets and index in the background; the port is already serving"""
+    from backend.utils.lazy import start_background_warmup
+    if WARMUP_ON_STARTUP:
+        start_background_warmup()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop job workers and release pooled LLM client connections"""
+    from backend.utils.claude_client import close_claude_clients
+    await job_manager.shutdown()
+    close_claude_clients()
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -96,10 +182,54 @@ async def health_check():
         }
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness (unlike /health, which only says the process is up): 503 until the
+    startup warm-up has loaded the model, datasets and index, with per-resource state.
+    """
+    from backend.utils.lazy import readiness
+    status = readiness(WARMUP_ON_STARTUP)
+    return JSONResponse(status_code=200 if status["ready"] else 503, content=status)
+
+@app.get("/metrics")
+async def metrics():
+    """Runtime counters for the LLM call path and the embedding service"""
+    from backend.utils.response_cache import get_cache_stats
+    from backend.utils.claude_client import get_usage_totals
+    from backend.utils.rate_limiter import get_limiter_stats, get_scheduler_stats
+    from backend.utils.hedging import get_hedge_stats
+    from backend.utils.result_store import get_result_store_stats
+    from backend.utils.process_stats import memory_usage
+    from backend.utils.cancellation import get_cancellation_stats
+    from backend.utils.single_flight import get_single_flight_stats
+    from backend.utils.embedding_service import get_embedding_service_stats
+    return {
+        "claude_cache": await asyncio.to_thread(get_cache_stats),
+        "agent_results": await asyncio.to_thread(get_result_store_stats),
+        "claude_usage": get_usage_totals(),
+        "claude_limiter": get_limiter_stats(),
+        "claude_hedging": get_hedge_stats(),
+        "scheduler": get_scheduler_stats(),
+        "cancellation": get_cancellation_stats(),
+        "single_flight": get_single_flight_stats(),
+        "embedding_service": get_embedding_service_stats(),
+        "jobs": job_manager.stats(),
+        # Per worker: requests land on one worker, so its pid tells which one answered
+        "process": memory_usage()
+    }
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time communication"""
+    """
+    WebSocket endpoint for real-time communication.
+    Messages are handled concurrently (up to WS_MAX_PENDING_MESSAGES per connection),
+    so a chat message is not stuck behind the same client's running analyses; the
+    scheduler decides whose Claude requests go first.
+    """
     await manager.connect(websocket)
+    client = client_id(websocket)
+    pending = set()
     try:
         while True:
             # Receive message from client
@@ -108,40 +238,65 @@ async def websocket_endpoint(websocket: WebSocket):
             
             logger.info(f"Received WebSocket message: {message.get('type', 'unknown')}")
             
-            # Handle different message types
             if message.get("type") == "connection":
                 await manager.send_personal_message(json.dumps({
                     "type": "connection_response",
                     "message": "Connected to Research Paper Analyzer",
                     "timestamp": asyncio.get_event_loop().time()
                 }), websocket)
-                
-            elif message.get("type") == "chat":
-                await handle_chat_message(message, websocket)
-                
-            elif message.get("type") == "startup_analysis":
-                await handle_startup_analysis(message, websocket)
-                
-            elif message.get("type") == "patent_search":
-                await handle_patent_search(message, websocket)
-                
-            elif message.get("type") == "research_gap_analysis":
-                await handle_research_gap_analysis(message, websocket)
-                
-            elif message.get("type") == "deep_analysis":
-                await handle_deep_analysis(message, websocket)
-                
-            else:
+                continue
+            
+            if len(pending) >= WS_MAX_PENDING_MESSAGES:
                 await manager.send_personal_message(json.dumps({
                     "type": "error",
-                    "message": f"Unknown message type: {message.get('type')}"
+                    "message": f"Too many requests in progress (max {WS_MAX_PENDING_MESSAGES}), try again when one has finished"
                 }), websocket)
+                continue
+            
+            # The task inherits the scheduling and cancellation context it is created in
+            with scheduling(client, WS_MESSAGE_PRIORITIES.get(message.get("type"), ANALYSIS)), \
+                    cancellation_scope(manager.cancel_token(websocket)):
+                task = asyncio.create_task(handle_websocket_message(message, websocket))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
                 
     except WebSocketDisconnect:
         manager.disconnect(websocket)
     except Exception as e:
         logger.error(f"WebSocket error: {e}")
         manager.disconnect(websocket)
+    finally:
+        # Nobody is left to receive the answers
+        manager.disconnect(websocket)
+        for task in pending:
+            task.cancel()
+
+async def handle_websocket_message(message: dict, websocket: WebSocket):
+    """Route a WebSocket message to its handler"""
+    message_type = message.get("type")
+    if message_type == "chat":
+        await handle_chat_message(message, websocket)
+        
+    elif message_type == "startup_analysis":
+        await handle_startup_analysis(message, websocket)
+        
+    elif message_type == "patent_search":
+        await handle_patent_search(message, websocket)
+        
+    elif message_type == "research_gap_analysis":
+        await handle_research_gap_analysis(message, websocket)
+        
+    elif message_type == "deep_analysis":
+        await handle_deep_analysis(message, websocket)
+        
+    elif message_type == "stream_analysis":
+        await handle_stream_analysis(message, websocket)
+        
+    else:
+        await manager.send_personal_message(json.dumps({
+            "type": "error",
+            "message": f"Unknown message type: {message_type}"
+        }), websocket)
 
 @app.post("/analyze-paper")
 async def analyze_paper(file: UploadFile = File(None), request: Request = None):
@@ -156,7 +311,8 @@ async def analyze_paper(file: UploadFile = File(None), request: Request = None):
             # PDF upload
             logger.info(f"Processing uploaded file: {file.filename}")
             paper_bytes = await file.read()
-            paper_text = extract_text_from_pdf(BytesIO(paper_bytes))
+            # PDF parsing is CPU-bound, keep it off the event loop
+            paper_text = await asyncio.to_thread(extract_text_from_pdf, BytesIO(paper_bytes))
             authors_text = ""
             agents_to_run = None
             
@@ -178,7 +334,8 @@ async def analyze_paper(file: UploadFile = File(None), request: Request = None):
         logger.info(f"Running analysis with {len(paper_text)} characters of text")
         
         # Use CrewAI orchestrator instead of manual pipeline
-        results = run_crewai_analysis(paper_text, authors_text, agents_to_run)
+        with scheduling(client_id(request), ANALYSIS):
+            results = await run_until_disconnected(request, lambda: run_analysis_async(paper_text, authors_text, agents_to_run))
         
         if "error" in results:
             logger.error(f"Analysis failed: {results['error']}")
@@ -189,6 +346,9 @@ async def analyze_paper(file: UploadFile = File(None), request: Request = None):
 
     except HTTPException:
         raise
+    except RequestCancelled:
+        logger.info("Client disconnected, paper analysis cancelled")
+        return JSONResponse(status_code=499, content={"error": "Client disconnected"})
     except Exception as e:
         logger.error(f"Unexpected error in analyze_paper: {str(e)}")
         return JSONResponse(
@@ -210,7 +370,8 @@ async def analyze_text(request: Request):
         if not paper_text.strip():
             raise HTTPException(status_code=400, detail="No text provided")
         
-        results = run_crewai_analysis(paper_text, authors_text, agents_to_run)
+        with scheduling(client_id(request), ANALYSIS):
+            results = await run_until_disconnected(request, lambda: run_analysis_async(paper_text, authors_text, agents_to_run))
         
         if "error" in results:
             raise HTTPException(status_code=500, detail=results["error"])
@@ -219,6 +380,9 @@ async def analyze_text(request: Request):
         
     except HTTPException:
         raise
+    except RequestCancelled:
+        logger.info("Client disconnected, text analysis cancelled")
+        return JSONResponse(status_code=499, content={"error": "Client disconnected"})
     except Exception as e:
         logger.error(f"Error in analyze_text: {str(e)}")
         return JSONResponse(
@@ -226,6 +390,145 @@ async def analyze_text(request: Request):
             content={"error": f"Text analysis failed: {str(e)}"}
         )
 
+@app.post("/analyze-batch")
+async def analyze_batch(files: List[UploadFile] = File(None), request: Request = None):
+    """
+    Analyse many papers in one request.
+    Accepts several PDF uploads (multipart "files") or JSON
+    {"papers": [{"text", "authors", "id"}] | "texts": [...], "agents_to_run", "mode"}.
+    Papers are scheduled together under the global LLM limits and results are streamed
+    back as newline-delimited JSON, one "paper_complete" line per paper as soon as it
+    finishes (in completion order), followed by a "batch_complete" summary.
+    """
+    agents_to_run = None
+    mode = None
+    if files:
+        if len(files) > BATCH_MAX_PAPERS:
+            raise HTTPException(status_code=413, detail=f"Batch too large (max {BATCH_MAX_PAPERS} papers)")
+        contents = [await upload.read() for upload in files]
+        # PDF parsing is CPU-bound, keep it off the event loop
+        texts = await asyncio.gather(*(asyncio.to_thread(extract_text_from_pdf, BytesIO(content)) for content in contents))
+        papers = [{"id": upload.filename, "text": text, "authors": ""} for upload, text in zip(files, texts)]
+    elif request:
+        data = await request.json()
+        if "papers" in data:
+            papers = [paper if isinstance(paper, dict) else {"text": paper} for paper in data["papers"]]
+        else:
+            papers = [{"text": text} for text in data.get("texts", [])]
+        agents_to_run = data.get("agents_to_run", None)
+        mode = data.get("mode", None)
+    else:
+        raise HTTPException(status_code=400, detail="No input provided")
+    
+    if not papers:
+        raise HTTPException(status_code=400, detail="No papers provided for analysis")
+    if len(papers) > BATCH_MAX_PAPERS:
+        raise HTTPException(status_code=413, detail=f"Batch too large (max {BATCH_MAX_PAPERS} papers)")
+    
+    # Papers without text are reported straight away instead of failing the whole batch
+    runnable = [index for index, paper in enumerate(papers) if (paper.get("text") or "").strip()]
+    skipped = [index for index, paper in enumerate(papers) if not (paper.get("text") or "").strip()]
+    
+    def paper_line(index: int, results: dict) -> str:
+        return json.dumps({
+            "type": "paper_complete",
+            "index": index,
+            "id": papers[index].get("id", index),
+            "status": "failed" if "error" in results else "succeeded",
+            "result": results
+        }) + "\n"
+    
+    client = client_id(request)
+    
+    async def ndjson():
+        start = asyncio.get_event_loop().time()
+        failed = 0
+        for index in skipped:
+            failed += 1
+            yield paper_line(index, {"error": "No text provided for analysis"})
+        batch = [papers[index] for index in runnable]
+        token = CancelToken()
+        # Set here, not in the endpoint: the body runs when the response is streamed. If the
+        # client goes away the stream is closed mid-way and the token stops the remaining papers.
+        finished = False
+        try:
+            with scheduling(client, BATCH), cancellation_scope(token):
+                async for position, results in analyze_simple_batch(batch, agents_to_run, mode):
+                    failed += "error" in results
+                    yield paper_line(runnable[position], results)
+            finished = True
+        finally:
+            if not finished:
+                token.cancel("batch stream closed")
+        yield json.dumps({
+            "type": "batch_complete",
+            "papers": len(papers),
+            "failed": failed,
+            "wall_clock_s": round(asyncio.get_event_loop().time() - start, 3)
+        }) + "\n"
+    
+    logger.info(f"Starting batch analysis of {len(papers)} papers")
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+@app.post("/jobs", status_code=202)
+async def create_job(file: UploadFile = File(None), request: Request = None):
+    """
+    Queue an analysis and return its job id immediately.
+    Accepts a PDF upload or JSON {"text", "authors", "agents_to_run", "mode"}.
+    """
+    mode = None
+    if file:
+        paper_bytes = await file.read()
+        paper_text = await asyncio.to_thread(extract_text_from_pdf, BytesIO(paper_bytes))
+        authors_text = ""
+        agents_to_run = None
+    elif request:
+        data = await request.json()
+        paper_text = data.get("text", "")
+        authors_text = data.get("authors", "")
+        agents_to_run = data.get("agents_to_run", None)
+        mode = data.get("mode", None)
+    else:
+        raise HTTPException(status_code=400, detail="No input provided")
+    
+    if not paper_text.strip():
+        raise HTTPException(status_code=400, detail="No text provided for analysis")
+    
+    try:
+        job = job_manager.submit(paper_text, authors_text, agents_to_run, mode, client_id=client_id(request))
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    
+    return {
+        **job.to_dict(include_result=False),
+        "status_url": f"/jobs/{job.id}",
+        "events_url": f"/jobs/{job.id}/events"
+    }
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Job status, with the analysis result once it has finished"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """
+    Newline-delimited JSON stream of the job's events: status changes,
+    agent_partial/agent_complete as agents finish, then job_complete or job_failed.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    
+    async def ndjson():
+        async for event in job_manager.events(job):
+            yield json.dumps(event) + "\n"
+    
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
 # WebSocket message handlers
 async def handle_chat_message(message: dict, websocket: WebSocket):
     """Handle chat messages from frontend"""
@@ -234,8 +537,8 @@ async def handle_chat_message(message: dict, websocket: WebSocket):
         generate_speech = message.get("generateSpeech", False)
         
         # Use Claude API for real responses
-        from backend.utils.claude_client import claude_summarize_novelty
-        response = claude_summarize_novelty(user_message)
+        from backend.utils.claude_client import claude_summarize_novelty_async
+        response = await claude_summarize_novelty_async(user_message)
         
         await manager.send_personal_message(json.dumps({
             "type": "chat_response",
@@ -252,6 +555,22 @@ async def handle_chat_message(message: dict, websocket: WebSocket):
             "message": f"Chat error: {str(e)}"
         }), websocket)
 
+def progress_sender(websocket: WebSocket):
+    """on_progress callback that forwards each finished agent to the client as analysis_progress"""
+    async def send_progress(event: dict):
+        total = max(event.get("total", 1), 1)
+        await manager.send_personal_message(json.dumps({
+            "type": "analysis_progress",
+            "progress": round(100 * event["completed"] / total),
+            "message": f"{event['agent']} finished in {event['duration_s']:.1f}s",
+            "agent": event["agent"],
+            "duration_s": event["duration_s"],
+            "result": event["result"],
+            "completed": event["completed"],
+            "total": event["total"],
+        }), websocket)
+    return send_progress
+
 async def handle_startup_analysis(message: dict, websocket: WebSocket):
     """Handle startup analysis requests"""
     try:
@@ -286,20 +605,8 @@ async def handle_startup_analysis(message: dict, websocket: WebSocket):
         Impact: {startup_data['impact']}
         """
         
-        await manager.send_personal_message(json.dumps({
-            "type": "analysis_progress",
-            "progress": 30,
-            "message": "Running AI agents..."
-        }), websocket)
-        
-        # Run the analysis using our orchestrator
-        results = run_crewai_analysis(combined_text, startup_data['authors'])
-        
-        await manager.send_personal_message(json.dumps({
-            "type": "analysis_progress",
-            "progress": 80,
-            "message": "Finalizing results..."
-        }), websocket)
+        # Run the analysis using our orchestrator; progress is reported as each agent finishes
+        results = await run_analysis_async(combined_text, startup_data['authors'], on_progress=progress_sender(websocket))
         
         # Send final results
         await manager.send_personal_message(json.dumps({
@@ -372,7 +679,7 @@ async def handle_deep_analysis(message: dict, websocket: WebSocket):
         text = message.get("text", "")
         
         # Run comprehensive analysis
-        results = run_crewai_analysis(text, "")
+        results = await run_analysis_async(text, "", on_progress=progress_sender(websocket))
         
         await manager.send_personal_message(json.dumps({
             "type": "deep_analysis_response",
@@ -387,6 +694,30 @@ async def handle_deep_analysis(message: dict, websocket: WebSocket):
             "message": f"Deep analysis error: {str(e)}"
         }), websocket)
 
+async def handle_stream_analysis(message: dict, websocket: WebSocket):
+    """Handle streaming analysis requests: agent fields are pushed as soon as they are generated"""
+    try:
+        text = message.get("text", "")
+        authors = message.get("authors", "")
+        
+        async def send_event(event: dict):
+            await manager.send_personal_message(json.dumps(event), websocket)
+        
+        results = await stream_simple_analysis(text, authors, send_event, message.get("agents"), message.get("mode"))
+        
+        await manager.send_personal_message(json.dumps({
+            "type": "stream_analysis_response",
+            "analysis": results,
+            "timestamp": asyncio.get_event_loop().time()
+        }), websocket)
+        
+    except Exception as e:
+        logger.error(f"Error handling stream analysis: {e}")
+        await manager.send_personal_message(json.dumps({
+            "type": "error",
+            "message": f"Stream analysis error: {str(e)}"
+        }), websocket)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,335 @@
+# backend/mock_llm_server.py
+"""
+Deterministic local stand-in for the Anthropic Messages API, for load tests
+and benchmarks without an API key.
+
+Serves /v1/messages (JSON and SSE streaming) and /v1/messages/batches. Agent
+prompts are answered with JSON shaped like the example in their rubric
+("RETURN JSON: {...}"), fused prompts with one such object per section.
+Latency, error rate and 429 injection are configurable; every random choice
+is seeded from --seed, the request body and how often that body was seen, so
+a run is reproducible.
+
+Point the backend at it with ANTHROPIC_BASE_URL:
+    python -m backend.mock_llm_server --port 8100 --latency lognormal:400,0.5 --rate-429 0.05
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8100 uvicorn backend.main:app
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from backend.utils.token_budget import estimate_tokens
+
+_EXAMPLE_RE = re.compile(r"RETURN JSON(?: exactly)?: (\{.*?\})\n", re.S)
+_SECTION_RE = re.compile(r'=== SECTION "(\w+)" ===\n(.*?)(?==== SECTION|RETURN a single JSON object)', re.S)
+
+
+@dataclass
+class MockSettings:
+    seed: int = 0
+    # "fixed:MS", "uniform:MIN_MS,MAX_MS" or "lognormal:MEDIAN_MS,SIGMA" for time to first token
+    latency: str = "fixed:200"
+    # Generation speed, added on top of the first-token latency
+    ms_per_output_token: float = 5.0
+    error_rate: float = 0.0
+    rate_429: float = 0.0
+    retry_after_seconds: float = 1.0
+    # Provider prompt-cache lifetime for cache_control blocks
+    prompt_cache_ttl_seconds: float = 300.0
+
+
+SETTINGS = MockSettings()
+
+
+def _sample_latency(spec: str, rng: random.Random) -> float:
+    """First-token latency in seconds for a latency spec"""
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "fixed":
+        return values[0] / 1000.0
+    if kind == "uniform":
+        return rng.uniform(values[0], values[1]) / 1000.0
+    if kind == "lognormal":
+        return values[0] * math.exp(rng.gauss(0.0, values[1])) / 1000.0
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+def _vary(example: Dict[str, Any], rng: random.Random) -> Dict[str, Any]:
+    """Fill a rubric's example object with plausible, seeded values"""
+    result = {}
+    for key, value in example.items():
+        if key == "trl":
+            result[key] = rng.randint(2, 8)
+        elif isinstance(value, bool):
+            result[key] = value
+        elif isinstance(value, int):
+            result[key] = rng.randint(1, 5)
+        elif isinstance(value, str) and "/" in value and " " not in value:
+            # Enumerations like "high/medium/low"
+            result[key] = rng.choice(value.split("/"))
+        else:
+            result[key] = value
+    return result
+
+
+def _prompt_text(body: Dict[str, Any]) -> Tuple[str, str]:
+    """Return (cached_prefix, full_text) of the last user message"""
+    content = body["messages"][-1]["content"]
+    if isinstance(content, str):
+        return "", content
+    prefix = "".join(block.get("text", "") for block in content if block.get("cache_control"))
+    return prefix, "".join(block.get("text", "") for block in content)
+
+
+def generate_reply(prompt: str, rng: random.Random) -> str:
+    """Answer text for a prompt: rubric-shaped JSON for agent prompts, short prose otherwise"""
+    sections = _SECTION_RE.findall(prompt)
+    if sections:
+        fused = {}
+        for agent, rubric in sections:
+            match = _EXAMPLE_RE.search(rubric + "\n")
+            fused[agent] = _vary(json.loads(match.group(1)), rng) if match else {}
+        return json.dumps(fused)
+    match = _EXAMPLE_RE.search(prompt)
+    if match:
+        return json.dumps(_vary(json.loads(match.group(1)), rng))
+    if "Reply with OK" in prompt:
+        return "OK"
+    return "This research shows clear novelty and a plausible path to commercialization."
+
+
+class MockLLM:
+    """Response generation, fault injection and prompt-cache simulation"""
+
+    def __init__(self, settings: MockSettings):
+        self.settings = settings
+        self._seen: Dict[str, int] = {}
+        self._prompt_cache: "OrderedDict[str, float]" = OrderedDict()
+        self.stats = {"requests": 0, "errors_injected": 0, "rate_limited_injected": 0, "streamed": 0}
+
+    def rng_for(self, body: Dict[str, Any]) -> random.Random:
+        digest = hashlib.sha256(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()
+        occurrence = self._seen.get(digest, 0)
+        self._seen[digest] = occurrence + 1
+        return random.Random(f"{self.settings.seed}:{digest}:{occurrence}")
+
+    def fault(self, rng: random.Random) -> Optional[JSONResponse]:
+        """Injected 429/529 response, or None"""
+        roll = rng.random()
+        if roll < self.settings.rate_429:
+            self.stats["rate_limited_injected"] += 1
+            return JSONResponse(
+                status_code=429,
+                headers={"retry-after": str(self.settings.retry_after_seconds)},
+                content={"type": "error", "error": {"type": "rate_limit_error", "message": "Injected rate limit"}},
+            )
+        if roll < self.settings.rate_429 + self.settings.error_rate:
+            self.stats["errors_injected"] += 1
+            return JSONResponse(
+                status_code=529,
+                content={"type": "error", "error": {"type": "overloaded_error", "message": "Injected overload"}},
+            )
+        return None
+
+    def usage(self, body: Dict[str, Any], prefix: str, output_text: str) -> Dict[str, int]:
+        """Token usage, with cache_control prefixes written once and read while fresh"""
+        prompt_tokens = estimate_tokens(body.get("system", "") or "") + estimate_tokens(_prompt_text(body)[1])
+        cache_creation = cache_read = 0
+        if prefix:
+            key = hashlib.sha256(f"{body.get('model')}\0{body.get('system', '')}\0{prefix}".encode("utf-8")).hexdigest()
+            now = time.monotonic()
+            prefix_tokens = estimate_tokens(prefix)
+            if self._prompt_cache.get(key, 0) > now:
+                cache_read = prefix_tokens
+            else:
+                cache_creation = prefix_tokens
+            self._prompt_cache[key] = now + self.settings.prompt_cache_ttl_seconds
+            self._prompt_cache.move_to_end(key)
+            while len(self._prompt_cache) > 10000:
+                self._prompt_cache.popitem(last=False)
+            prompt_tokens -= prefix_tokens
+        return {
+            "input_tokens": max(prompt_tokens, 1),
+            "output_tokens": max(estimate_tokens(output_text), 1),
+            "cache_creation_input_tokens": cache_creation,
+            "cache_read_input_tokens": cache_read,
+        }
+
+    def respond(self, body: Dict[str, Any], rng: random.Random) -> Tuple[Dict[str, Any], float]:
+        """Return (message, seconds the reply takes to generate)"""
+        prefix, prompt = _prompt_text(body)
+        text = generate_reply(prompt, rng)
+        stop_reason = "end_turn"
+        max_tokens = int(body.get("max_tokens", 1024))
+        if estimate_tokens(text) > max_tokens:
+            text = text[:max_tokens * 4]
+            stop_reason = "max_tokens"
+        usage = self.usage(body, prefix, text)
+        message = {
+            "id": f"msg_mock_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "mock"),
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": stop_reason,
+            "stop_sequence": None,
+            "usage": usage,
+        }
+        generation = usage["output_tokens"] * self.settings.ms_per_output_token / 1000.0
+        return message, _sample_latency(self.settings.latency, rng) + generation
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _stream_message(message: Dict[str, Any], first_token_delay: float, ms_per_token: float):
+    usage = message["usage"]
+    await asyncio.sleep(first_token_delay)
+    start = {**message, "content": [], "stop_reason": None, "usage": {**usage, "output_tokens": 1}}
+    yield _sse("message_start", {"type": "message_start", "message": start})
+    yield _sse("content_block_start", {"type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""}})
+    text = message["content"][0]["text"]
+    # ~4 characters per token, sent a few tokens at a time
+    for i in range(0, len(text), 16):
+        await asyncio.sleep(4 * ms_per_token / 1000.0)
+        yield _sse("content_block_delta", {"type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": text[i:i + 16]}})
+    yield _sse("content_block_stop", {"type": "content_block_stop", "index": 0})
+    yield _sse("message_delta", {
+        "type": "message_delta",
+        "delta": {"stop_reason": message["stop_reason"], "stop_sequence": None},
+        "usage": {"output_tokens": usage["output_tokens"]},
+    })
+    yield _sse("message_stop", {"type": "message_stop"})
+
+
+def create_app(settings: MockSettings = SETTINGS) -> FastAPI:
+    app = FastAPI(title="Mock Messages API", description="Deterministic local LLM stand-in for performance tests")
+    llm = MockLLM(settings)
+    batches: Dict[str, Dict[str, Any]] = {}
+
+    @app.post("/v1/messages")
+    async def create_message(request: Request):
+        body = await request.json()
+        llm.stats["requests"] += 1
+        rng = llm.rng_for(body)
+        error = llm.fault(rng)
+        if error is not None:
+            # Errors come back quickly, like a real gateway rejection
+            await asyncio.sleep(_sample_latency(settings.latency, rng) / 10)
+            return error
+
+        message, seconds = llm.respond(body, rng)
+        if body.get("stream"):
+            llm.stats["streamed"] += 1
+            first_token = _sample_latency(settings.latency, random.Random(message["id"]))
+            return StreamingResponse(
+                _stream_message(message, first_token, settings.ms_per_output_token),
+                media_type="text/event-stream",
+            )
+        await asyncio.sleep(seconds)
+        return message
+
+    async def _process_batch(batch_id: str, requests: List[Dict[str, Any]]):
+        batch = batches[batch_id]
+        for item in requests:
+            body = item["params"]
+            message, seconds = llm.respond(body, llm.rng_for(body))
+            # Batches are asynchronous; only a fraction of the interactive latency is simulated
+            await asyncio.sleep(seconds / 20)
+            batch["results"].append({"custom_id": item["custom_id"], "result": {"type": "succeeded", "message": message}})
+            batch["object"]["request_counts"]["processing"] -= 1
+            batch["object"]["request_counts"]["succeeded"] += 1
+        batch["object"]["processing_status"] = "ended"
+        batch["object"]["ended_at"] = _now_iso()
+        batch["object"]["results_url"] = f"{batch['base_url']}v1/messages/batches/{batch_id}/results"
+
+    @app.post("/v1/messages/batches")
+    async def create_batch(request: Request):
+        body = await request.json()
+        batch_id = f"msgbatch_mock_{uuid.uuid4().hex[:20]}"
+        batches[batch_id] = {
+            "base_url": str(request.base_url),
+            "results": [],
+            "object": {
+                "id": batch_id,
+                "type": "message_batch",
+                "processing_status": "in_progress",
+                "request_counts": {"processing": len(body["requests"]), "succeeded": 0, "errored": 0, "canceled": 0, "expired": 0},
+                "created_at": _now_iso(),
+                "expires_at": _now_iso(24 * 3600),
+                "ended_at": None,
+                "archived_at": None,
+                "cancel_initiated_at": None,
+                "results_url": None,
+            },
+        }
+        batches[batch_id]["task"] = asyncio.create_task(_process_batch(batch_id, body["requests"]))
+        return batches[batch_id]["object"]
+
+    @app.get("/v1/messages/batches/{batch_id}")
+    async def retrieve_batch(batch_id: str):
+        if batch_id not in batches:
+            return JSONResponse(status_code=404, content={"type": "error", "error": {"type": "not_found_error", "message": batch_id}})
+        return batches[batch_id]["object"]
+
+    @app.get("/v1/messages/batches/{batch_id}/results")
+    async def batch_results(batch_id: str):
+        if batch_id not in batches:
+            return JSONResponse(status_code=404, content={"type": "error", "error": {"type": "not_found_error", "message": batch_id}})
+        lines = "".join(json.dumps(entry) + "\n" for entry in batches[batch_id]["results"])
+        return StreamingResponse(iter([lines]), media_type="application/x-jsonl")
+
+    @app.get("/stats")
+    async def stats():
+        return llm.stats
+
+    return app
+
+
+def _now_iso(offset_seconds: float = 0) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + offset_seconds))
+
+
+# Default-settings app, e.g. `uvicorn backend.mock_llm_server:app --port 8100`
+app = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    p = argparse.ArgumentParser()
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8100)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--latency", default="fixed:200", help='"fixed:MS", "uniform:MIN_MS,MAX_MS" or "lognormal:MEDIAN_MS,SIGMA"')
+    p.add_argument("--ms-per-output-token", type=float, default=5.0)
+    p.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 529 overloaded")
+    p.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429 + retry-after")
+    p.add_argument("--retry-after", type=float, default=1.0)
+    args = p.parse_args()
+
+    settings = MockSettings(
+        seed=args.seed,
+        latency=args.latency,
+        ms_per_output_token=args.ms_per_output_token,
+        error_rate=args.error_rate,
+        rate_429=args.rate_429,
+        retry_after_seconds=args.retry_after,
+    )
+    # Fail fast on a bad --latency spec
+    _sample_latency(settings.latency, random.Random(0))
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,239 @@
+# backend/serve.py
+"""
+Production launcher: preload once, then fork the workers.
+`uvicorn --workers N` starts N fresh interpreters, each loading the
+SearchVentures DataFrame and FAISS index on its own, so memory and
+startup time grow with N. Here the master process imports the app, makes sure
+the persisted SearchVentures index is up to date (building it in a separate
+`python -m backend.build_index` process when it is not), loads the DataFrame
+and memory-maps the index (see utils/lazy.py), freezes the garbage collector so
+inherited objects are not touched again, binds the listening socket and forks
+the workers. The workers share those pages copy-on-write and accept
+connections from the inherited socket. The master restarts workers that die
+and periodically logs each worker's RSS/PSS.
+
+The embedding model is not loaded in the master: torch's OpenMP runtime is not
+fork-safe once it has run, so each worker loads the model itself in its
+startup warm-up (WARMUP_ON_STARTUP) or on first use.
+
+The Claude rate limits in config are server-wide; each worker enforces an
+equal share of them (WEB_CONCURRENCY is set to the worker count).
+
+Usage:
+    python -m backend.serve --workers 4 --host 0.0.0.0 --port 8000
+"""
+import argparse
+import gc
+import logging
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, Optional
+
+from backend.utils.process_stats import memory_usage
+
+logger = logging.getLogger("backend.serve")
+
+# Workers that exit sooner than this after starting are crash-looping; respawn them more slowly
+MIN_WORKER_LIFETIME_SECONDS = 5.0
+RESPAWN_BACKOFF_SECONDS = 5.0
+
+
+def build_index_subprocess() -> bool:
+    """Bring the persisted SearchVentures index up to date in a child process, so no encoding happens here"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-m", "backend.build_index"], stdout=subprocess.DEVNULL)
+    if result.returncode != 0:
+        logger.warning(f"backend.build_index exited with status {result.returncode}; workers will load the index themselves")
+        return False
+    logger.info(f"SearchVentures index checked/built in {time.perf_counter() - start:.1f}s")
+    return True
+
+
+def preload():
+    """Import the app in the master; everything loaded here is shared with the workers"""
+    start = time.perf_counter()
+    from backend.main import app
+    from backend.config import INDEX_PERSIST_ENABLED
+    from backend.utils.lazy import warm_up
+
+    # Without a persisted build the index would be encoded right here, so it is left to the workers
+    if INDEX_PERSIST_ENABLED and build_index_subprocess():
+        # Synchronously, so no loader thread exists at fork time
+        state = warm_up(["searchventures_index"])["searchventures_index"]["state"]
+        logger.info(f"Preloaded app and SearchVentures index ({state}) in {time.perf_counter() - start:.1f}s")
+    else:
+        logger.info(f"Preloaded app in {time.perf_counter() - start:.1f}s")
+    # Move everything allocated so far out of the collector's reach: collections in the
+    # workers would otherwise write to the GC headers of inherited objects and copy their pages
+    gc.collect()
+    gc.freeze()
+    return app
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock: socket.socket, args) -> None:
+    """Serve the preloaded app on the inherited socket until told to stop (runs in the forked child)"""
+    import uvicorn
+
+    # Forked children start with the master's random state; retry jitter should differ per worker
+    random.seed()
+    if args.torch_threads > 0:
+        # One intra-op pool per worker; N workers each using every core only contend.
+        # torch is imported later, by the worker's warm-up, and sizes its pool from this
+        os.environ["OMP_NUM_THREADS"] = str(args.torch_threads)
+        if "torch" in sys.modules:
+            sys.modules["torch"].set_num_threads(args.torch_threads)
+    config = uvicorn.Config(
+        app,
+        log_level=args.log_level,
+        timeout_keep_alive=args.timeout_keep_alive,
+        proxy_headers=True,
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Master:
+    """Forks and supervises the workers; reports their memory"""
+
+    def __init__(self, app, sock: socket.socket, args, report_seconds: float):
+        self.app = app
+        self.sock = sock
+        self.args = args
+        self.report_seconds = report_seconds
+        self.workers: Dict[int, float] = {}  # pid -> start time
+        self.stopping = False
+
+    def spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                run_worker(self.app, self.sock, self.args)
+            except BaseException:
+                logger.exception(f"Worker {os.getpid()} crashed")
+                code = 1
+            finally:
+                logging.shutdown()
+                os._exit(code)
+        self.workers[pid] = time.monotonic()
+        logger.info(f"Started worker {pid}")
+
+    def _request_stop(self, signum, frame) -> None:
+        self.stopping = True
+
+    def reap(self) -> None:
+        """Collect exited workers and replace them unless shutting down"""
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            started = self.workers.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            logger.warning(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+            if time.monotonic() - started < MIN_WORKER_LIFETIME_SECONDS:
+                time.sleep(RESPAWN_BACKOFF_SECONDS)
+            self.spawn()
+
+    def report_memory(self) -> Dict[str, float]:
+        """Log RSS/PSS of the master and each worker; returns the totals"""
+        totals = {"rss_mb": 0.0, "pss_mb": 0.0}
+        for role, pid in [("master", os.getpid())] + [("worker", pid) for pid in sorted(self.workers)]:
+            usage = memory_usage(pid)
+            for key in totals:
+                totals[key] += usage.get(key, 0.0)
+            logger.info(
+                f"{role} {pid}: rss={usage.get('rss_mb', '?')}MB pss={usage.get('pss_mb', '?')}MB "
+                f"shared={usage.get('shared_clean_mb', '?')}MB private_dirty={usage.get('private_dirty_mb', '?')}MB"
+            )
+        logger.info(
+            f"master + {len(self.workers)} workers: total rss={totals['rss_mb']:.1f}MB, "
+            f"actual footprint (pss)={totals['pss_mb']:.1f}MB"
+        )
+        return totals
+
+    def stop(self) -> None:
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                self.workers.pop(pid, None)
+        deadline = time.monotonic() + self.args.graceful_timeout
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in list(self.workers):
+            logger.warning(f"Worker {pid} did not stop in time, killing it")
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+            self.workers.pop(pid, None)
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        for _ in range(self.args.workers):
+            self.spawn()
+        next_report: Optional[float] = time.monotonic() + min(10.0, self.report_seconds) if self.report_seconds > 0 else None
+        try:
+            while not self.stopping:
+                self.reap()
+                if next_report is not None and time.monotonic() >= next_report:
+                    self.report_memory()
+                    next_report = time.monotonic() + self.report_seconds
+                time.sleep(0.5)
+        finally:
+            logger.info("Shutting down workers")
+            self.stop()
+            self.sock.close()
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description="Serve the API from preforked workers sharing one preloaded, memory-mapped index")
+    p.add_argument("--host", default="0.0.0.0")
+    p.add_argument("--port", type=int, default=8000)
+    p.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "2")))
+    p.add_argument("--backlog", type=int, default=2048)
+    p.add_argument("--timeout-keep-alive", type=int, default=5)
+    p.add_argument("--graceful-timeout", type=float, default=30.0, help="Seconds workers get to finish requests on shutdown")
+    p.add_argument("--torch-threads", type=int, default=1, help="torch intra-op threads per worker (0 leaves the default)")
+    p.add_argument("--report-seconds", type=float, default=None, help="Memory report interval (default: SERVER_MEMORY_REPORT_SECONDS)")
+    p.add_argument("--log-level", default="info")
+    args = p.parse_args()
+    args.workers = max(1, args.workers)
+
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.INFO))
+    # Read by backend.config, so it must be set before the app is imported
+    os.environ["WEB_CONCURRENCY"] = str(args.workers)
+    from backend.config import SERVER_MEMORY_REPORT_SECONDS
+
+    app = preload()
+    sock = bind_socket(args.host, args.port, args.backlog)
+    logger.info(f"Listening on {args.host}:{args.port} with {args.workers} workers")
+    report_seconds = SERVER_MEMORY_REPORT_SECONDS if args.report_seconds is None else args.report_seconds
+    Master(app, sock, args, report_seconds).run()
+
+
+if __name__ == "__main__":
+    main()
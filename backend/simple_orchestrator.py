@@ -4,10 +4,13 @@ Fallback orchestrator that doesn't require CrewAI but provides similar functiona
 """
 
 import logging
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable, Awaitable, AsyncIterator, Tuple
 import json
 import asyncio
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import contextvars
+import inspect
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 
 # Configure logging first
 logging.basicConfig(level=logging.INFO)
@@ -15,58 +18,112 @@ logger = logging.getLogger(__name__)
 
 # Import Claude client for real AI analysis
 try:
-    from backend.utils.claude_client import claude_ask
+    from backend.utils.claude_client import claude_ask, track_usage, usage_label
+    from backend.utils.prompt_utils import shared_prefix_mode, prime_shared_prefix, prime_shared_prefix_async
     CLAUDE_AVAILABLE = True
 except Exception as e:
     logger.warning(f"Claude client not available: {e}")
     CLAUDE_AVAILABLE = False
+    from contextlib import nullcontext as track_usage
+    from contextlib import nullcontext as shared_prefix_mode
+    from contextlib import nullcontext as usage_label
 
 # Import existing agent functions with error handling
 try:
-    from backend.agents.tech_ip_agent import analyze_tech_ip, claude_summarize_novelty
+    from backend.agents.tech_ip_agent import analyze_tech_ip, claude_summarize_novelty, claude_summarize_novelty_async
     TECH_IP_AVAILABLE = True
 except Exception as e:
     logger.warning(f"Tech IP agent not available: {e}")
     TECH_IP_AVAILABLE = False
 
 try:
-    from backend.agents.market_agent import analyze_market_business, find_competitors_semantic
+    from backend.agents.market_agent import analyze_market_business, analyze_market_business_async, find_competitors_semantic
     MARKET_AVAILABLE = True
 except Exception as e:
     logger.warning(f"Market agent not available: {e}")
     MARKET_AVAILABLE = False
 
 try:
-    from backend.agents.team_agent import evaluate_team
+    from backend.agents.team_agent import evaluate_team, evaluate_team_async
     TEAM_AVAILABLE = True
 except Exception as e:
     logger.warning(f"Team agent not available: {e}")
     TEAM_AVAILABLE = False
 
 try:
-    from backend.agents.scaling_agent import evaluate_scaling
+    from backend.agents.scaling_agent import evaluate_scaling, evaluate_scaling_async
     SCALING_AVAILABLE = True
 except Exception as e:
     logger.warning(f"Scaling agent not available: {e}")
     SCALING_AVAILABLE = False
 
 try:
-    from backend.agents.funding_agent import evaluate_funding
+    from backend.agents.funding_agent import evaluate_funding, evaluate_funding_async
     FUNDING_AVAILABLE = True
 except Exception as e:
     logger.warning(f"Funding agent not available: {e}")
     FUNDING_AVAILABLE = False
 
 try:
-    from backend.agents.impact_agent import evaluate_impact
+    from backend.agents.impact_agent import evaluate_impact, evaluate_impact_async
     IMPACT_AVAILABLE = True
 except Exception as e:
     logger.warning(f"Impact agent not available: {e}")
     IMPACT_AVAILABLE = False
 
+try:
+    from backend.agents.fused_agent import (
+        evaluate_all_criteria, evaluate_all_criteria_async, build_fused_prompt, parse_fused_output,
+        FUSED_AGENTS, FUSED_MAX_TOKENS
+    )
+    FUSED_AVAILABLE = True
+except Exception as e:
+    logger.warning(f"Fused analysis not available: {e}")
+    FUSED_AVAILABLE = False
+
+try:
+    from backend.utils.claude_client import claude_stream_async
+    from backend.utils.json_stream import IncrementalJSONParser
+    from backend.agents.registry import AGENT_NAMES, AGENT_INPUTS, build_agent_request, finalize_agent_output
+    STREAMING_AVAILABLE = True
+except Exception as e:
+    logger.warning(f"Streaming analysis not available: {e}")
+    STREAMING_AVAILABLE = False
+    AGENT_INPUTS = {}
+
+try:
+    from backend.agents.registry import agent_version, is_fallback_result
+    from backend.utils.result_store import get_result_store, agent_input_hash
+    RESULT_STORE_AVAILABLE = True
+except Exception as e:
+    logger.warning(f"Result store not available: {e}")
+    RESULT_STORE_AVAILABLE = False
+
+from backend.config import ANALYSIS_MODE, AGENT_DEADLINES, AGENT_DEADLINE_SECONDS, BATCH_MAX_CONCURRENT_PAPERS, EMBED_BATCH_SIZE
+from backend.utils.deadlines import deadline
+from backend.utils.cancellation import RequestCancelled, is_cancelled, record_cancelled
+from backend.utils.rate_limiter import RateLimitExhausted
+from backend.utils.single_flight import analysis_key, get_analysis_flights
+from backend.utils.artifacts import analysis_artifacts, shared_artifact
+from backend.utils.token_budget import split_sections
+from backend.dag import DAG
+
+try:
+    from backend.utils.faiss_utils import embed_query, prefetch_searchventures, prefetched_searches, searchventures_index_usable
+    EMBEDDING_AVAILABLE = True
+except Exception as e:
+    logger.warning(f"Paper embedding not available: {e}")
+    EMBEDDING_AVAILABLE = False
+
+# Extra time an agent gets after its deadline to run its fallback before the orchestrator gives up on it
+DEADLINE_GRACE_SECONDS = 5.0
+
+# on_progress({"type": "agent_progress", "agent", "duration_s", "result", "completed", "total"})
+ProgressCallback = Callable[[Dict[str, Any]], Any]
+
 # Import comprehensive scoring system
 try:
-    from backend.comprehensive_scorer import calculate_comprehensive_score
+    from backend.comprehensive_scorer import calculate_comprehensive_score, comprehensive_scorer, CATEGORY_AGENTS
     SCORER_AVAILABLE = True
 except Exception as e:
     logger.warning(f"Comprehensive scorer not available: {e}")
@@ -76,29 +133,43 @@ except Exception as e:
 class SimpleOrchestrator:
     """Simple orchestrator that runs agents in parallel without CrewAI"""
     
-    def __init__(self):
-        """Initialize the orchestrator"""
+    def __init__(self, analysis_mode: str = ANALYSIS_MODE):
+        """Initialize the orchestrator
+
+        analysis_mode: "split" runs one Claude request per agent, "fused" asks
+        for every criterion in a single request, "shared_prefix" runs one request
+        per agent with the paper sent first as a provider-cached prefix.
+        """
+        self.analysis_mode = analysis_mode
         self.agents = {}
+        # Async twins of the agents, used by run_analysis_async
+        self.async_agents = {}
         
         # Only add agents that are available, with Claude fallbacks
         if TECH_IP_AVAILABLE:
             self.agents['tech_ip'] = claude_summarize_novelty
+            self.async_agents['tech_ip'] = claude_summarize_novelty_async
         elif CLAUDE_AVAILABLE:
             self.agents['tech_ip'] = self._claude_tech_analysis
             
         if MARKET_AVAILABLE:
             self.agents['market'] = analyze_market_business
+            self.async_agents['market'] = analyze_market_business_async
         elif CLAUDE_AVAILABLE:
             self.agents['market'] = self._claude_market_analysis
             
         if TEAM_AVAILABLE:
             self.agents['team'] = evaluate_team
+            self.async_agents['team'] = evaluate_team_async
         if SCALING_AVAILABLE:
             self.agents['scaling'] = evaluate_scaling
+            self.async_agents['scaling'] = evaluate_scaling_async
         if FUNDING_AVAILABLE:
             self.agents['funding'] = evaluate_funding
+            self.async_agents['funding'] = evaluate_funding_async
         if IMPACT_AVAILABLE:
             self.agents['impact'] = evaluate_impact
+            self.async_agents['impact'] = evaluate_impact_async
     
     def run_agent(self, agent_name: str, paper_text: str, authors_text: str = "") -> Dict[str, Any]:
         """Run a single agent"""
@@ -111,24 +182,149 @@ class SimpleOrchestrator:
                     "status": "skipped"
                 }
             
+            if is_cancelled():
+                # Queued in the thread pool after the client went away
+                record_cancelled("agents_skipped")
+                return {"error": "Request cancelled", "agent": agent_name, "status": "cancelled"}
+            
             logger.info(f"Running {agent_name} agent")
             
-            if agent_name == 'team':
-                result = self.agents[agent_name](authors_text or paper_text, paper_text)
-            else:
-                result = self.agents[agent_name](paper_text)
+            with usage_label(agent_name), deadline(self._agent_deadline(agent_name)):
+                if agent_name == 'team':
+                    result = self.agents[agent_name](authors_text or paper_text, paper_text)
+                else:
+                    result = self.agents[agent_name](paper_text)
             
             logger.info(f"{agent_name} agent completed successfully")
             return result
             
         except Exception as e:
             logger.error(f"{agent_name} agent failed: {e}")
-            return {"error": str(e)}
+            return self._error_result(agent_name, e)
+    
+    async def run_agent_async(self, agent_name: str, paper_text: str, authors_text: str = "") -> Dict[str, Any]:
+        """Run a single agent on the event loop"""
+        if agent_name not in self.async_agents:
+            # Claude fallbacks only have a sync implementation
+            return await asyncio.to_thread(self.run_agent, agent_name, paper_text, authors_text)
+        
+        try:
+            logger.info(f"Running {agent_name} agent (async)")
+            
+            with usage_label(agent_name), deadline(self._agent_deadline(agent_name)):
+                if agent_name == 'team':
+                    result = await self.async_agents[agent_name](authors_text or paper_text, paper_text)
+                else:
+                    result = await self.async_agents[agent_name](paper_text)
+            
+            logger.info(f"{agent_name} agent completed successfully")
+            return result
+            
+        except Exception as e:
+            logger.error(f"{agent_name} agent failed: {e}")
+            return self._error_result(agent_name, e)
+    
+    def _error_result(self, agent_name: str, error: Exception) -> Dict[str, Any]:
+        """An agent's result when it raised; never a score, so it is neither stored nor counted"""
+        if isinstance(error, RequestCancelled):
+            return {"error": "Request cancelled", "agent": agent_name, "status": "cancelled"}
+        if isinstance(error, RateLimitExhausted):
+            return {"error": str(error), "agent": agent_name, "status": "failed"}
+        if isinstance(error, TimeoutError):
+            # DeadlineExceeded from inside the agent, or the orchestrator giving up waiting for it
+            return {"error": "Agent deadline exceeded", "agent": agent_name, "status": "timed_out"}
+        return {"error": str(error)}
+    
+    def _agent_deadline(self, agent_name: str) -> float:
+        return AGENT_DEADLINES.get(agent_name, AGENT_DEADLINE_SECONDS)
+    
+    def _collect_timeout(self, agents: List[str]) -> float:
+        """How long to wait for a set of agents before reporting the stragglers as failed"""
+        return max((self._agent_deadline(agent_name) for agent_name in agents), default=AGENT_DEADLINE_SECONDS) + DEADLINE_GRACE_SECONDS
+    
+    def _fused_agents(self, valid_agents: List[str], mode: str) -> List[str]:
+        """Agents that the fused request should cover for this run"""
+        if mode != "fused" or not FUSED_AVAILABLE:
+            return []
+        return [agent for agent in valid_agents if agent in FUSED_AGENTS]
     
-    def run_analysis(self, paper_text: str, authors_text: str = "", agents_to_run: Optional[List[str]] = None) -> Dict[str, Any]:
-        """Run analysis using parallel execution"""
+    def _should_prime_prefix(self, valid_agents: List[str], mode: str) -> bool:
+        """Priming only pays off when several agents will read the cached paper"""
+        return mode == "shared_prefix" and CLAUDE_AVAILABLE and len(valid_agents) > 1
+    
+    def _reuse_results(self, paper_text: str, authors_text: str, agents: List[str]) -> Dict[str, Any]:
+        """Stored results of `agents` for this paper, where the stored agent version is still current"""
+        store = get_result_store() if RESULT_STORE_AVAILABLE else None
+        if store is None:
+            return {}
+        reused = {}
+        for agent_name in agents:
+            if agent_name not in self.async_agents:
+                # Claude fallbacks for missing agent modules are not versioned
+                continue
+            result = store.get(agent_input_hash(agent_name, paper_text, authors_text), agent_name, agent_version(agent_name))
+            if result is not None:
+                reused[agent_name] = result
+        if reused:
+            logger.info(f"Reusing stored results for {list(reused)}")
+        return reused
+    
+    def _store_results(self, paper_text: str, authors_text: str, results: Dict[str, Any], agents: List[str]) -> None:
+        """Keep freshly computed agent results for later runs; errors (failed, timed out, cancelled) and heuristic fallbacks are not kept"""
+        store = get_result_store() if RESULT_STORE_AVAILABLE else None
+        if store is None or is_cancelled():
+            # After a cancellation the results may be stand-ins for calls that were never made
+            return
+        for agent_name in agents:
+            result = results.get(agent_name)
+            if agent_name in self.async_agents and not is_fallback_result(agent_name, result):
+                store.put(agent_input_hash(agent_name, paper_text, authors_text), agent_name, agent_version(agent_name), result)
+    
+    def _progress_event(self, agent_name: str, result: Any, seconds: float, completed: int, total: int) -> Dict[str, Any]:
+        return {
+            "type": "agent_progress",
+            "agent": agent_name,
+            "duration_s": round(seconds, 3),
+            "result": result,
+            "completed": completed,
+            "total": total,
+        }
+    
+    def _report_progress(self, on_progress: Optional[ProgressCallback], event: Dict[str, Any]) -> None:
+        """Call a synchronous progress callback; a failing callback never fails the analysis"""
+        if on_progress is None:
+            return
+        try:
+            on_progress(event)
+        except Exception as e:
+            logger.warning(f"Progress callback failed for {event.get('agent')}: {e}")
+    
+    async def _report_progress_async(self, on_progress: Optional[ProgressCallback], event: Dict[str, Any]) -> None:
+        """Call a progress callback from the event loop, awaiting it if it is a coroutine function"""
+        if on_progress is None:
+            return
+        try:
+            outcome = on_progress(event)
+            if inspect.isawaitable(outcome):
+                await outcome
+        except Exception as e:
+            logger.warning(f"Progress callback failed for {event.get('agent')}: {e}")
+    
+    def _run_agent_timed(self, agent_name: str, paper_text: str, authors_text: str):
+        start = time.perf_counter()
+        result = self.run_agent(agent_name, paper_text, authors_text)
+        return result, time.perf_counter() - start
+    
+    def run_analysis(self, paper_text: str, authors_text: str = "", agents_to_run: Optional[List[str]] = None, mode: Optional[str] = None,
+                     on_progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """
+        Run analysis using parallel execution (or one fused request in fused mode).
+        on_progress(event) is called with an "agent_progress" event (agent, duration_s,
+        result, completed, total) as each agent finishes.
+        """
         try:
             logger.info("Starting simple orchestrated analysis")
+            mode = mode or self.analysis_mode
             
             if agents_to_run is None:
                 agents_to_run = list(self.agents.keys())
@@ -138,39 +334,340 @@ class SimpleOrchestrator:
             if not valid_agents:
                 return {"error": "No valid agents specified"}
             
-            results = {}
+            total = len(valid_agents)
+            # Agents already run on this paper by their current version are not run again
+            results = self._reuse_results(paper_text, authors_text, valid_agents)
+            reused_agents = list(results)
+            for completed, agent_name in enumerate(reused_agents, 1):
+                self._report_progress(on_progress, self._progress_event(agent_name, results[agent_name], 0.0, completed, total))
+            valid_agents = [agent for agent in valid_agents if agent not in results]
             
-            # Run agents in parallel using ThreadPoolExecutor
-            with ThreadPoolExecutor(max_workers=min(len(valid_agents), 6)) as executor:
-                # Submit all tasks
-                future_to_agent = {}
-                for agent_name in valid_agents:
-                    future = executor.submit(self.run_agent, agent_name, paper_text, authors_text)
-                    future_to_agent[future] = agent_name
-                
-                # Collect results as they complete
-                for future in as_completed(future_to_agent):
-                    agent_name = future_to_agent[future]
+            with track_usage() as usage, shared_prefix_mode(mode == "shared_prefix"), analysis_artifacts():
+                fused_agents = self._fused_agents(valid_agents, mode)
+                if fused_agents:
+                    logger.info(f"Running fused analysis for {fused_agents}")
+                    start = time.perf_counter()
                     try:
-                        result = future.result()
-                        results[agent_name] = result
+                        with usage_label("fused"), deadline(AGENT_DEADLINE_SECONDS):
+                            results.update(evaluate_all_criteria(paper_text, authors_text, fused_agents))
                     except Exception as e:
-                        logger.error(f"Agent {agent_name} failed with exception: {e}")
-                        results[agent_name] = {"error": str(e)}
-            
-            # Calculate comprehensive 100-point score using the new scoring system
-            if SCORER_AVAILABLE:
+                        logger.error(f"Fused analysis failed: {e}")
+                        results.update({agent_name: self._error_result(agent_name, e) for agent_name in fused_agents})
+                    seconds = time.perf_counter() - start
+                    for completed, agent_name in enumerate(fused_agents, len(reused_agents) + 1):
+                        self._report_progress(on_progress, self._progress_event(agent_name, results.get(agent_name), seconds, completed, total))
+                    valid_agents = [agent for agent in valid_agents if agent not in fused_agents]
+                
+                if self._should_prime_prefix(valid_agents, mode):
+                    with usage_label("prime"):
+                        prime_shared_prefix(paper_text)
+                
+                # Run agents in parallel using ThreadPoolExecutor
+                executor = ThreadPoolExecutor(max_workers=max(1, min(len(valid_agents), 6)))
                 try:
-                    comprehensive_results = calculate_comprehensive_score(paper_text, authors_text, results)
-                    results.update(comprehensive_results)
-                    logger.info(f"Comprehensive scoring completed: {comprehensive_results['comprehensive_score']}/100")
-                except Exception as e:
-                    logger.error(f"Comprehensive scoring failed: {e}")
-                    # Fallback to simple scoring
-                    self._add_fallback_scoring(results)
+                    # Submit all tasks; each gets a copy of the context so usage tracking
+                    # and the prompt mode reach the worker threads
+                    future_to_agent = {}
+                    for agent_name in valid_agents:
+                        future = executor.submit(contextvars.copy_context().run, self._run_agent_timed, agent_name, paper_text, authors_text)
+                        future_to_agent[future] = agent_name
+                    
+                    # Collect results as they complete; agents past their deadline are not waited for
+                    started = time.perf_counter()
+                    try:
+                        for future in as_completed(future_to_agent, timeout=self._collect_timeout(valid_agents)):
+                            agent_name = future_to_agent[future]
+                            try:
+                                result, seconds = future.result()
+                                results[agent_name] = result
+                            except Exception as e:
+                                logger.error(f"Agent {agent_name} failed with exception: {e}")
+                                results[agent_name] = self._error_result(agent_name, e)
+                                seconds = time.perf_counter() - started
+                            self._report_progress(on_progress, self._progress_event(agent_name, results[agent_name], seconds, len(results), total))
+                    except FuturesTimeoutError as e:
+                        for future, agent_name in future_to_agent.items():
+                            if not future.done():
+                                logger.error(f"Agent {agent_name} missed its deadline")
+                                results[agent_name] = self._error_result(agent_name, e)
+                                self._report_progress(on_progress, self._progress_event(agent_name, results[agent_name], time.perf_counter() - started, len(results), total))
+                finally:
+                    executor.shutdown(wait=False, cancel_futures=True)
+            
+            # Fused results come from a different prompt than the agents' own, so only split runs are stored
+            self._store_results(paper_text, authors_text, results, valid_agents)
+            self._add_scores(paper_text, authors_text, results)
+            results['llm_usage'] = usage
+            results['reused_agents'] = reused_agents
+            
+            logger.info(f"Analysis completed with unicorn potential score: {results.get('unicorn_potential_score', 0)}")
+            return results
+            
+        except Exception as e:
+            logger.error(f"Simple orchestration failed: {e}")
+            return {"error": f"Orchestration failed: {str(e)}"}
+    
+    async def _run_agent_guarded(self, agent_name: str, paper_text: str, authors_text: str) -> Dict[str, Any]:
+        """Run one agent under its deadline; failures become the agent's error result"""
+        try:
+            return await asyncio.wait_for(self.run_agent_async(agent_name, paper_text, authors_text), self._collect_timeout([agent_name]))
+        except asyncio.TimeoutError as e:
+            logger.error(f"Agent {agent_name} missed its deadline")
+            return self._error_result(agent_name, e)
+        except Exception as e:
+            logger.error(f"Agent {agent_name} failed with exception: {e}")
+            return self._error_result(agent_name, e)
+    
+    def _build_analysis_dag(self, paper_text: str, authors_text: str, valid_agents: List[str], mode: str,
+                            reused: Optional[Dict[str, Any]] = None) -> DAG:
+        """
+        Nodes: shared artifacts ("sections", "paper_embedding"), optional "prime" and
+        "fused" requests, one "agent:<name>" per agent to run, one "score:<category>"
+        per scoring category (fed by its agent only, or by the reused result) and the
+        final "score" total.
+        """
+        reused = reused or {}
+        dag = DAG()
+        dag.add("sections", lambda: shared_artifact("sections", paper_text, lambda: split_sections(paper_text)), in_thread=False)
+        # The embedding only feeds SearchVentures searches; without the index nobody would use it
+        if (EMBEDDING_AVAILABLE and searchventures_index_usable()
+                and any("paper_embedding" in AGENT_INPUTS.get(agent_name, ()) for agent_name in valid_agents)):
+            dag.add("paper_embedding", lambda: self._paper_embedding(paper_text))
+        
+        fused_agents = self._fused_agents(valid_agents, mode)
+        if fused_agents:
+            async def run_fused(sections):
+                logger.info(f"Running fused analysis for {fused_agents}")
+                with usage_label("fused"), deadline(AGENT_DEADLINE_SECONDS):
+                    return await evaluate_all_criteria_async(paper_text, authors_text, fused_agents)
+            dag.add("fused", run_fused, ["sections"])
+        split_agents = [agent_name for agent_name in valid_agents if agent_name not in fused_agents]
+        
+        prime = []
+        if self._should_prime_prefix(split_agents, mode):
+            async def run_prime(sections):
+                with usage_label("prime"):
+                    await prime_shared_prefix_async(paper_text)
+            dag.add("prime", run_prime, ["sections"])
+            prime = ["prime"]
+        
+        for agent_name in split_agents:
+            async def run_agent(*artifacts, agent_name=agent_name):
+                return await self._run_agent_guarded(agent_name, paper_text, authors_text)
+            inputs = [name for name in AGENT_INPUTS.get(agent_name, ("sections",)) if name in dag]
+            dag.add(f"agent:{agent_name}", run_agent, inputs + prime)
+        
+        if SCORER_AVAILABLE:
+            for category, agent_name in CATEGORY_AGENTS.items():
+                if agent_name in fused_agents:
+                    inputs = ["fused"]
+                    score = lambda fused, category=category: comprehensive_scorer.score_category(category, paper_text, authors_text, fused)
+                elif agent_name in split_agents:
+                    inputs = [f"agent:{agent_name}"]
+                    score = lambda result, category=category, agent_name=agent_name: comprehensive_scorer.score_category(
+                        category, paper_text, authors_text, {agent_name: result})
+                else:
+                    # Reused results are ready now; a category without an agent in this run is scored from an empty result
+                    inputs = []
+                    agent_results = {agent_name: reused[agent_name]} if agent_name in reused else {}
+                    score = lambda category=category, agent_results=agent_results: comprehensive_scorer.score_category(
+                        category, paper_text, authors_text, agent_results)
+                dag.add(f"score:{category}", score, inputs, in_thread=False)
+            categories = list(CATEGORY_AGENTS)
+            dag.add("score", lambda *scores: comprehensive_scorer.combine_category_scores(dict(zip(categories, scores))),
+                    [f"score:{category}" for category in categories], in_thread=False)
+        return dag
+    
+    def _paper_embedding(self, paper_text: str) -> Any:
+        try:
+            return embed_query(paper_text)
+        except Exception as e:
+            # Agents compute it themselves if they still need it
+            logger.warning(f"Paper embedding failed: {e}")
+            return None
+    
+    async def run_analysis_async(self, paper_text: str, authors_text: str = "", agents_to_run: Optional[List[str]] = None, mode: Optional[str] = None,
+                                 on_progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """
+        Run analysis as a dependency graph on the event loop (see _build_analysis_dag):
+        shared artifacts are computed once, each category is scored as soon as its
+        agent finishes, and per-node timings are returned under "timings".
+        on_progress may be a plain function or a coroutine function; see run_analysis.
+        """
+        try:
+            logger.info("Starting simple orchestrated analysis (async)")
+            mode = mode or self.analysis_mode
+            
+            if agents_to_run is None:
+                agents_to_run = list(self.agents.keys())
+            
+            valid_agents = [agent for agent in agents_to_run if agent in self.agents]
+            if not valid_agents:
+                return {"error": "No valid agents specified"}
+            
+            total = len(valid_agents)
+            # Agents already run on this paper by their current version are not run again
+            results = await asyncio.to_thread(self._reuse_results, paper_text, authors_text, valid_agents)
+            reused = dict(results)
+            for completed, agent_name in enumerate(reused, 1):
+                await self._report_progress_async(on_progress, self._progress_event(agent_name, results[agent_name], 0.0, completed, total))
+            valid_agents = [agent for agent in valid_agents if agent not in reused]
+            
+            async def on_node_done(name: str, output: Any, timing: Dict[str, Any]) -> None:
+                # Agents are reported as soon as they finish, while the rest of the graph runs on
+                if name == "fused":
+                    for agent_name in valid_agents:
+                        if agent_name in output:
+                            results[agent_name] = output[agent_name]
+                            await self._report_progress_async(on_progress, self._progress_event(agent_name, output[agent_name], timing["duration_s"], len(results), total))
+                elif name.startswith("agent:"):
+                    agent_name = name.split(":", 1)[1]
+                    results[agent_name] = output
+                    await self._report_progress_async(on_progress, self._progress_event(agent_name, output, timing["duration_s"], len(results), total))
+            
+            with track_usage() as usage, shared_prefix_mode(mode == "shared_prefix"), analysis_artifacts():
+                dag = self._build_analysis_dag(paper_text, authors_text, valid_agents, mode, reused)
+                run = await dag.run(on_node_done)
+            
+            for agent_name in valid_agents:
+                if agent_name not in results:
+                    # Only possible when the fused request itself failed
+                    results[agent_name] = {"error": run.errors.get("fused", "Agent did not run")}
+            
+            # Fused results come from a different prompt than the agents' own, so only split runs are stored
+            fused_agents = self._fused_agents(valid_agents, mode)
+            await asyncio.to_thread(self._store_results, paper_text, authors_text, results,
+                                    [agent_name for agent_name in valid_agents if agent_name not in fused_agents])
+            if "score" in run.outputs:
+                results.update(run.outputs["score"])
+                logger.info(f"Comprehensive scoring completed: {results['comprehensive_score']}/100")
             else:
-                logger.warning("Comprehensive scorer not available, using fallback scoring")
+                if SCORER_AVAILABLE:
+                    logger.error(f"Comprehensive scoring failed: {run.errors.get('score')}")
                 self._add_fallback_scoring(results)
+            results['llm_usage'] = usage
+            results['reused_agents'] = list(reused)
+            results['timings'] = run.stats()
+            
+            logger.info(f"Analysis completed with unicorn potential score: {results.get('unicorn_potential_score', 0)}")
+            return results
+            
+        except Exception as e:
+            logger.error(f"Simple orchestration failed: {e}")
+            return {"error": f"Orchestration failed: {str(e)}"}
+    
+    async def stream_agent_async(self, agent_name: str, paper_text: str, authors_text: str, on_event: Callable[[Dict[str, Any]], Awaitable[None]]) -> Dict[str, Any]:
+        """Run one agent with a streamed completion, reporting each JSON field as it closes"""
+        if not STREAMING_AVAILABLE or agent_name not in AGENT_NAMES or agent_name not in self.async_agents:
+            result = await self.run_agent_async(agent_name, paper_text, authors_text)
+            await on_event({"type": "agent_complete", "agent": agent_name, "result": result})
+            return result
+        
+        try:
+            logger.info(f"Running {agent_name} agent (streaming)")
+            prefix, prompt, max_tokens = build_agent_request(agent_name, paper_text, authors_text)
+            parser = IncrementalJSONParser()
+            chunks = []
+            with usage_label(agent_name), deadline(self._agent_deadline(agent_name)):
+                async for chunk in claude_stream_async(prompt, max_tokens=max_tokens, prefix=prefix):
+                    chunks.append(chunk)
+                    for field, value in parser.feed(chunk):
+                        await on_event({"type": "agent_partial", "agent": agent_name, "field": field, "value": value})
+            # Fallbacks and the competitor lookup do blocking I/O
+            result = await asyncio.to_thread(finalize_agent_output, agent_name, "".join(chunks), paper_text, authors_text)
+        except Exception as e:
+            logger.error(f"{agent_name} agent failed: {e}")
+            result = self._error_result(agent_name, e)
+        
+        await on_event({"type": "agent_complete", "agent": agent_name, "result": result})
+        return result
+    
+    async def _stream_fused_async(self, paper_text: str, authors_text: str, fused_agents: List[str], on_event: Callable[[Dict[str, Any]], Awaitable[None]]) -> Dict[str, Any]:
+        """Stream the fused request; each agent's section completes as soon as it closes"""
+        parser = IncrementalJSONParser()
+        chunks = []
+        results = {}
+        with usage_label("fused"), deadline(AGENT_DEADLINE_SECONDS):
+            async for chunk in claude_stream_async(build_fused_prompt(paper_text, authors_text, fused_agents), max_tokens=FUSED_MAX_TOKENS):
+                chunks.append(chunk)
+                for agent_name, section in parser.feed(chunk):
+                    if agent_name not in fused_agents or agent_name in results:
+                        continue
+                    section_output = json.dumps({agent_name: section})
+                    results[agent_name] = (await asyncio.to_thread(parse_fused_output, section_output, paper_text, [agent_name]))[agent_name]
+                    await on_event({"type": "agent_complete", "agent": agent_name, "result": results[agent_name]})
+        
+        missing = [agent_name for agent_name in fused_agents if agent_name not in results]
+        if missing:
+            # Sections that never closed (truncated output) get the usual per-section fallback
+            remaining = await asyncio.to_thread(parse_fused_output, "".join(chunks), paper_text, missing)
+            for agent_name in missing:
+                results[agent_name] = remaining[agent_name]
+                await on_event({"type": "agent_complete", "agent": agent_name, "result": results[agent_name]})
+        return results
+    
+    async def stream_analysis_async(self, paper_text: str, authors_text: str = "", on_event: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None, agents_to_run: Optional[List[str]] = None, mode: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Like run_analysis_async, but streams the completions and awaits
+        on_event({"type": "agent_partial" | "agent_complete", ...}) as fields and agents finish.
+        Returns the same final results.
+        """
+        async def _ignore(event: Dict[str, Any]) -> None:
+            return None
+        on_event = on_event or _ignore
+        
+        try:
+            logger.info("Starting simple orchestrated analysis (streaming)")
+            mode = mode or self.analysis_mode
+            
+            if agents_to_run is None:
+                agents_to_run = list(self.agents.keys())
+            
+            valid_agents = [agent for agent in agents_to_run if agent in self.agents]
+            if not valid_agents:
+                return {"error": "No valid agents specified"}
+            
+            # Agents already run on this paper by their current version are not run again
+            results = await asyncio.to_thread(self._reuse_results, paper_text, authors_text, valid_agents)
+            reused_agents = list(results)
+            for agent_name in reused_agents:
+                await on_event({"type": "agent_complete", "agent": agent_name, "result": results[agent_name], "reused": True})
+            valid_agents = [agent for agent in valid_agents if agent not in results]
+            
+            with track_usage() as usage, shared_prefix_mode(mode == "shared_prefix"), analysis_artifacts():
+                fused_agents = self._fused_agents(valid_agents, mode) if STREAMING_AVAILABLE else []
+                tasks = [self.stream_agent_async(agent_name, paper_text, authors_text, on_event)
+                         for agent_name in valid_agents if agent_name not in fused_agents]
+                valid_agents = [agent for agent in valid_agents if agent not in fused_agents]
+                
+                if self._should_prime_prefix(valid_agents, mode):
+                    with usage_label("prime"):
+                        await prime_shared_prefix_async(paper_text)
+                
+                if fused_agents:
+                    logger.info(f"Streaming fused analysis for {fused_agents}")
+                    tasks.append(self._stream_fused_async(paper_text, authors_text, fused_agents, on_event))
+                
+                outputs = await asyncio.gather(*tasks, return_exceptions=True)
+            
+            if fused_agents:
+                fused_output = outputs.pop()
+                if isinstance(fused_output, BaseException):
+                    logger.error(f"Fused streaming failed with exception: {fused_output}")
+                    fused_output = {agent_name: self._error_result(agent_name, fused_output) for agent_name in fused_agents}
+                results.update(fused_output)
+            
+            for agent_name, output in zip(valid_agents, outputs):
+                if isinstance(output, BaseException):
+                    logger.error(f"Agent {agent_name} failed with exception: {output}")
+                    results[agent_name] = self._error_result(agent_name, output)
+                else:
+                    results[agent_name] = output
+            
+            await asyncio.to_thread(self._store_results, paper_text, authors_text, results, valid_agents)
+            self._add_scores(paper_text, authors_text, results)
+            results['llm_usage'] = usage
+            results['reused_agents'] = reused_agents
             
             logger.info(f"Analysis completed with unicorn potential score: {results.get('unicorn_potential_score', 0)}")
             return results
@@ -179,6 +676,85 @@ class SimpleOrchestrator:
             logger.error(f"Simple orchestration failed: {e}")
             return {"error": f"Orchestration failed: {str(e)}"}
     
+    async def run_analysis_coalesced(self, paper_text: str, authors_text: str = "", agents_to_run: Optional[List[str]] = None,
+                                     mode: Optional[str] = None, on_progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+        """run_analysis_async, shared with identical analyses (same paper, authors, agents, mode) already in flight"""
+        key = analysis_key("analysis", paper_text, authors_text, agents_to_run, mode)
+        return await get_analysis_flights().do(
+            key, lambda emit: self.run_analysis_async(paper_text, authors_text, agents_to_run, mode, emit), on_progress
+        )
+    
+    async def stream_analysis_coalesced(self, paper_text: str, authors_text: str = "", on_event: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+                                        agents_to_run: Optional[List[str]] = None, mode: Optional[str] = None) -> Dict[str, Any]:
+        """stream_analysis_async, shared with identical streamed analyses already in flight"""
+        key = analysis_key("stream", paper_text, authors_text, agents_to_run, mode)
+        return await get_analysis_flights().do(
+            key, lambda emit: self.stream_analysis_async(paper_text, authors_text, emit, agents_to_run, mode), on_event
+        )
+    
+    async def analyze_batch_async(self, papers: List[Dict[str, str]], agents_to_run: Optional[List[str]] = None, mode: Optional[str] = None,
+                                  max_concurrent_papers: int = BATCH_MAX_CONCURRENT_PAPERS) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Analyse many papers ({"text", "authors"}) and yield (index, results) as each paper finishes.
+        Up to max_concurrent_papers papers run at once and all their agent calls share the
+        process-wide LLM limiter, so papers x agents interleave without oversubscribing it.
+        The window keeps early papers from waiting behind the rest of the batch.
+        The competitor searches of the next EMBED_BATCH_SIZE papers are encoded and run
+        as one batch (see faiss_utils.SearchPrefetch) before those papers start.
+        """
+        window = max(1, max_concurrent_papers)
+        pending: Dict[asyncio.Task, int] = {}
+        next_index = 0
+        searches = EMBEDDING_AVAILABLE and (not agents_to_run or bool({"market", "tech_ip"} & set(agents_to_run)))
+        prefetch = None
+        prefetched = 0
+        
+        async def run_paper(paper):
+            with prefetched_searches(prefetch):
+                return await self.run_analysis_coalesced(paper.get("text", ""), paper.get("authors", ""), agents_to_run, mode)
+        
+        try:
+            while next_index < len(papers) or pending:
+                if searches and next_index < len(papers) and next_index >= prefetched:
+                    chunk = [paper.get("text", "") for paper in papers[next_index:next_index + max(window, EMBED_BATCH_SIZE)]]
+                    if prefetch is None:
+                        prefetch = await asyncio.to_thread(prefetch_searchventures, chunk)
+                        searches = prefetch is not None
+                    else:
+                        await asyncio.to_thread(prefetch.add, chunk)
+                    prefetched = next_index + len(chunk)
+                while next_index < len(papers) and len(pending) < window:
+                    paper = papers[next_index]
+                    task = asyncio.create_task(run_paper(paper))
+                    pending[task] = next_index
+                    next_index += 1
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    index = pending.pop(task)
+                    try:
+                        yield index, task.result()
+                    except Exception as e:
+                        yield index, {"error": f"Orchestration failed: {str(e)}"}
+        finally:
+            # The consumer went away (e.g. client disconnected): stop the papers still running
+            for task in pending:
+                task.cancel()
+    
+    def _add_scores(self, paper_text: str, authors_text: str, results: Dict[str, Any]) -> None:
+        """Calculate comprehensive 100-point score using the new scoring system"""
+        if SCORER_AVAILABLE:
+            try:
+                comprehensive_results = calculate_comprehensive_score(paper_text, authors_text, results)
+                results.update(comprehensive_results)
+                logger.info(f"Comprehensive scoring completed: {comprehensive_results['comprehensive_score']}/100")
+            except Exception as e:
+                logger.error(f"Comprehensive scoring failed: {e}")
+                # Fallback to simple scoring
+                self._add_fallback_scoring(results)
+        else:
+            logger.warning("Comprehensive scorer not available, using fallback scoring")
+            self._add_fallback_scoring(results)
+    
     def _add_fallback_scoring(self, results: Dict[str, Any]) -> None:
         """Add fallback scoring when comprehensive scorer is not available"""
         score_keys = ['tech_ip', 'market', 'team', 'scaling', 'funding', 'impact']
@@ -317,6 +893,20 @@ class SimpleOrchestrator:
 # Global orchestrator instance
 orchestrator = SimpleOrchestrator()
 
-def run_simple_analysis(paper_text: str, authors_text: str = "", agents_to_run: Optional[List[str]] = None) -> Dict[str, Any]:
+def run_simple_analysis(paper_text: str, authors_text: str = "", agents_to_run: Optional[List[str]] = None, mode: Optional[str] = None,
+                        on_progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
     """Convenience function to run simple analysis"""
-    return orchestrator.run_analysis(paper_text, authors_text, agents_to_run)
+    return orchestrator.run_analysis(paper_text, authors_text, agents_to_run, mode, on_progress)
+
+async def run_simple_analysis_async(paper_text: str, authors_text: str = "", agents_to_run: Optional[List[str]] = None, mode: Optional[str] = None,
+                                    on_progress: Optional[ProgressCallback] = None) -> Dict[str, Any]:
+    """Convenience function to run simple analysis on the event loop; identical concurrent requests share one run"""
+    return await orchestrator.run_analysis_coalesced(paper_text, authors_text, agents_to_run, mode, on_progress)
+
+def analyze_simple_batch(papers: List[Dict[str, str]], agents_to_run: Optional[List[str]] = None, mode: Optional[str] = None) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """Convenience function for batch analysis, see SimpleOrchestrator.analyze_batch_async"""
+    return orchestrator.analyze_batch_async(papers, agents_to_run, mode)
+
+async def stream_simple_analysis(paper_text: str, authors_text: str = "", on_event: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None, agents_to_run: Optional[List[str]] = None, mode: Optional[str] = None) -> Dict[str, Any]:
+    """Convenience function to run a streaming analysis, see SimpleOrchestrator.stream_analysis_async; identical concurrent requests share one run"""
+    return await orchestrator.stream_analysis_coalesced(paper_text, authors_text, on_event, agents_to_run, mode)
@@ -0,0 +1,71 @@
+"""
+Per-analysis shared artifacts.
+Several agents derive the same things from the paper (its sections, its
+sentence embedding, LogicMill patent similarity). Inside analysis_artifacts()
+each artifact is computed at most once and reused by every agent of that
+analysis, whether it was produced up front by the DAG executor or on demand by
+the first agent that needed it.
+"""
+
+import contextvars
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional, Tuple
+
+_STORE = contextvars.ContextVar("analysis_artifacts", default=None)
+
+
+class ArtifactStore:
+    """Thread-safe memo of artifacts, each keyed by name and the text it was derived from"""
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[str, Any]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.computed = 0
+
+    def get(self, name: str, text: str) -> Tuple[bool, Any]:
+        entry = self._values.get(name)
+        if entry is not None and (entry[0] is text or entry[0] == text):
+            return True, entry[1]
+        return False, None
+
+    def get_or_compute(self, name: str, text: str, compute: Callable[[], Any]) -> Any:
+        """Return the stored artifact, or compute it once; concurrent callers wait for the first"""
+        found, value = self.get(name, text)
+        if not found:
+            with self._lock:
+                lock = self._locks.setdefault(name, threading.Lock())
+            with lock:
+                found, value = self.get(name, text)
+                if not found:
+                    value = compute()
+                    self._values[name] = (text, value)
+                    self.computed += 1
+                    return value
+        self.hits += 1
+        return value
+
+
+@contextmanager
+def analysis_artifacts():
+    """Share artifacts between everything run inside this block (threads and tasks started from it included)"""
+    store = ArtifactStore()
+    token = _STORE.set(store)
+    try:
+        yield store
+    finally:
+        _STORE.reset(token)
+
+
+def current_artifacts() -> Optional[ArtifactStore]:
+    return _STORE.get()
+
+
+def shared_artifact(name: str, text: str, compute: Callable[[], Any]) -> Any:
+    """compute() memoized for the current analysis; computed every time outside analysis_artifacts()"""
+    store = _STORE.get()
+    if store is None:
+        return compute()
+    return store.get_or_compute(name, text, compute)
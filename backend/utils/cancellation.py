@@ -0,0 +1,133 @@
+"""
+Cancellation of work whose client has gone away.
+A CancelToken is opened per WebSocket connection or HTTP request and carried in
+a context variable, like the deadline (see deadlines.py), through the
+orchestrator and agent threads into claude_ask and LogicMill. Once the client
+disconnects the token is cancelled: queued Claude requests leave the scheduler
+and free their place, pacing and retry waits end, streams are closed, and calls
+that were not sent yet are not sent. Coroutines are also cancelled by their
+caller, which aborts in-flight async requests; a blocking request already in
+flight in a worker thread runs to completion and its result is dropped.
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+_TOKEN = contextvars.ContextVar("cancel_token", default=None)
+
+_STATS_LOCK = threading.Lock()
+_STATS = {
+    "tokens_cancelled": 0,
+    # Work that never ran because its token was already cancelled
+    "agents_skipped": 0,
+    "claude_calls_aborted": 0,
+    "logicmill_calls_aborted": 0,
+    # Requests cut off while in flight (async requests, sync streams)
+    "claude_calls_interrupted": 0,
+}
+
+
+class RequestCancelled(Exception):
+    """The client the work was for has disconnected"""
+
+
+class CancelToken:
+    """Thread-safe, one-shot cancellation flag with callbacks"""
+
+    def __init__(self):
+        self.reason: Optional[str] = None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], Any]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "client disconnected") -> bool:
+        """Cancel the token and run its callbacks; False if it was already cancelled"""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        _record("tokens_cancelled")
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+        return True
+
+    def add_callback(self, callback: Callable[[], Any]) -> Callable[[], None]:
+        """Call `callback` on cancellation (right away if already cancelled); returns a remover"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        callback()
+        return lambda: None
+
+    def _remove(self, callback: Callable[[], Any]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block for up to `timeout` seconds; True if the token was cancelled"""
+        return self._event.wait(timeout)
+
+
+@contextmanager
+def cancellation_scope(token: CancelToken):
+    """Run the block (and threads/tasks started from it) under `token`"""
+    ctx_token = _TOKEN.set(token)
+    try:
+        yield token
+    finally:
+        _TOKEN.reset(ctx_token)
+
+
+def current_token() -> Optional[CancelToken]:
+    return _TOKEN.get()
+
+
+def is_cancelled() -> bool:
+    token = _TOKEN.get()
+    return token is not None and token.cancelled
+
+
+def abort_if_cancelled(counter: Optional[str] = None) -> None:
+    """Raise RequestCancelled if the current token is cancelled, counting the aborted work under `counter`"""
+    token = _TOKEN.get()
+    if token is not None and token.cancelled:
+        if counter:
+            _record(counter)
+        raise RequestCancelled(token.reason)
+
+
+def cancellable_sleep(seconds: float) -> None:
+    """time.sleep that ends early with RequestCancelled when the current token is cancelled"""
+    token = _TOKEN.get()
+    if token is None:
+        time.sleep(seconds)
+    elif token.wait(seconds):
+        raise RequestCancelled(token.reason)
+
+
+def record_cancelled(counter: str) -> None:
+    _record(counter)
+
+
+def _record(counter: str) -> None:
+    with _STATS_LOCK:
+        _STATS[counter] += 1
+
+
+def get_cancellation_stats() -> Dict[str, int]:
+    with _STATS_LOCK:
+        return dict(_STATS)
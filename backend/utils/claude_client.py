@@ -1,52 +1,598 @@
 import os
-from anthropic import Anthropic
+import asyncio
+import contextvars
+import threading
+import time
+import weakref
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from anthropic import Anthropic, AsyncAnthropic
 from dotenv import load_dotenv
+from backend.config import CLAUDE_MAX_RETRIES, CLAUDE_TIMEOUT_SECONDS
+from backend.utils.cancellation import RequestCancelled, abort_if_cancelled, cancellable_sleep, is_cancelled, record_cancelled
+from backend.utils.deadlines import DeadlineExceeded, remaining, timeout_for
+from backend.utils.hedging import get_hedge_tracker
+from backend.utils.response_cache import get_response_cache, make_cache_key
+from backend.utils.rate_limiter import RATE_LIMIT_STATUS_CODES, RateLimitExhausted, get_rate_limiter, is_retryable, backoff_delay
 
 # Load environment variables
 load_dotenv()
 
 # Get API key from environment
 MAX_CLAUDE_TOKENS = 1000
+DEFAULT_MODEL = "claude-3-haiku-20240307"
+SYSTEM_PROMPT = "You are a SPRIND analyst evaluating research for unicorn potential. Respond with concise, accurate analysis."
 
-def get_claude_client():
-    """Get Claude client with current API key"""
+# Process-wide client registry. Each Anthropic client owns an HTTP connection
+# pool, so we build one per API key and base URL and reuse it for every request
+# instead of paying connection/TLS setup on each call. SDK retries are disabled
+# because retries go through the process-wide rate limiter (see _send_message).
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+# Async clients are bound to the event loop they were first used on.
+_ASYNC_CLIENTS = weakref.WeakKeyDictionary()
+
+# Runs hedged sync requests (primary + backup) so the caller can wait on both
+_HEDGE_POOL = ThreadPoolExecutor(max_workers=32, thread_name_prefix="claude-hedge")
+
+# Token usage reported by the API, summed over the process lifetime
+_USAGE_FIELDS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+_USAGE_LOCK = threading.Lock()
+_USAGE_TOTALS = {"requests": 0, "cached_responses": 0, **{field: 0 for field in _USAGE_FIELDS}}
+# Per-analysis usage, see track_usage()
+_USAGE_TRACKER = contextvars.ContextVar("claude_usage_tracker", default=None)
+# Name the tracked usage is broken down by (usually the agent), see usage_label()
+_USAGE_LABEL = contextvars.ContextVar("claude_usage_label", default=None)
+
+
+def _get_client_settings():
+    """(api_key, base_url) for the current environment, or None when no usable API key is set"""
     api_key = os.getenv("ANTHROPIC_API_KEY")
+    base_url = os.getenv("ANTHROPIC_BASE_URL") or None
     if not api_key or api_key == "test_key" or api_key == "your_claude_api_key_here":
+        if not base_url:
+            return None
+        # A local stand-in server (backend/mock_llm_server.py) accepts any key
+        api_key = api_key or "local"
+    return api_key, base_url
+
+
+def get_claude_client():
+    """Get the shared Claude client for the current API key and base URL"""
+    settings = _get_client_settings()
+    if not settings:
         return None
-    try:
-        return Anthropic(api_key=api_key)
-    except Exception:
+    client = _CLIENTS.get(settings)
+    if client is not None:
+        return client
+    api_key, base_url = settings
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(settings)
+        if client is None:
+            try:
+                client = Anthropic(api_key=api_key, base_url=base_url, max_retries=0)
+            except Exception:
+                return None
+            _CLIENTS[settings] = client
+        return client
+
+
+def get_async_claude_client():
+    """Get the shared async Claude client for the current API key, base URL and running event loop"""
+    settings = _get_client_settings()
+    if not settings:
         return None
+    api_key, base_url = settings
+    loop = asyncio.get_running_loop()
+    with _CLIENTS_LOCK:
+        clients = _ASYNC_CLIENTS.setdefault(loop, {})
+        client = clients.get(settings)
+        if client is None:
+            try:
+                client = AsyncAnthropic(api_key=api_key, base_url=base_url, max_retries=0)
+            except Exception:
+                return None
+            clients[settings] = client
+        return client
+
+
+def close_claude_clients():
+    """Close pooled sync clients (e.g. on application shutdown)"""
+    with _CLIENTS_LOCK:
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+    for client in clients:
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+def _empty_usage():
+    return {"requests": 0, "cached_responses": 0, **{field: 0 for field in _USAGE_FIELDS}}
+
+
+def _record_usage(response=None):
+    """Add a response's token usage (or a response-cache hit when None) to the counters"""
+    usage = getattr(response, "usage", None)
+    tracker = _USAGE_TRACKER.get()
+    label = _USAGE_LABEL.get()
+    with _USAGE_LOCK:
+        labelled = tracker["by_agent"].setdefault(label, _empty_usage()) if tracker is not None and label else None
+        for counters in (_USAGE_TOTALS, tracker, labelled):
+            if counters is None:
+                continue
+            if response is None:
+                counters["cached_responses"] += 1
+                continue
+            counters["requests"] += 1
+            if usage is not None:
+                for field in _USAGE_FIELDS:
+                    counters[field] += getattr(usage, field, 0) or 0
+
+
+@contextmanager
+def usage_label(name: str):
+    """Attribute tracked usage inside the block to `name` (reported under "by_agent")"""
+    token = _USAGE_LABEL.set(name)
+    try:
+        yield
+    finally:
+        _USAGE_LABEL.reset(token)
+
+
+@contextmanager
+def track_usage():
+    """
+    Collect token usage of every Claude call made inside the block, including
+    prompt-cache reads/writes, in total and per usage_label(). Threads must be
+    started with a copied context (contextvars.copy_context().run) to be counted.
+    """
+    usage = {**_empty_usage(), "by_agent": {}}
+    token = _USAGE_TRACKER.set(usage)
+    try:
+        yield usage
+    finally:
+        _USAGE_TRACKER.reset(token)
+
+
+def get_usage_totals():
+    """Snapshot of API token usage since start (or the last reset)"""
+    with _USAGE_LOCK:
+        return dict(_USAGE_TOTALS)
+
+
+def reset_usage_totals():
+    with _USAGE_LOCK:
+        for key in _USAGE_TOTALS:
+            _USAGE_TOTALS[key] = 0
+
+
+def _build_messages(prompt: str, prefix: str = ""):
+    if not prefix:
+        return [{"role": "user", "content": prompt}]
+    # The prefix is marked as a prompt-cache breakpoint; requests that share it
+    # (same system prompt + prefix) read it from the provider cache.
+    return [{
+        "role": "user",
+        "content": [
+            {"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": prompt}
+        ]
+    }]
+
+
+def build_message_params(prompt: str, max_tokens: int = MAX_CLAUDE_TOKENS, model: str = DEFAULT_MODEL, prefix: str = ""):
+    """Messages API request body sent by claude_ask (also used for batch requests)"""
+    return {
+        "model": model,
+        "max_tokens": max_tokens,
+        "system": SYSTEM_PROMPT,
+        "messages": _build_messages(prompt, prefix)
+    }
+
+
+def _estimate_input_tokens(params) -> int:
+    """Rough input size (~4 chars per token) used to pace requests before the real usage is known"""
+    chars = len(params["system"])
+    for message in params["messages"]:
+        content = message["content"]
+        chars += len(content) if isinstance(content, str) else sum(len(block["text"]) for block in content)
+    return chars // 4 + 1
+
+
+def _billed_input_tokens(response) -> int:
+    usage = getattr(response, "usage", None)
+    return (getattr(usage, "input_tokens", 0) or 0) + (getattr(usage, "cache_creation_input_tokens", 0) or 0)
+
+
+def _retry_delay(limiter, attempt: int, error: Exception, delay: float) -> float:
+    limiter.record_retry()
+    if getattr(error, "status_code", None) == 429:
+        # Every caller waits this out inside limiter.slot(), not just this one
+        limiter.pause(delay)
+        return 0.0
+    return delay
+
+
+def _give_up(attempt: int, error: Exception, delay: float) -> bool:
+    if attempt >= CLAUDE_MAX_RETRIES or not is_retryable(error):
+        return True
+    left = remaining()
+    return left is not None and delay >= left
+
+
+def _raise_given_up(attempt: int, error: Exception) -> None:
+    """
+    Called when giving up on `error`: a rate limit or overload becomes
+    RateLimitExhausted, a request cut off by the deadline DeadlineExceeded
+    """
+    if getattr(error, "status_code", None) in RATE_LIMIT_STATUS_CODES:
+        raise RateLimitExhausted(f"Claude still rate limited after {attempt + 1} attempts: {error}") from error
+    left = remaining()
+    if left is not None and left <= 0 and not isinstance(error, DeadlineExceeded):
+        raise DeadlineExceeded(f"deadline exceeded: {error}") from error
+
+
+def _send_message(claude_client, params):
+    """messages.create through the rate limiter, retrying rate limits and transient errors within the deadline"""
+    limiter = get_rate_limiter()
+    estimated = _estimate_input_tokens(params)
+    label = _USAGE_LABEL.get()
+    attempt = 0
+    while True:
+        abort_if_cancelled("claude_calls_aborted")
+        try:
+            with limiter.slot(estimated):
+                start = time.monotonic()
+                response = claude_client.messages.create(**params, timeout=timeout_for(CLAUDE_TIMEOUT_SECONDS))
+        except RequestCancelled:
+            record_cancelled("claude_calls_aborted")
+            raise
+        except Exception as e:
+            delay = backoff_delay(attempt, e)
+            if _give_up(attempt, e, delay):
+                _raise_given_up(attempt, e)
+                raise
+            cancellable_sleep(_retry_delay(limiter, attempt, e, delay))
+            attempt += 1
+            continue
+        if label:
+            get_hedge_tracker().record_request(label, time.monotonic() - start)
+        limiter.reconcile(estimated, _billed_input_tokens(response))
+        return response
+
+
+async def _send_message_async(claude_client, params):
+    limiter = get_rate_limiter()
+    estimated = _estimate_input_tokens(params)
+    label = _USAGE_LABEL.get()
+    attempt = 0
+    while True:
+        abort_if_cancelled("claude_calls_aborted")
+        try:
+            async with limiter.slot_async(estimated):
+                start = time.monotonic()
+                try:
+                    response = await claude_client.messages.create(**params, timeout=timeout_for(CLAUDE_TIMEOUT_SECONDS))
+                except asyncio.CancelledError:
+                    if is_cancelled():
+                        record_cancelled("claude_calls_interrupted")
+                    raise
+        except RequestCancelled:
+            record_cancelled("claude_calls_aborted")
+            raise
+        except Exception as e:
+            delay = backoff_delay(attempt, e)
+            if _give_up(attempt, e, delay):
+                _raise_given_up(attempt, e)
+                raise
+            await asyncio.sleep(_retry_delay(limiter, attempt, e, delay))
+            attempt += 1
+            continue
+        if label:
+            get_hedge_tracker().record_request(label, time.monotonic() - start)
+        limiter.reconcile(estimated, _billed_input_tokens(response))
+        return response
+
 
-def claude_ask(prompt: str, max_tokens: int = MAX_CLAUDE_TOKENS, model: str = "claude-3-haiku-20240307"):
+def _send_hedged(claude_client, params):
+    """
+    _send_message, plus a backup request once the primary outlives the agent's
+    latency percentile (see utils/hedging.py). The first response wins; the
+    loser cannot be cancelled and finishes in the background.
+    """
+    tracker = get_hedge_tracker()
+    label = _USAGE_LABEL.get()
+    hedge_after = None if get_rate_limiter().saturated() else tracker.hedge_delay(label)
+    start = time.monotonic()
+    if hedge_after is None:
+        response = _send_message(claude_client, params)
+        if label:
+            tracker.record_call(label, time.monotonic() - start)
+        return response
+
+    primary = _HEDGE_POOL.submit(contextvars.copy_context().run, _send_message, claude_client, params)
+    done, _ = wait([primary], timeout=hedge_after)
+    if done:
+        response = primary.result()
+        tracker.record_call(label, time.monotonic() - start)
+        return response
+
+    backup = _HEDGE_POOL.submit(contextvars.copy_context().run, _send_message, claude_client, params)
+    pending = {primary, backup}
+    error = None
+    while pending:
+        done, pending = wait(pending, timeout=remaining(), return_when=FIRST_COMPLETED)
+        if not done:
+            raise DeadlineExceeded("deadline exceeded")
+        for future in done:
+            if future.exception() is None:
+                tracker.record_call(label, time.monotonic() - start, hedged=True, hedge_won=future is backup)
+                return future.result()
+            error = future.exception()
+    raise error
+
+
+async def _send_hedged_async(claude_client, params):
+    tracker = get_hedge_tracker()
+    label = _USAGE_LABEL.get()
+    hedge_after = None if get_rate_limiter().saturated() else tracker.hedge_delay(label)
+    start = time.monotonic()
+    if hedge_after is None:
+        response = await _send_message_async(claude_client, params)
+        if label:
+            tracker.record_call(label, time.monotonic() - start)
+        return response
+
+    primary = asyncio.ensure_future(_send_message_async(claude_client, params))
+    tasks = [primary]
+    try:
+        done, _ = await asyncio.wait([primary], timeout=hedge_after)
+        if done:
+            response = primary.result()
+            tracker.record_call(label, time.monotonic() - start)
+            return response
+
+        backup = asyncio.ensure_future(_send_message_async(claude_client, params))
+        tasks.append(backup)
+        pending = {primary, backup}
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, timeout=remaining(), return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                raise DeadlineExceeded("deadline exceeded")
+            for task in done:
+                if task.exception() is None:
+                    tracker.record_call(label, time.monotonic() - start, hedged=True, hedge_won=task is backup)
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        # Unlike threads, the losing coroutine can be cancelled
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+
+# Raised by claude_ask/claude_ask_async instead of a "CLAUDE request failed" text: the answer is
+# no longer wanted (cancelled, past the deadline), or there is none and a fallback score would be
+# made up. Agents let them through rather than running their fallbacks, and the orchestrator
+# reports the agent as cancelled, timed out or failed.
+ABORT_ERRORS = (RequestCancelled, RateLimitExhausted, DeadlineExceeded)
+
+
+# Start of the text claude_ask returns instead of a completion when a request fails; never cached
+FAILURE_PREFIX = "CLAUDE request failed"
+
+
+def is_failure_text(text) -> bool:
+    """True for the failure text claude_ask/claude_stream return in place of a completion"""
+    return isinstance(text, str) and text.startswith(FAILURE_PREFIX)
+
+
+def _client_unavailable_message():
+    api_key = os.getenv("ANTHROPIC_API_KEY", "not_set")
+    return f"{FAILURE_PREFIX}: Claude client not available (API key: {api_key[:10]}...)"
+
+
+def claude_ask(prompt: str, max_tokens: int = MAX_CLAUDE_TOKENS, model: str = DEFAULT_MODEL, use_cache: bool = True, prefix: str = ""):
     """
     Wrapper for Claude completion.
     Returns completion text as string.
+    Identical requests are served from the response cache unless use_cache is False.
+    Requests are paced by the process-wide rate limiter and rate-limited or
+    transient failures are retried with backoff before giving up. Timeouts and
+    retries respect the current deadline (utils/deadlines.py), and slow
+    requests may be hedged (utils/hedging.py).
+    A non-empty prefix is sent before the prompt as a provider-cached block.
     """
+    cache = get_response_cache() if use_cache else None
+    cache_key = make_cache_key(model, SYSTEM_PROMPT, prompt, max_tokens, prefix) if cache else None
+    if cache:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            _record_usage()
+            return cached
+
     claude_client = get_claude_client()
     if not claude_client:
-        api_key = os.getenv("ANTHROPIC_API_KEY", "not_set")
-        return f"CLAUDE request failed: Claude client not available (API key: {api_key[:10]}...)"
+        return _client_unavailable_message()
 
     try:
         # Use the correct Anthropic API format
-        response = claude_client.messages.create(
-            model=model,
-            max_tokens=max_tokens,
-            system="You are a SPRIND analyst evaluating research for unicorn potential. Respond with concise, accurate analysis.",
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
-        
+        response = _send_hedged(claude_client, build_message_params(prompt, max_tokens, model, prefix))
+
+        _record_usage(response)
         # Return the content from the response
-        return response.content[0].text
+        text = response.content[0].text
+    except ABORT_ERRORS:
+        raise
+    except Exception as e:
+        return f"{FAILURE_PREFIX}: {str(e)}"
+
+    if cache:
+        cache.set(cache_key, text)
+    return text
+
+
+async def claude_ask_async(prompt: str, max_tokens: int = MAX_CLAUDE_TOKENS, model: str = DEFAULT_MODEL, use_cache: bool = True, prefix: str = ""):
+    """
+    Async twin of claude_ask backed by AsyncAnthropic.
+    Runs on the event loop, so many agent calls can be awaited concurrently.
+    """
+    cache = get_response_cache() if use_cache else None
+    cache_key = make_cache_key(model, SYSTEM_PROMPT, prompt, max_tokens, prefix) if cache else None
+    if cache:
+        # The disk tier is SQLite, keep it off the event loop
+        cached = await asyncio.to_thread(cache.get, cache_key)
+        if cached is not None:
+            _record_usage()
+            return cached
+
+    claude_client = get_async_claude_client()
+    if not claude_client:
+        return _client_unavailable_message()
+
+    try:
+        response = await _send_hedged_async(claude_client, build_message_params(prompt, max_tokens, model, prefix))
+        _record_usage(response)
+        text = response.content[0].text
+    except ABORT_ERRORS:
+        raise
     except Exception as e:
-        return f"CLAUDE request failed: {str(e)}"
+        return f"{FAILURE_PREFIX}: {str(e)}"
+
+    if cache:
+        await asyncio.to_thread(cache.set, cache_key, text)
+    return text
 
-def claude_summarize_novelty(prompt: str, max_tokens: int = MAX_CLAUDE_TOKENS, model: str = "claude-3-haiku-20240307"):
+
+def claude_stream(prompt: str, max_tokens: int = MAX_CLAUDE_TOKENS, model: str = DEFAULT_MODEL, use_cache: bool = True, prefix: str = ""):
+    """
+    Streaming variant of claude_ask: yields completion text chunks as they arrive.
+    A cached response is yielded as a single chunk. Failures before the first
+    chunk are retried like claude_ask and then yield the usual
+    "CLAUDE request failed" text (or raise ABORT_ERRORS, like claude_ask); a
+    stream cut off midway just ends.
+    """
+    cache = get_response_cache() if use_cache else None
+    cache_key = make_cache_key(model, SYSTEM_PROMPT, prompt, max_tokens, prefix) if cache else None
+    if cache:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            _record_usage()
+            yield cached
+            return
+
+    claude_client = get_claude_client()
+    if not claude_client:
+        yield _client_unavailable_message()
+        return
+
+    params = build_message_params(prompt, max_tokens, model, prefix)
+    limiter = get_rate_limiter()
+    estimated = _estimate_input_tokens(params)
+    chunks = []
+    attempt = 0
+    while True:
+        abort_if_cancelled("claude_calls_aborted")
+        try:
+            with limiter.slot(estimated):
+                with claude_client.messages.stream(**params, timeout=timeout_for(CLAUDE_TIMEOUT_SECONDS)) as stream:
+                    for text in stream.text_stream:
+                        if is_cancelled():
+                            # Leaving the block closes the stream and frees the slot
+                            record_cancelled("claude_calls_interrupted")
+                            abort_if_cancelled()
+                        chunks.append(text)
+                        yield text
+                    response = stream.get_final_message()
+            break
+        except RequestCancelled:
+            if not chunks:
+                record_cancelled("claude_calls_aborted")
+            raise
+        except Exception as e:
+            delay = backoff_delay(attempt, e)
+            if not chunks and not _give_up(attempt, e, delay):
+                cancellable_sleep(_retry_delay(limiter, attempt, e, delay))
+                attempt += 1
+                continue
+            if not chunks:
+                _raise_given_up(attempt, e)
+                yield f"{FAILURE_PREFIX}: {str(e)}"
+            return
+
+    _record_usage(response)
+    limiter.reconcile(estimated, _billed_input_tokens(response))
+    if cache:
+        cache.set(cache_key, "".join(chunks))
+
+
+async def claude_stream_async(prompt: str, max_tokens: int = MAX_CLAUDE_TOKENS, model: str = DEFAULT_MODEL, use_cache: bool = True, prefix: str = ""):
+    """Async twin of claude_stream"""
+    cache = get_response_cache() if use_cache else None
+    cache_key = make_cache_key(model, SYSTEM_PROMPT, prompt, max_tokens, prefix) if cache else None
+    if cache:
+        cached = await asyncio.to_thread(cache.get, cache_key)
+        if cached is not None:
+            _record_usage()
+            yield cached
+            return
+
+    claude_client = get_async_claude_client()
+    if not claude_client:
+        yield _client_unavailable_message()
+        return
+
+    params = build_message_params(prompt, max_tokens, model, prefix)
+    limiter = get_rate_limiter()
+    estimated = _estimate_input_tokens(params)
+    chunks = []
+    attempt = 0
+    while True:
+        abort_if_cancelled("claude_calls_aborted")
+        try:
+            async with limiter.slot_async(estimated):
+                async with claude_client.messages.stream(**params, timeout=timeout_for(CLAUDE_TIMEOUT_SECONDS)) as stream:
+                    async for text in stream.text_stream:
+                        if is_cancelled():
+                            record_cancelled("claude_calls_interrupted")
+                            abort_if_cancelled()
+                        chunks.append(text)
+                        yield text
+                    response = await stream.get_final_message()
+            break
+        except RequestCancelled:
+            if not chunks:
+                record_cancelled("claude_calls_aborted")
+            raise
+        except Exception as e:
+            delay = backoff_delay(attempt, e)
+            if not chunks and not _give_up(attempt, e, delay):
+                await asyncio.sleep(_retry_delay(limiter, attempt, e, delay))
+                attempt += 1
+                continue
+            if not chunks:
+                _raise_given_up(attempt, e)
+                yield f"{FAILURE_PREFIX}: {str(e)}"
+            return
+
+    _record_usage(response)
+    limiter.reconcile(estimated, _billed_input_tokens(response))
+    if cache:
+        await asyncio.to_thread(cache.set, cache_key, "".join(chunks))
+
+
+def claude_summarize_novelty(prompt: str, max_tokens: int = MAX_CLAUDE_TOKENS, model: str = DEFAULT_MODEL):
     """
     Summarize and analyze novelty using Claude.
     This is an alias for claude_ask for backward compatibility.
     """
     return claude_ask(prompt, max_tokens, model)
+
+
+async def claude_summarize_novelty_async(prompt: str, max_tokens: int = MAX_CLAUDE_TOKENS, model: str = DEFAULT_MODEL):
+    """Async alias for claude_ask_async"""
+    return await claude_ask_async(prompt, max_tokens, model)
@@ -0,0 +1,53 @@
+"""
+Request deadlines propagated through a context variable.
+The orchestrator opens a deadline per agent; outbound calls below it
+(claude_ask, LogicMill) shrink their timeouts to the time that is left, so a
+slow dependency cannot hold up the whole analysis. A Claude call that runs out
+of time raises DeadlineExceeded and the orchestrator reports the agent as
+timed out; a LogicMill call that does is reported as missing patent data.
+"""
+
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+_DEADLINE = contextvars.ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The current deadline passed before the operation could start or finish"""
+
+
+@contextmanager
+def deadline(seconds: Optional[float]):
+    """Run the block under a deadline `seconds` from now; nested deadlines never extend an outer one"""
+    if seconds is None or seconds <= 0:
+        yield
+        return
+    expires = time.monotonic() + seconds
+    outer = _DEADLINE.get()
+    token = _DEADLINE.set(expires if outer is None else min(outer, expires))
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline (may be negative), or None without one"""
+    expires = _DEADLINE.get()
+    return None if expires is None else expires - time.monotonic()
+
+
+def check_deadline() -> None:
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded("deadline exceeded")
+
+
+def timeout_for(default: float) -> float:
+    """Timeout for a blocking call: `default`, shortened to the time left before the deadline"""
+    check_deadline()
+    left = remaining()
+    return default if left is None else min(default, left)
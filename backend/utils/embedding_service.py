@@ -0,0 +1,208 @@
+"""
+Micro-batching of embedding-model calls shared by concurrent requests.
+Each analysis embeds its paper from its own orchestrator thread; encoding them
+separately makes the threads contend for the same cores, one short forward
+pass at a time. Here callers submit their texts and get a Future back; one
+worker thread collects what arrives within EMBED_BATCH_WAIT_MS of the first
+waiting request (or until EMBED_BATCH_SIZE texts are waiting), encodes it as
+one batch (identical texts once) and resolves every caller's Future with its
+own rows. Queue time, batch size and encode time histograms are reported in
+/metrics. The service is per process; prefork workers each run their own.
+"""
+
+import bisect
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from backend.config import EMBED_BATCH_SIZE, EMBED_BATCH_WAIT_MS
+
+logger = logging.getLogger(__name__)
+
+QUEUE_MS_BOUNDS = (0.5, 1, 2, 5, 10, 20, 50, 100, 250, 1000)
+BATCH_SIZE_BOUNDS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+ENCODE_MS_BOUNDS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class Histogram:
+    """Observation counts per bucket (value <= bound, the last bucket is unbounded), plus count, mean and max"""
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        buckets = {f"<={bound:g}": count for bound, count in zip(self.bounds, self.counts)}
+        buckets[f">{self.bounds[-1]:g}"] = self.counts[-1]
+        return {
+            "buckets": buckets,
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else 0.0,
+            "max": round(self.max, 3),
+        }
+
+
+class _Request:
+    __slots__ = ("texts", "future", "enqueued")
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.future: Future = Future()
+        self.enqueued = time.monotonic()
+
+
+class EmbeddingBatcher:
+    """Collects encode requests for up to max_wait_ms and runs them through encode(texts) as one batch"""
+
+    def __init__(self, encode: Callable[[List[str]], np.ndarray], max_batch_size: int = EMBED_BATCH_SIZE,
+                 max_wait_ms: float = EMBED_BATCH_WAIT_MS):
+        self._encode = encode
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self._cond = threading.Condition()
+        self._queue: deque = deque()
+        self._queued_texts = 0
+        self._worker: Optional[threading.Thread] = None
+        self._pid = os.getpid()
+        self._stats = {"requests": 0, "texts": 0, "batches": 0, "encoded": 0, "duplicates": 0, "errors": 0}
+        self._queue_ms = Histogram(QUEUE_MS_BOUNDS)
+        self._batch_size = Histogram(BATCH_SIZE_BOUNDS)
+        self._encode_ms = Histogram(ENCODE_MS_BOUNDS)
+
+    def submit(self, texts: Sequence[str]) -> Future:
+        """Future of the (len(texts), dim) embeddings of `texts`"""
+        request = _Request(list(texts))
+        with self._cond:
+            self._ensure_worker()
+            self._queue.append(request)
+            self._queued_texts += len(request.texts)
+            self._stats["requests"] += 1
+            self._stats["texts"] += len(request.texts)
+            self._cond.notify()
+        return request.future
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Blocking submit(); raises what the model raised"""
+        return self.submit(texts).result()
+
+    def _ensure_worker(self) -> None:
+        # A forked child inherits the queue but not the worker thread (lock held)
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._queue.clear()
+            self._queued_texts = 0
+            self._worker = None
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+            self._worker.start()
+
+    def _next_batch(self) -> List[_Request]:
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            # Wait for more requests until the oldest one has waited max_wait or the batch is full
+            deadline = self._queue[0].enqueued + self.max_wait
+            while self._queued_texts < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = []
+            size = 0
+            while self._queue and (not batch or size + len(self._queue[0].texts) <= self.max_batch_size):
+                request = self._queue.popleft()
+                batch.append(request)
+                size += len(request.texts)
+            self._queued_texts -= size
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            try:
+                self._run_batch(batch)
+            except Exception as e:
+                logger.exception("Embedding batch failed")
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+
+    def _run_batch(self, batch: List[_Request]) -> None:
+        start = time.monotonic()
+        # Callers that cancelled their Future while queued are dropped
+        live = [request for request in batch if request.future.set_running_or_notify_cancel()]
+        texts = list(dict.fromkeys(text for request in live for text in request.texts))
+        if not texts:
+            for request in live:
+                request.future.set_result(np.zeros((len(request.texts), 0), dtype=np.float32))
+            return
+        try:
+            vectors = np.asarray(self._encode(texts), dtype=np.float32)
+        except Exception as e:
+            with self._cond:
+                self._stats["errors"] += 1
+            for request in live:
+                request.future.set_exception(e)
+            return
+        encode_ms = (time.monotonic() - start) * 1000.0
+        rows = {text: row for row, text in enumerate(texts)}
+        for request in live:
+            request.future.set_result(vectors[[rows[text] for text in request.texts]])
+        with self._cond:
+            self._stats["batches"] += 1
+            self._stats["encoded"] += len(texts)
+            self._stats["duplicates"] += sum(len(request.texts) for request in live) - len(texts)
+            self._batch_size.observe(len(texts))
+            self._encode_ms.observe(encode_ms)
+            for request in live:
+                self._queue_ms.observe((start - request.enqueued) * 1000.0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            stats = dict(self._stats)
+            stats["queued"] = len(self._queue)
+            stats["queue_ms"] = self._queue_ms.snapshot()
+            stats["batch_size"] = self._batch_size.snapshot()
+            stats["encode_ms"] = self._encode_ms.snapshot()
+        stats["max_batch_size"] = self.max_batch_size
+        stats["max_wait_ms"] = self.max_wait * 1000.0
+        return stats
+
+
+def _encode_with_model(texts: List[str]) -> np.ndarray:
+    from backend.utils.faiss_utils import get_embedding_model
+
+    return get_embedding_model().encode(texts, convert_to_numpy=True, batch_size=len(texts))
+
+
+_SERVICE: Optional[EmbeddingBatcher] = None
+_SERVICE_LOCK = threading.Lock()
+
+
+def get_embedding_service() -> EmbeddingBatcher:
+    """Process-wide batcher in front of the sentence-transformer model"""
+    global _SERVICE
+    if _SERVICE is None:
+        with _SERVICE_LOCK:
+            if _SERVICE is None:
+                _SERVICE = EmbeddingBatcher(_encode_with_model)
+    return _SERVICE
+
+
+def get_embedding_service_stats() -> Dict[str, Any]:
+    return get_embedding_service().stats()
@@ -1,22 +1,182 @@
-import faiss
+import contextvars
+import json
+import logging
+import math
+import threading
+from contextlib import contextmanager
+
 import numpy as np
-from sentence_transformers import SentenceTransformer
 
-model = SentenceTransformer('all-MiniLM-L6-v2')
+from backend.config import (
+    EMBED_BATCH_SIZE,
+    EMBED_BATCHING_ENABLED,
+    FAISS_HNSW_EF_CONSTRUCTION,
+    FAISS_HNSW_EF_SEARCH,
+    FAISS_HNSW_M,
+    FAISS_INDEX_TYPE,
+    FAISS_NLIST,
+    FAISS_NPROBE,
+    FAISS_PQ_M,
+    FAISS_PQ_NBITS,
+    INDEX_PERSIST_ENABLED,
+    SEARCHVENTURES_CSV,
+)
+from backend.utils.artifacts import shared_artifact
+from backend.utils.data_utils import load_searchventures
+from backend.utils.embedding_service import get_embedding_service
+from backend.utils.lazy import FAILED, READY, lazy_resource
+
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+
+def _load_embedding_model():
+    # sentence_transformers pulls in torch; it is only imported once the model is needed
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBEDDING_MODEL_NAME)
+
+_MODEL = lazy_resource("embedding_model", _load_embedding_model)
+
+def get_embedding_model():
+    """The sentence-transformer model, loaded on first use (or by the startup warm-up)"""
+    return _MODEL.get()
+
+# k-means wants at least this many training points per centroid (faiss warns below it)
+_MIN_POINTS_PER_LIST = 39
+
+def index_params(index_type=None, **overrides):
+    """Build parameters of an index type, from config unless overridden; search-time knobs are set by tune_index"""
+    params = {
+        "index_type": index_type or FAISS_INDEX_TYPE,
+        "nlist": FAISS_NLIST,
+        "pq_m": FAISS_PQ_M,
+        "pq_nbits": FAISS_PQ_NBITS,
+        "hnsw_m": FAISS_HNSW_M,
+        "ef_construction": FAISS_HNSW_EF_CONSTRUCTION,
+    }
+    params.update({name: value for name, value in overrides.items() if value is not None})
+    return params
+
+def index_factory_string(rows, dim, params):
+    """
+    faiss index_factory description for `rows` vectors of `dim` dimensions. IVF list
+    counts and PQ sizes are clamped to what the data can train.
+    """
+    index_type = params["index_type"]
+    if index_type == "flat":
+        return "Flat"
+    if index_type == "hnsw":
+        return f"HNSW{params['hnsw_m']},Flat"
+    if index_type in ("ivf_flat", "ivf_pq"):
+        nlist = params["nlist"] or int(4 * math.sqrt(rows))
+        nlist = max(1, min(nlist, rows // _MIN_POINTS_PER_LIST))
+        if index_type == "ivf_flat":
+            return f"IVF{nlist},Flat"
+        # Sub-quantizers must divide the dimension; each trains 2**nbits centroids
+        pq_m = max(m for m in range(1, min(params["pq_m"], dim) + 1) if dim % m == 0)
+        nbits = max(1, min(params["pq_nbits"], int(math.log2(max(rows // _MIN_POINTS_PER_LIST, 2)))))
+        return f"IVF{nlist},PQ{pq_m}x{nbits}"
+    # Anything else is taken as a factory string, e.g. "OPQ16,IVF256,PQ16"
+    return index_type
+
+def build_faiss_index(embeddings, index_type=None, **params):
+    """L2 index of `index_type` (default FAISS_INDEX_TYPE) over float32 `embeddings`, trained and filled"""
+    import faiss
 
-def create_faiss_index(df, text_column='candidate_text'):
-    texts = df[text_column].tolist()
-    embeddings = model.encode(texts, convert_to_numpy=True, batch_size=32)
-    dim = embeddings.shape[1]
-    index = faiss.IndexFlatL2(dim)
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    rows, dim = embeddings.shape
+    params = index_params(index_type, **params)
+    index = faiss.index_factory(dim, index_factory_string(rows, dim, params), faiss.METRIC_L2)
+    if hasattr(index, "hnsw"):
+        index.hnsw.efConstruction = params["ef_construction"]
+    if not index.is_trained:
+        index.train(embeddings)
     index.add(embeddings)
+    return tune_index(index)
+
+def tune_index(index, nprobe=None, ef_search=None):
+    """Set the search-time recall/speed knobs: IVF lists probed, HNSW candidate list size"""
+    import faiss
+
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        ivf = None
+    if ivf is not None:
+        ivf.nprobe = max(1, min(nprobe or FAISS_NPROBE, ivf.nlist))
+    if hasattr(index, "hnsw"):
+        index.hnsw.efSearch = ef_search or FAISS_HNSW_EF_SEARCH
+    return index
+
+def create_faiss_index(df, text_column='candidate_text', index_type=None):
+    embeddings = embed_queries(df[text_column].tolist())
+    index = build_faiss_index(embeddings, index_type)
     return index, embeddings
 
-def search_faiss(index, df, query_text, top_k=5):
-    query_vec = model.encode([query_text], convert_to_numpy=True, batch_size=1)
-    D, I = index.search(query_vec, top_k)
+def load_persisted_searchventures_index(df, force=False):
+    """
+    (index, embeddings, meta) memory-mapped from INDEX_DIR; the rows are encoded and
+    written there only when the CSV, the model or the index build parameters changed
+    """
+    from backend.utils.index_store import load_or_build
+
+    index, embeddings, meta = load_or_build("searchventures", SEARCHVENTURES_CSV, df, EMBEDDING_MODEL_NAME, create_faiss_index,
+                                            force=force, variant=json.dumps(index_params(), sort_keys=True))
+    # Search-time parameters are not part of the persisted build
+    return tune_index(index), embeddings, meta
+
+def _build_searchventures_index():
+    df = load_searchventures()
+    index = None
+    if not df.empty:
+        try:
+            if INDEX_PERSIST_ENABLED:
+                index, _, _ = load_persisted_searchventures_index(df)
+            else:
+                # The index keeps its own copy of the vectors, the embeddings are not retained
+                index, _ = create_faiss_index(df)
+        except Exception:
+            logging.exception("Failed to build the SearchVentures FAISS index")
+    return df, index
+
+_SV_INDEX = lazy_resource("searchventures_index", _build_searchventures_index)
+
+def get_searchventures_index():
+    """
+    (SearchVentures DataFrame, FAISS index over its candidate_text), loaded on first use
+    and shared by every agent; the index is None when the CSV is missing or empty or the
+    embedding model is unavailable. The index is memory-mapped from the build in
+    INDEX_DIR (see utils/index_store.py), so every worker shares its pages.
+    """
+    return _SV_INDEX.get()
+
+def searchventures_index_usable():
+    """False once the SearchVentures index is known to be unavailable (failed to load, or no data)"""
+    if _SV_INDEX.state == FAILED:
+        return False
+    return _SV_INDEX.state != READY or _SV_INDEX.get()[1] is not None
+
+def embed_query(query_text):
+    """(1, dim) embedding of query_text, computed once per analysis when several agents search with it"""
+    prefetch = _PREFETCH.get()
+    if prefetch is not None:
+        vector = prefetch.embedding(query_text)
+        if vector is not None:
+            return vector
+    return shared_artifact("embedding", query_text, lambda: _encode_query(query_text))
+
+def _encode_query(query_text):
+    if EMBED_BATCHING_ENABLED:
+        # Batched with the queries of concurrent analyses
+        return get_embedding_service().encode([query_text])
+    return get_embedding_model().encode([query_text], convert_to_numpy=True, batch_size=1)
+
+def embed_queries(texts, batch_size=None):
+    """(len(texts), dim) float32 embeddings, encoded in batches of EMBED_BATCH_SIZE"""
+    embeddings = get_embedding_model().encode(list(texts), convert_to_numpy=True, batch_size=batch_size or EMBED_BATCH_SIZE)
+    return np.ascontiguousarray(embeddings, dtype=np.float32)
+
+def _hits(df, ids, distances):
     results = []
-    for i, dist in zip(I[0], D[0]):
+    for i, dist in zip(ids, distances):
         if 0 <= i < len(df):
             row = df.iloc[i]
             results.append({
@@ -26,3 +186,94 @@ def search_faiss(index, df, query_text, top_k=5):
                 "distance": float(dist)
             })
     return results
+
+def search_faiss(index, df, query_text, top_k=5):
+    prefetch = _PREFETCH.get()
+    if prefetch is not None:
+        hits = prefetch.lookup(index, query_text, top_k)
+        if hits is not None:
+            return hits
+    query_vec = embed_query(query_text)
+    D, I = index.search(query_vec, top_k)
+    return _hits(df, I[0], D[0])
+
+def search_faiss_batch(index, df, queries, top_k=5):
+    """
+    search_faiss for many queries at once: the texts are encoded in large batches
+    and the index is searched once with the whole query matrix. `queries` may also
+    be a precomputed (n, dim) embedding matrix. Returns one hit list per query.
+    """
+    if len(queries) == 0:
+        return []
+    vectors = queries if isinstance(queries, np.ndarray) else embed_queries(queries)
+    D, I = index.search(np.ascontiguousarray(vectors, dtype=np.float32), top_k)
+    return [_hits(df, ids, distances) for ids, distances in zip(I, D)]
+
+class SearchPrefetch:
+    """
+    Embeddings and FAISS hits for texts that are about to be analysed, computed
+    with one batched encode and search (see search_faiss_batch). Inside
+    prefetched_searches() embed_query and search_faiss answer from it, so the
+    agents of a batch of papers don't each encode and search on their own.
+    """
+
+    def __init__(self, index, df, top_k=5):
+        self.index = index
+        self.df = df
+        self.top_k = top_k
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def add(self, texts):
+        """Encode and search the texts not prefetched yet; on failure they are searched one by one later"""
+        with self._lock:
+            texts = [text for text in dict.fromkeys(texts) if text not in self._entries]
+        if not texts:
+            return
+        try:
+            vectors = embed_queries(texts)
+            hits = search_faiss_batch(self.index, self.df, vectors, self.top_k)
+        except Exception:
+            logging.exception(f"Batched search of {len(texts)} texts failed")
+            return
+        with self._lock:
+            for text, vector, text_hits in zip(texts, vectors, hits):
+                self._entries[text] = (vector.reshape(1, -1), text_hits)
+
+    def embedding(self, text):
+        entry = self._entries.get(text)
+        return entry[0] if entry is not None else None
+
+    def lookup(self, index, text, top_k):
+        """A copy of the first top_k hits for text, None if they weren't prefetched from this index"""
+        entry = self._entries.get(text)
+        if entry is None or index is not self.index or top_k > self.top_k:
+            return None
+        return [dict(hit) for hit in entry[1][:top_k]]
+
+    def __len__(self):
+        return len(self._entries)
+
+_PREFETCH = contextvars.ContextVar("search_prefetch", default=None)
+
+def prefetch_searchventures(texts=(), top_k=5):
+    """SearchPrefetch over the SearchVentures index, filled with `texts`; None if the index is unavailable"""
+    try:
+        df, index = get_searchventures_index()
+    except Exception:
+        logging.exception("SearchVentures index unavailable for batched search")
+        return None
+    if index is None:
+        return None
+    prefetch = SearchPrefetch(index, df, top_k)
+    prefetch.add(texts)
+    return prefetch
+
+@contextmanager
+def prefetched_searches(prefetch):
+    """Answer embed_query/search_faiss from `prefetch` inside the block (and threads/tasks started from it)"""
+    token = _PREFETCH.set(prefetch)
+    try:
+        yield prefetch
+    finally:
+        _PREFETCH.reset(token)
@@ -0,0 +1,102 @@
+"""
+Hedged Claude requests for tail latency.
+Per-agent request latencies are tracked in a rolling window. When hedging is
+enabled and a request is still running after the agent's HEDGE_PERCENTILE
+latency, an identical backup request is sent and whichever finishes first is
+used. Counters and latency percentiles are exposed on /metrics.
+"""
+
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from backend.config import HEDGING_ENABLED, HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES, HEDGE_MIN_DELAY_SECONDS
+from backend.utils.deadlines import remaining
+
+LATENCY_WINDOW = 500
+
+
+def _percentile(samples, p: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(p / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class HedgeTracker:
+    """Rolling latency windows and hedge counters per agent"""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self._lock = threading.Lock()
+        # Single API request latencies (what the hedge delay is based on)
+        self._request_latency: Dict[str, Deque[float]] = {}
+        # Latency the agent observed, after hedging
+        self._observed_latency: Dict[str, Deque[float]] = {}
+        self._counters: Dict[str, Dict[str, int]] = {}
+
+    def _agent_counters(self, key: str) -> Dict[str, int]:
+        return self._counters.setdefault(key, {"calls": 0, "hedged": 0, "hedge_wins": 0, "primary_wins": 0})
+
+    def record_request(self, key: str, seconds: float) -> None:
+        with self._lock:
+            self._request_latency.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def record_call(self, key: str, seconds: float, hedged: bool = False, hedge_won: bool = False) -> None:
+        with self._lock:
+            self._observed_latency.setdefault(key, deque(maxlen=self.window)).append(seconds)
+            counters = self._agent_counters(key)
+            counters["calls"] += 1
+            if hedged:
+                counters["hedged"] += 1
+                counters["hedge_wins" if hedge_won else "primary_wins"] += 1
+
+    def hedge_delay(self, key: Optional[str]) -> Optional[float]:
+        """Seconds to wait before hedging a request for `key`, or None when it should not be hedged"""
+        if not HEDGING_ENABLED or not key:
+            return None
+        with self._lock:
+            samples = list(self._request_latency.get(key, ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        delay = max(HEDGE_MIN_DELAY_SECONDS, _percentile(samples, HEDGE_PERCENTILE))
+        left = remaining()
+        if left is not None and delay >= left:
+            # The backup could not finish before the deadline anyway
+            return None
+        return delay
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            agents = {}
+            for key in set(self._request_latency) | set(self._observed_latency):
+                requests = list(self._request_latency.get(key, ()))
+                observed = list(self._observed_latency.get(key, ()))
+                agents[key] = {
+                    **self._agent_counters(key),
+                    **{f"request_p{p}_s": _round(_percentile(requests, p)) for p in (50, 95, 99)},
+                    **{f"observed_p{p}_s": _round(_percentile(observed, p)) for p in (50, 95, 99)},
+                }
+        return {
+            "enabled": HEDGING_ENABLED,
+            "percentile": HEDGE_PERCENTILE,
+            "hedged": sum(agent["hedged"] for agent in agents.values()),
+            "hedge_wins": sum(agent["hedge_wins"] for agent in agents.values()),
+            "agents": agents,
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 3)
+
+
+_TRACKER = HedgeTracker()
+
+
+def get_hedge_tracker() -> HedgeTracker:
+    return _TRACKER
+
+
+def get_hedge_stats() -> Dict[str, Any]:
+    return _TRACKER.stats()
@@ -0,0 +1,175 @@
+"""
+On-disk FAISS indexes and embedding matrices, keyed by what they were built from.
+Encoding every SearchVentures row with the embedding model takes minutes; it is
+done once (`python -m backend.build_index`, or automatically on first use) and
+written under INDEX_DIR in a directory named after a hash of the CSV contents,
+the model name and the text column. At startup the index and the float32
+embedding matrix are memory-mapped from there, which takes milliseconds, and
+every process using them shares the same page-cache pages. Changing the CSV or
+the model changes the key, so a stale index is never loaded; it is rebuilt and
+older builds of the same dataset are removed.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from backend.config import INDEX_DIR
+
+logger = logging.getLogger(__name__)
+
+# Bump when the on-disk layout or the way rows are embedded changes
+INDEX_FORMAT_VERSION = 1
+
+INDEX_FILE = "index.faiss"
+EMBEDDINGS_FILE = "embeddings.npy"
+META_FILE = "meta.json"
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def index_key(source_path: str, model_name: str, text_column: str, variant: str = "") -> str:
+    """Hash of the source file's bytes, the embedding model, the embedded column and the index build parameters"""
+    digest = hashlib.sha256()
+    for part in (file_sha256(source_path), model_name, text_column, variant, str(INDEX_FORMAT_VERSION)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+def index_path(name: str, key: str, index_dir: Optional[str] = None) -> str:
+    return os.path.join(index_dir or INDEX_DIR, f"{name}-{key}")
+
+
+def read_meta(path: str) -> Optional[Dict[str, Any]]:
+    """meta.json of a complete build in `path`, None if there is none"""
+    try:
+        with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def load_index(path: str) -> Tuple[Any, np.ndarray]:
+    """(FAISS index, read-only embedding matrix), both memory-mapped from `path`"""
+    import faiss
+
+    index_file = os.path.join(path, INDEX_FILE)
+    # IO_FLAG_MMAP_IFC maps flat-index codes without copying them (faiss >= 1.8)
+    flag = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+    try:
+        index = faiss.read_index(index_file, flag)
+    except RuntimeError:
+        logger.warning(f"Memory-mapping {index_file} is not supported by this faiss build, reading it instead")
+        index = faiss.read_index(index_file)
+    embeddings = np.load(os.path.join(path, EMBEDDINGS_FILE), mmap_mode="r")
+    return index, embeddings
+
+
+def write_index(path: str, index: Any, embeddings: np.ndarray, meta: Dict[str, Any], replace: bool = False) -> bool:
+    """
+    Write a build to `path` atomically: it is assembled in a temporary directory and
+    renamed into place. False if another process got there first, unless `replace`
+    (processes that mapped the old files keep reading them until they restart).
+    """
+    import faiss
+
+    parent = os.path.dirname(path)
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=".building-", dir=parent)
+    try:
+        faiss.write_index(index, os.path.join(tmp, INDEX_FILE))
+        np.save(os.path.join(tmp, EMBEDDINGS_FILE), np.ascontiguousarray(embeddings, dtype=np.float32))
+        with open(os.path.join(tmp, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        try:
+            os.rename(tmp, path)
+        except OSError:
+            if read_meta(path) is not None and not replace:
+                return False
+            shutil.rmtree(path, ignore_errors=True)
+            os.rename(tmp, path)
+        return True
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def prune_builds(name: str, keep_key: str, index_dir: Optional[str] = None) -> int:
+    """Remove other builds of dataset `name`; returns how many were removed"""
+    index_dir = index_dir or INDEX_DIR
+    removed = 0
+    try:
+        entries = os.listdir(index_dir)
+    except OSError:
+        return 0
+    for entry in entries:
+        if entry.startswith(f"{name}-") and entry != f"{name}-{keep_key}":
+            shutil.rmtree(os.path.join(index_dir, entry), ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def load_or_build(name: str, source_path: str, df, model_name: str, build, text_column: str = "candidate_text",
+                  index_dir: Optional[str] = None, force: bool = False,
+                  variant: str = "") -> Tuple[Any, np.ndarray, Dict[str, Any]]:
+    """
+    (index, embeddings, meta) for `df`, read from disk when a build for the current
+    source file, model and `variant` (index build parameters) exists, otherwise made
+    with build(df, text_column) -> (index, embeddings), written and then memory-mapped back.
+    """
+    key = index_key(source_path, model_name, text_column, variant)
+    path = index_path(name, key, index_dir)
+    meta = None if force else read_meta(path)
+    if meta is not None and meta.get("rows") == len(df):
+        start = time.perf_counter()
+        index, embeddings = load_index(path)
+        logger.info(f"Mapped {name} index {key} ({meta['rows']} rows) in {time.perf_counter() - start:.3f}s")
+        return index, embeddings, meta
+    # A build whose row count no longer matches the data is replaced like a forced one
+    stale = meta is not None
+
+    start = time.perf_counter()
+    index, embeddings = build(df, text_column)
+    meta = {
+        "name": name,
+        "key": key,
+        "source": os.path.abspath(source_path),
+        "model": model_name,
+        "text_column": text_column,
+        "variant": variant,
+        "rows": int(embeddings.shape[0]),
+        "dim": int(embeddings.shape[1]),
+        "index_type": type(index).__name__,
+        "build_seconds": round(time.perf_counter() - start, 3),
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "format_version": INDEX_FORMAT_VERSION,
+    }
+    try:
+        if write_index(path, index, embeddings, meta, replace=force or stale):
+            prune_builds(name, key, index_dir)
+            index, embeddings = load_index(path)
+            meta = read_meta(path) or meta
+        else:
+            # Another process wrote this build first: map theirs if it matches the data, else serve ours
+            written = read_meta(path)
+            if written is not None and written.get("rows") == len(df):
+                index, embeddings = load_index(path)
+                meta = written
+    except OSError as e:
+        # Read-only or full disk: serve the in-memory build, rebuild next start
+        logger.warning(f"Could not persist the {name} index to {path}: {e}")
+    logger.info(f"Built {name} index {key} ({meta['rows']} rows) in {meta['build_seconds']}s")
+    return index, embeddings, meta
@@ -0,0 +1,100 @@
+"""
+Incremental JSON field extraction for streamed completions.
+Feed text chunks as they arrive; every top-level field of the first JSON
+object is returned as soon as its value closes, long before the completion ends.
+"""
+
+import json
+from typing import Any, Dict, List, Tuple
+
+_INVALID = object()
+
+
+class IncrementalJSONParser:
+    """
+    Scans the stream once, tracking string/escape state and nesting depth.
+    Text before the first '{' (e.g. "Here is the JSON:") is ignored, as is
+    anything after the object closes.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        # At depth 1 we expect a key, then a colon, then a value
+        self._phase = "key"
+        self._key = None
+        self._key_start = 0
+        self._value_start = 0
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """Consume a chunk and return the (key, value) pairs completed by it"""
+        if self.done or not chunk:
+            return []
+        self.buffer += chunk
+        completed = []
+        buffer = self.buffer
+        for i in range(self._pos, len(buffer)):
+            ch = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._phase == "key_string":
+                        key = self._load(buffer[self._key_start:i + 1])
+                        self._key = key if isinstance(key, str) else None
+                        self._phase = "colon"
+                continue
+
+            if self._depth == 0:
+                if ch == "{":
+                    self._depth = 1
+                    self._phase = "key"
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._phase == "key":
+                    self._key_start = i
+                    self._phase = "key_string"
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit(buffer[self._value_start:i], completed)
+                    self.done = True
+                    self._pos = i + 1
+                    return completed
+            elif self._depth == 1:
+                if ch == ":" and self._phase == "colon":
+                    self._phase = "value"
+                    self._value_start = i + 1
+                elif ch == ",":
+                    self._emit(buffer[self._value_start:i], completed)
+                    self._phase = "key"
+        self._pos = len(buffer)
+        return completed
+
+    def _emit(self, raw_value: str, completed: List[Tuple[str, Any]]) -> None:
+        if self._phase != "value" or not isinstance(self._key, str):
+            return
+        value = self._load(raw_value.strip())
+        if value is not _INVALID:
+            self.fields[self._key] = value
+            completed.append((self._key, value))
+        self._key = None
+
+    @staticmethod
+    def _load(raw: str) -> Any:
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return _INVALID
@@ -0,0 +1,137 @@
+"""
+Lazily initialised, process-wide resources (embedding model, datasets, FAISS index).
+Nothing heavy is loaded at import, so the server binds its port right away.
+Each resource is loaded once, on first use, under its own lock; concurrent
+first users wait for the one load. warm_up() loads every registered resource
+ahead of traffic, on a background thread at startup (WARMUP_ON_STARTUP); the
+prefork master loads the fork-safe ones by name before forking the workers.
+readiness() reports whether the startup warm-up has finished, for the /ready
+endpoint.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PENDING, LOADING, READY, FAILED = "pending", "loading", "ready", "failed"
+
+
+class ResourceUnavailable(RuntimeError):
+    """A lazy resource failed to load; the failure is remembered until reset()"""
+
+
+class LazyResource:
+    def __init__(self, name: str, loader: Callable[[], Any]):
+        self.name = name
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._value: Any = None
+        self._state = PENDING
+        self._error: Optional[str] = None
+        self._load_seconds: Optional[float] = None
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def get(self) -> Any:
+        """The resource, loading it on first use; raises ResourceUnavailable if loading failed"""
+        if self._state == READY:
+            return self._value
+        with self._lock:
+            if self._state == PENDING:
+                self._load()
+            if self._state == FAILED:
+                raise ResourceUnavailable(f"{self.name} failed to load: {self._error}")
+            return self._value
+
+    def _load(self) -> None:
+        self._state = LOADING
+        start = time.perf_counter()
+        try:
+            self._value = self._loader()
+            self._state = READY
+        except Exception as e:
+            logger.exception(f"Loading {self.name} failed")
+            self._error = str(e)
+            self._state = FAILED
+        self._load_seconds = round(time.perf_counter() - start, 3)
+        logger.info(f"Loaded {self.name} in {self._load_seconds}s ({self._state})")
+
+    def reset(self) -> None:
+        """Forget the loaded value or failure; the next get() loads again"""
+        with self._lock:
+            self._value = None
+            self._state = PENDING
+            self._error = None
+            self._load_seconds = None
+
+    def status(self) -> Dict[str, Any]:
+        status = {"state": self._state, "load_seconds": self._load_seconds}
+        if self._error:
+            status["error"] = self._error
+        return status
+
+
+_RESOURCES: Dict[str, LazyResource] = {}
+_WARMUP = {"started": False, "finished": False, "seconds": None}
+_WARMUP_LOCK = threading.Lock()
+
+
+def lazy_resource(name: str, loader: Callable[[], Any]) -> LazyResource:
+    """Create and register a resource; warm_up() loads resources in registration order"""
+    resource = LazyResource(name, loader)
+    _RESOURCES[name] = resource
+    return resource
+
+
+def warm_up(names: Optional[List[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Load the registered resources (all by default) now; failures are recorded, not
+    raised. Only a full warm-up counts as the startup warm-up readiness() waits for.
+    """
+    if names is None:
+        with _WARMUP_LOCK:
+            _WARMUP["started"] = True
+    start = time.perf_counter()
+    for name, resource in list(_RESOURCES.items()):
+        if names is None or name in names:
+            try:
+                resource.get()
+            except ResourceUnavailable:
+                pass
+    if names is None:
+        with _WARMUP_LOCK:
+            _WARMUP["finished"] = True
+            _WARMUP["seconds"] = round(time.perf_counter() - start, 3)
+    return {name: resource.status() for name, resource in _RESOURCES.items()}
+
+
+def start_background_warmup() -> Optional[threading.Thread]:
+    """warm_up() on a daemon thread, once per process; None if it already ran or is running"""
+    with _WARMUP_LOCK:
+        if _WARMUP["started"]:
+            return None
+        _WARMUP["started"] = True
+    thread = threading.Thread(target=warm_up, name="resource-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def readiness(warmup_enabled: bool = True) -> Dict[str, Any]:
+    """
+    Ready once the warm-up has finished (immediately when warm-up is disabled and
+    resources load on first use). Failed resources don't block readiness, the
+    features using them degrade instead, but they are reported.
+    """
+    with _WARMUP_LOCK:
+        warmup = dict(_WARMUP)
+    ready = warmup["finished"] or not warmup_enabled
+    return {
+        "ready": ready,
+        "warmup": warmup,
+        "resources": {name: resource.status() for name, resource in _RESOURCES.items()},
+    }
@@ -1,5 +1,7 @@
 import requests
-from backend.config import LOGICMILL_API_KEY, LOGICMILL_URL
+from backend.config import LOGICMILL_API_KEY, LOGICMILL_URL, LOGICMILL_TIMEOUT_SECONDS
+from backend.utils.deadlines import timeout_for
+from backend.utils.cancellation import abort_if_cancelled
 
 def logicmill_patent_search(text: str):
     if not LOGICMILL_API_KEY:
@@ -25,6 +27,8 @@ def logicmill_patent_search(text: str):
         "data": [{"id": "input", "parts": [{"key": "abstract", "value": text}]}]
     }
 
+    # Nobody is waiting for the answer any more
+    abort_if_cancelled("logicmill_calls_aborted")
     resp = requests.post(
         LOGICMILL_URL,
         headers={
@@ -32,7 +36,7 @@ def logicmill_patent_search(text: str):
             "Content-Type": "application/json"
         },
         json={"query": query, "variables": variables},
-        timeout=10
+        timeout=timeout_for(LOGICMILL_TIMEOUT_SECONDS)
     )
     resp.raise_for_status()
     return resp.json()
@@ -0,0 +1,46 @@
+"""
+Memory usage of server processes.
+RSS alone overstates the cost of forked workers: pages inherited from the
+launcher's master (embedding model, DataFrames, FAISS index) are counted in
+every worker's RSS although they exist once. PSS splits shared pages between
+the processes mapping them, so summing PSS over master and workers gives the
+real footprint; private_dirty is what a worker has copied or allocated itself.
+"""
+
+import os
+import resource
+import sys
+from typing import Any, Dict, Union
+
+# smaps_rollup fields (kB) reported in MB
+_SMAPS_FIELDS = {
+    "Rss": "rss_mb",
+    "Pss": "pss_mb",
+    "Shared_Clean": "shared_clean_mb",
+    "Shared_Dirty": "shared_dirty_mb",
+    "Private_Clean": "private_clean_mb",
+    "Private_Dirty": "private_dirty_mb",
+}
+
+
+def memory_usage(pid: Union[int, str] = "self") -> Dict[str, Any]:
+    """
+    RSS/PSS breakdown of a process in MB from /proc/<pid>/smaps_rollup (Linux).
+    Elsewhere only the peak RSS of the current process is available.
+    """
+    usage: Dict[str, Any] = {"pid": os.getpid() if pid == "self" else int(pid)}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                parts = line.split()
+                field = parts[0].rstrip(":") if parts else ""
+                if field in _SMAPS_FIELDS:
+                    usage[_SMAPS_FIELDS[field]] = round(int(parts[1]) / 1024.0, 1)
+        return usage
+    except (OSError, ValueError, IndexError):
+        pass
+    if pid == "self" or int(pid) == os.getpid():
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kB on Linux, bytes on macOS
+        usage["peak_rss_mb"] = round(peak / (1024.0 * 1024.0 if sys.platform == "darwin" else 1024.0), 1)
+    return usage
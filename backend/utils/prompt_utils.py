@@ -0,0 +1,71 @@
+"""
+Prompt layout helpers shared by the agents.
+
+In shared-prefix mode the paper goes first as an identical, cacheable block for
+every agent and the agent rubric follows it, so the provider's prompt cache
+processes and bills the paper once per analysis instead of once per agent.
+"""
+
+import contextvars
+import logging
+from contextlib import contextmanager
+from typing import Tuple
+
+from backend.config import PAPER_TOKEN_BUDGET
+from backend.utils.claude_client import claude_ask, claude_ask_async, DEFAULT_MODEL, MAX_CLAUDE_TOKENS
+from backend.utils.token_budget import fit_to_budget, input_budget
+
+_SHARED_PREFIX = contextvars.ContextVar("shared_prefix_prompts", default=False)
+
+
+@contextmanager
+def shared_prefix_mode(enabled: bool = True):
+    """Build agent prompts with the shared paper prefix inside this block"""
+    token = _SHARED_PREFIX.set(enabled)
+    try:
+        yield
+    finally:
+        _SHARED_PREFIX.reset(token)
+
+
+def shared_prefix_enabled() -> bool:
+    return _SHARED_PREFIX.get()
+
+
+def fit_text(text: str, budget: int) -> str:
+    """Fit text into a token budget (clamped to the default model's context window)"""
+    return fit_to_budget(text, input_budget(budget, DEFAULT_MODEL, MAX_CLAUDE_TOKENS))
+
+
+def paper_block(text: str) -> str:
+    # Every agent must send byte-identical prefixes for the cache to hit, so the
+    # shared block uses one budget for all of them.
+    return f"Research text: {fit_text(text, PAPER_TOKEN_BUDGET)}\n\n"
+
+
+def research_prompt(rubric: str, text: str, budget: int) -> Tuple[str, str]:
+    """Return (prefix, prompt) for a "rubric + research text" agent prompt, text fitted to `budget` tokens"""
+    if shared_prefix_enabled() and text:
+        return paper_block(text), rubric + "Evaluate the research text provided above.\n\nAssistant:"
+    return "", rubric + f"Research text: {fit_text(text, budget)}\n\nAssistant:"
+
+
+def prime_shared_prefix(text: str) -> None:
+    """
+    Write the shared paper block to the provider cache before agents fan out.
+    A cache entry is only readable once a request that wrote it has started
+    responding, so agents launched at the same instant would all miss.
+    Priming is best effort: if it fails (cancelled, timed out) the agents run
+    anyway and report the failure themselves.
+    """
+    try:
+        claude_ask("Reply with OK.", max_tokens=1, prefix=paper_block(text), use_cache=False)
+    except Exception as e:
+        logging.warning(f"Shared prefix priming failed: {e}")
+
+
+async def prime_shared_prefix_async(text: str) -> None:
+    try:
+        await claude_ask_async("Reply with OK.", max_tokens=1, prefix=paper_block(text), use_cache=False)
+    except Exception as e:
+        logging.warning(f"Shared prefix priming failed: {e}")
@@ -0,0 +1,255 @@
+"""
+Process-wide limiter for outbound Claude requests.
+Every call takes a concurrency slot and is paced by two token buckets
+(requests/minute and input tokens/minute), so bursts of analyses queue up
+instead of hitting the provider's rate limits. A 429 with retry-after pauses
+all callers, not just the one that received it.
+Slots are handed out by the fair scheduler (utils/scheduler.py), and a request
+is paced only once it has its slot, so the queue is ordered by client and
+priority class rather than by who reserved the buckets first.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, Optional
+
+from backend.config import (
+    CLAUDE_MAX_CONCURRENCY,
+    CLAUDE_REQUESTS_PER_MINUTE,
+    CLAUDE_INPUT_TOKENS_PER_MINUTE,
+    CLAUDE_BACKOFF_BASE_SECONDS,
+    CLAUDE_BACKOFF_MAX_SECONDS,
+    WEB_CONCURRENCY,
+    SCHEDULER_WEIGHTS,
+)
+from backend.utils.cancellation import cancellable_sleep
+from backend.utils.scheduler import FairScheduler
+
+# Status codes worth retrying: rate limited, server errors, overloaded
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+# Rate limited or overloaded: running out of retries on these raises RateLimitExhausted
+RATE_LIMIT_STATUS_CODES = {429, 529}
+
+
+class RateLimitExhausted(Exception):
+    """Claude stayed rate limited or overloaded until the retries (or the deadline) ran out"""
+
+
+class TokenBucket:
+    """Refills continuously at per_minute/60 per second, up to per_minute"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take `amount` tokens and return how long the caller must wait before using them.
+        The bucket may go negative, so later callers queue behind earlier ones.
+        """
+        if self.capacity <= 0:
+            return 0.0
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= min(amount, self.capacity)
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self, amount: float) -> None:
+        if self.capacity <= 0 or amount <= 0:
+            return
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class LLMRateLimiter:
+    """Concurrency cap + request/token pacing, usable from threads and coroutines"""
+
+    def __init__(self, max_concurrency: int, requests_per_minute: int, input_tokens_per_minute: int,
+                 weights: Optional[Dict[str, float]] = None):
+        self.max_concurrency = max_concurrency
+        self.scheduler = FairScheduler(max_concurrency, weights or SCHEDULER_WEIGHTS)
+        self._requests = TokenBucket(requests_per_minute)
+        self._input_tokens = TokenBucket(input_tokens_per_minute)
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        self._stats = {
+            "queue_depth": 0,
+            "max_queue_depth": 0,
+            "in_flight": 0,
+            "admitted": 0,
+            "queued_seconds": 0.0,
+            "rate_limited": 0,
+            "retries": 0,
+        }
+
+    def _enqueue(self, delta: int) -> None:
+        with self._lock:
+            self._stats["queue_depth"] += delta
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._stats["queue_depth"])
+
+    def _admitted(self, waited: float) -> None:
+        with self._lock:
+            self._stats["in_flight"] += 1
+            self._stats["admitted"] += 1
+            self._stats["queued_seconds"] += waited
+
+    def _released(self) -> None:
+        with self._lock:
+            self._stats["in_flight"] -= 1
+
+    def _reserve(self, input_tokens: int) -> float:
+        delay = max(self._requests.reserve(1), self._input_tokens.reserve(input_tokens))
+        return max(delay, self._blocked_until - time.monotonic())
+
+    @contextmanager
+    def slot(self, input_tokens: int = 0):
+        """Block until the request may be sent; hold a concurrency slot for the block"""
+        start = time.monotonic()
+        self._enqueue(1)
+        try:
+            ticket = self.scheduler.acquire()
+            try:
+                delay = self._reserve(input_tokens)
+                if delay > 0:
+                    cancellable_sleep(delay)
+            except BaseException:
+                self.scheduler.release(ticket)
+                raise
+        finally:
+            self._enqueue(-1)
+        self._admitted(time.monotonic() - start)
+        try:
+            yield
+        finally:
+            self.scheduler.release(ticket)
+            self._released()
+
+    @asynccontextmanager
+    async def slot_async(self, input_tokens: int = 0):
+        """Async twin of slot(); waits on the event loop instead of blocking a thread"""
+        start = time.monotonic()
+        self._enqueue(1)
+        try:
+            ticket = await self.scheduler.acquire_async()
+            try:
+                delay = self._reserve(input_tokens)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            except BaseException:
+                self.scheduler.release(ticket)
+                raise
+        finally:
+            self._enqueue(-1)
+        self._admitted(time.monotonic() - start)
+        try:
+            yield
+        finally:
+            self.scheduler.release(ticket)
+            self._released()
+
+    def saturated(self) -> bool:
+        """True while requests are queueing or paused; extra (e.g. hedged) requests would only add load"""
+        return self._stats["queue_depth"] > 0 or self._blocked_until > time.monotonic()
+
+    def reconcile(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Return over-estimated input tokens to the bucket once the real usage is known"""
+        self._input_tokens.refund(estimated_tokens - actual_tokens)
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every new request for `seconds` (provider asked us to slow down)"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._stats["rate_limited"] += 1
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self._stats["retries"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["queued_seconds"] = round(stats["queued_seconds"], 3)
+        stats["paused_for_seconds"] = round(max(0.0, self._blocked_until - time.monotonic()), 3)
+        stats["limits"] = {
+            "max_concurrency": self.max_concurrency,
+            "requests_per_minute": self._requests.capacity,
+            "input_tokens_per_minute": self._input_tokens.capacity,
+        }
+        return stats
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, overload, server errors and connection/timeouts are retried"""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Server-requested wait from the retry-after(-ms) header, if any"""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000.0
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+def backoff_delay(attempt: int, error: Optional[Exception] = None) -> float:
+    """Wait before retry `attempt` (0-based): retry-after when given, else capped exponential with jitter"""
+    retry_after = retry_after_seconds(error) if error is not None else None
+    if retry_after is not None:
+        return min(retry_after, CLAUDE_BACKOFF_MAX_SECONDS)
+    delay = min(CLAUDE_BACKOFF_MAX_SECONDS, CLAUDE_BACKOFF_BASE_SECONDS * (2 ** attempt))
+    return delay * random.uniform(0.5, 1.0)
+
+
+_LIMITER: Optional[LLMRateLimiter] = None
+_LIMITER_LOCK = threading.Lock()
+
+
+def _worker_share(limit: int) -> int:
+    """This process's share of a server-wide limit when WEB_CONCURRENCY workers split it"""
+    if limit <= 0:
+        return limit
+    return max(1, -(-limit // WEB_CONCURRENCY))
+
+
+def get_rate_limiter() -> LLMRateLimiter:
+    """Process-wide limiter instance"""
+    global _LIMITER
+    if _LIMITER is None:
+        with _LIMITER_LOCK:
+            if _LIMITER is None:
+                _LIMITER = LLMRateLimiter(
+                    _worker_share(CLAUDE_MAX_CONCURRENCY),
+                    _worker_share(CLAUDE_REQUESTS_PER_MINUTE),
+                    _worker_share(CLAUDE_INPUT_TOKENS_PER_MINUTE),
+                )
+    return _LIMITER
+
+
+def get_limiter_stats() -> Dict[str, Any]:
+    return get_rate_limiter().stats()
+
+
+def get_scheduler_stats() -> Dict[str, Any]:
+    """Queue wait times and in-flight requests per priority class"""
+    return get_rate_limiter().scheduler.stats()
@@ -0,0 +1,263 @@
+"""
+Content-addressed cache for Claude responses.
+An in-memory LRU sits in front of a SQLite file so repeated prompts (re-uploads,
+retried jobs, deep_analysis after /analyze-text) are answered without an API call.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from backend.config import (
+    CLAUDE_CACHE_ENABLED,
+    CLAUDE_CACHE_PATH,
+    CLAUDE_CACHE_TTL_SECONDS,
+    CLAUDE_CACHE_MAX_BYTES,
+    CLAUDE_CACHE_MEMORY_ENTRIES,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(model: str, system: str, prompt: str, max_tokens: int, prefix: str = "") -> str:
+    """Hash every input that changes the completion"""
+    parts = [model, system, prompt, max_tokens]
+    if prefix:
+        parts.append(prefix)
+    payload = json.dumps(parts, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# Disk hits update last_access (the eviction order) in batches: once this many
+# are pending or the oldest pending one is this old
+TOUCH_BATCH_SIZE = 256
+TOUCH_FLUSH_SECONDS = 5.0
+
+
+class ResponseCache:
+    """
+    Two-tier (memory LRU + SQLite) cache with TTL and size-based eviction.
+    The lock only guards the LRU and the counters; SQLite is queried outside it,
+    on a connection per thread, so a slow disk read doesn't block memory hits.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int, max_bytes: int, memory_entries: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+        self._local = threading.local()
+        self._touches: Dict[str, float] = {}
+        self._touched_since = 0.0
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0, "expired": 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        # WAL lets several threads and worker processes read while one writes
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, "
+            "last_access REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses(last_access)")
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection; a forked child opens its own rather than reuse the parent's"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl_seconds > 0 and now - created > self.ttl_seconds
+
+    def _count(self, stat: str, n: int = 1) -> None:
+        with self._lock:
+            self._stats[stat] += n
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created = entry
+                if not self._expired(created, now):
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+        try:
+            conn = self._connection()
+            row = conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and self._expired(row[1], now):
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+                self._count("expired")
+                row = None
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache read failed: {e}")
+            row = None
+        if row is None:
+            self._count("misses")
+            return None
+
+        value, created = row
+        with self._lock:
+            self._remember(key, value, created)
+            self._stats["disk_hits"] += 1
+            if not self._touches:
+                self._touched_since = now
+            self._touches[key] = now
+            flush = len(self._touches) >= TOUCH_BATCH_SIZE or now - self._touched_since >= TOUCH_FLUSH_SECONDS
+        if flush:
+            self._flush_touches()
+        return value
+
+    def _flush_touches(self) -> None:
+        """Write the pending last_access updates in one transaction"""
+        with self._lock:
+            touches, self._touches = self._touches, {}
+        if not touches:
+            return
+        try:
+            conn = self._connection()
+            conn.executemany("UPDATE responses SET last_access = ? WHERE key = ?",
+                             [(accessed, key) for key, accessed in touches.items()])
+            conn.commit()
+        except sqlite3.Error as e:
+            # Only the eviction order suffers
+            logger.warning(f"Response cache access update failed: {e}")
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        with self._lock:
+            self._remember(key, value, now)
+            self._touches.pop(key, None)
+        try:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, last_access, size) VALUES (?, ?, ?, ?, ?)",
+                (key, value, now, now, size),
+            )
+            conn.commit()
+            self._count("writes")
+            self._evict_disk()
+        except sqlite3.Error as e:
+            logger.warning(f"Response cache write failed: {e}")
+
+    def _remember(self, key: str, value: str, created: float) -> None:
+        self._memory[key] = (value, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self) -> None:
+        """Drop expired rows, then least recently used rows until under max_bytes"""
+        if not self._evict_lock.acquire(blocking=False):
+            # Another thread is evicting already
+            return
+        try:
+            # Eviction goes by last_access, so write the pending updates first
+            self._flush_touches()
+            conn = self._connection()
+            if self.ttl_seconds > 0:
+                cur = conn.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl_seconds,))
+                self._count("expired", max(cur.rowcount, 0))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            evicted = []
+            if total > self.max_bytes:
+                # Evict down to 90% so we don't evict again on the next write
+                target = int(self.max_bytes * 0.9)
+                for key, size in conn.execute(
+                    "SELECT key, size FROM responses ORDER BY last_access ASC"
+                ).fetchall():
+                    if total <= target:
+                        break
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    evicted.append(key)
+                    total -= size
+            conn.commit()
+            with self._lock:
+                for key in evicted:
+                    self._memory.pop(key, None)
+                self._stats["evictions"] += len(evicted)
+        finally:
+            self._evict_lock.release()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._touches.clear()
+        conn = self._connection()
+        conn.execute("DELETE FROM responses")
+        conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["pending_access_updates"] = len(self._touches)
+        try:
+            entries, total = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        except sqlite3.Error:
+            entries, total = None, None
+        stats.update({
+            "disk_entries": entries,
+            "disk_bytes": total,
+        })
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+
+_CACHE: Optional[ResponseCache] = None
+_CACHE_FAILED = False
+_CACHE_LOCK = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Process-wide cache instance, or None when caching is disabled"""
+    global _CACHE, _CACHE_FAILED
+    if not CLAUDE_CACHE_ENABLED or _CACHE_FAILED:
+        return None
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None and not _CACHE_FAILED:
+                try:
+                    _CACHE = ResponseCache(
+                        CLAUDE_CACHE_PATH,
+                        CLAUDE_CACHE_TTL_SECONDS,
+                        CLAUDE_CACHE_MAX_BYTES,
+                        CLAUDE_CACHE_MEMORY_ENTRIES,
+                    )
+                except Exception as e:
+                    logger.warning(f"Response cache unavailable: {e}")
+                    _CACHE_FAILED = True
+                    return None
+    return _CACHE
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    cache = get_response_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
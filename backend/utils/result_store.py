@@ -0,0 +1,162 @@
+"""
+Store of finished agent results, one row per (paper, agent).
+A paper analysed in full can later be re-analysed for any subset of agents
+without recomputing them. Rows carry the agent's version (see
+registry.agent_version), which changes with the agent's prompt, so results
+produced by an outdated prompt are ignored and overwritten.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from backend.config import RESULT_STORE_ENABLED, RESULT_STORE_PATH, RESULT_STORE_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Whitespace-insensitive form of a text, so re-extracted or re-pasted papers hash the same"""
+    return " ".join((text or "").split())
+
+
+def text_hash(*texts: str) -> str:
+    payload = "\x00".join(normalize_text(text) for text in texts)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def agent_input_hash(agent_name: str, paper_text: str, authors_text: str = "") -> str:
+    """Hash of what the agent reads; only the team agent looks at the authors"""
+    if agent_name == "team":
+        return text_hash(paper_text, authors_text)
+    return text_hash(paper_text)
+
+
+class AgentResultStore:
+    """SQLite table of agent results keyed by input hash and agent, with version and TTL checks"""
+
+    def __init__(self, path: str, ttl_seconds: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "writes": 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS agent_results ("
+            "input_hash TEXT NOT NULL, agent TEXT NOT NULL, version TEXT NOT NULL, "
+            "value TEXT NOT NULL, created REAL NOT NULL, PRIMARY KEY (input_hash, agent))"
+        )
+        self._conn.commit()
+
+    def get(self, input_hash: str, agent_name: str, version: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT version, value, created FROM agent_results WHERE input_hash = ? AND agent = ?",
+                    (input_hash, agent_name),
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.warning(f"Result store read failed: {e}")
+                row = None
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            stored_version, value, created = row
+            if stored_version != version or (self.ttl_seconds > 0 and time.time() - created > self.ttl_seconds):
+                self._stats["stale"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+        return json.loads(value)
+
+    def put(self, input_hash: str, agent_name: str, version: str, result: Dict[str, Any]) -> None:
+        try:
+            value = json.dumps(result, ensure_ascii=False)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Result for {agent_name} is not JSON serialisable, not stored: {e}")
+            return
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO agent_results (input_hash, agent, version, value, created) VALUES (?, ?, ?, ?, ?)",
+                    (input_hash, agent_name, version, value, time.time()),
+                )
+                self._conn.commit()
+                self._stats["writes"] += 1
+            except sqlite3.Error as e:
+                logger.warning(f"Result store write failed: {e}")
+
+    def invalidate(self, agents: Optional[Iterable[str]] = None) -> int:
+        """Drop stored results for `agents` (all agents when None); returns the number of rows removed"""
+        with self._lock:
+            if agents is None:
+                cur = self._conn.execute("DELETE FROM agent_results")
+            else:
+                agents = list(agents)
+                cur = self._conn.execute(
+                    f"DELETE FROM agent_results WHERE agent IN ({','.join('?' * len(agents))})", agents
+                )
+            self._conn.commit()
+            return cur.rowcount
+
+    def purge_outdated(self, versions: Dict[str, str]) -> int:
+        """Drop rows written by agent versions other than the current ones"""
+        removed = 0
+        with self._lock:
+            for agent_name, version in versions.items():
+                cur = self._conn.execute(
+                    "DELETE FROM agent_results WHERE agent = ? AND version != ?", (agent_name, version)
+                )
+                removed += cur.rowcount
+            self._conn.commit()
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            try:
+                stats["entries"] = self._conn.execute("SELECT COUNT(*) FROM agent_results").fetchone()[0]
+            except sqlite3.Error:
+                stats["entries"] = None
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        return stats
+
+
+_STORE: Optional[AgentResultStore] = None
+_STORE_FAILED = False
+_STORE_LOCK = threading.Lock()
+
+
+def get_result_store() -> Optional[AgentResultStore]:
+    """Process-wide store instance, or None when disabled"""
+    global _STORE, _STORE_FAILED
+    if not RESULT_STORE_ENABLED or _STORE_FAILED:
+        return None
+    if _STORE is None:
+        with _STORE_LOCK:
+            if _STORE is None and not _STORE_FAILED:
+                try:
+                    _STORE = AgentResultStore(RESULT_STORE_PATH, RESULT_STORE_TTL_SECONDS)
+                except Exception as e:
+                    logger.warning(f"Result store unavailable: {e}")
+                    _STORE_FAILED = True
+                    return None
+    return _STORE
+
+
+def get_result_store_stats() -> Dict[str, Any]:
+    store = get_result_store()
+    if store is None:
+        return {"enabled": False}
+    return {"enabled": True, **store.stats()}
@@ -0,0 +1,213 @@
+"""
+Fair, priority-aware admission of Claude requests.
+Every request runs on behalf of a client (WebSocket connection host, REST
+caller) in a priority class: interactive chat, single analyses, batch work.
+Requests wait in one queue per (client, class) and free slots go to the queues
+by start-time fair queuing: each queue's share is its class weight, so chat
+overtakes analyses, analyses overtake batches, and a client with hundreds of
+queued requests gets the same share as a client with one, instead of everyone
+waiting behind it in arrival order. Lower classes are never starved, only
+served at a lower rate.
+
+Who is asking is carried in a ContextVar set with scheduling(); worker threads
+and tasks started from inside the block inherit it. A queued request whose
+cancel token is cancelled (utils/cancellation.py) leaves the queue at once.
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Tuple
+
+from backend.utils.cancellation import RequestCancelled, current_token
+
+INTERACTIVE, ANALYSIS, BATCH = "interactive", "analysis", "batch"
+PRIORITY_CLASSES = (INTERACTIVE, ANALYSIS, BATCH)
+DEFAULT_CLIENT = "local"
+
+# Recent waits kept per class for the percentiles in stats()
+_WAIT_SAMPLES = 1000
+
+_FLOW = contextvars.ContextVar("scheduling_flow", default=(DEFAULT_CLIENT, ANALYSIS))
+
+
+@contextmanager
+def scheduling(client_id: Optional[str], priority_class: str = ANALYSIS):
+    """Queue Claude requests made inside the block as `client_id` in `priority_class`"""
+    if priority_class not in PRIORITY_CLASSES:
+        raise ValueError(f"Unknown priority class: {priority_class}")
+    token = _FLOW.set((client_id or DEFAULT_CLIENT, priority_class))
+    try:
+        yield
+    finally:
+        _FLOW.reset(token)
+
+
+def current_flow() -> Tuple[str, str]:
+    """(client_id, priority_class) requests are currently queued under"""
+    return _FLOW.get()
+
+
+class _Ticket:
+    __slots__ = ("flow", "start_tag", "enqueued", "granted", "cancelled", "event", "loop", "future")
+
+    def __init__(self, flow: Tuple[str, str], start_tag: float):
+        self.flow = flow
+        self.start_tag = start_tag
+        self.enqueued = time.monotonic()
+        self.granted = False
+        self.cancelled = False
+        self.event: Optional[threading.Event] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.future: Optional[asyncio.Future] = None
+
+
+class FairScheduler:
+    """
+    `capacity` slots shared by weighted flows; usable from threads and coroutines.
+    capacity <= 0 admits everything immediately (no queueing, no fairness).
+    """
+
+    def __init__(self, capacity: int, weights: Dict[str, float]):
+        self.capacity = capacity
+        self.weights = {name: max(float(weights.get(name, 1.0)), 1e-6) for name in PRIORITY_CLASSES}
+        self._lock = threading.Lock()
+        self._heap = []
+        self._seq = itertools.count()
+        self._virtual_time = 0.0
+        self._last_finish: Dict[Tuple[str, str], float] = {}
+        self._in_use = 0
+        self._classes = {
+            name: {"queued": 0, "in_flight": 0, "granted": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0}
+            for name in PRIORITY_CLASSES
+        }
+        self._waits = {name: deque(maxlen=_WAIT_SAMPLES) for name in PRIORITY_CLASSES}
+
+    def _enqueue(self, flow: Tuple[str, str]) -> _Ticket:
+        # Start-time fair queuing: a request starts where its flow's previous one finished,
+        # or at the current virtual time if the flow was idle, and lasts 1/weight
+        start = max(self._virtual_time, self._last_finish.get(flow, 0.0))
+        self._last_finish[flow] = start + 1.0 / self.weights[flow[1]]
+        ticket = _Ticket(flow, start)
+        heapq.heappush(self._heap, (start, next(self._seq), ticket))
+        self._classes[flow[1]]["queued"] += 1
+        return ticket
+
+    def _grant(self, ticket: _Ticket) -> None:
+        stats = self._classes[ticket.flow[1]]
+        waited = time.monotonic() - ticket.enqueued
+        stats["queued"] -= 1
+        stats["in_flight"] += 1
+        stats["granted"] += 1
+        stats["wait_seconds"] += waited
+        stats["max_wait_seconds"] = max(stats["max_wait_seconds"], waited)
+        self._waits[ticket.flow[1]].append(waited)
+        ticket.granted = True
+        self._in_use += 1
+        self._virtual_time = ticket.start_tag
+        if ticket.event is not None:
+            ticket.event.set()
+        elif ticket.loop is not None:
+            ticket.loop.call_soon_threadsafe(_resolve, ticket.future)
+
+    def _dispatch(self) -> None:
+        """Hand free slots to the queued requests with the smallest start tags (lock held)"""
+        while self._heap and (self.capacity <= 0 or self._in_use < self.capacity):
+            _, _, ticket = heapq.heappop(self._heap)
+            if ticket.cancelled:
+                continue
+            self._grant(ticket)
+        if not self._heap and len(self._last_finish) > 1024:
+            # Flows whose last request finished before now have no say in future tags
+            self._last_finish = {flow: tag for flow, tag in self._last_finish.items() if tag > self._virtual_time}
+
+    def _abandon(self, ticket: _Ticket) -> None:
+        """Take a request out of the queue because its client went away, and wake its waiter"""
+        with self._lock:
+            if ticket.granted or ticket.cancelled:
+                return
+            ticket.cancelled = True
+            self._classes[ticket.flow[1]]["queued"] -= 1
+        if ticket.event is not None:
+            ticket.event.set()
+        elif ticket.loop is not None:
+            ticket.loop.call_soon_threadsafe(_resolve, ticket.future)
+
+    def acquire(self) -> _Ticket:
+        """Block the calling thread until the current flow gets a slot; raises RequestCancelled if abandoned"""
+        token = current_token()
+        with self._lock:
+            ticket = self._enqueue(current_flow())
+            ticket.event = threading.Event()
+            self._dispatch()
+        remove = token.add_callback(lambda: self._abandon(ticket)) if token is not None else None
+        try:
+            ticket.event.wait()
+        finally:
+            if remove is not None:
+                remove()
+        if ticket.cancelled:
+            raise RequestCancelled(token.reason if token is not None else "cancelled")
+        return ticket
+
+    async def acquire_async(self) -> _Ticket:
+        """Wait on the event loop until the current flow gets a slot; raises RequestCancelled if abandoned"""
+        loop = asyncio.get_running_loop()
+        token = current_token()
+        with self._lock:
+            ticket = self._enqueue(current_flow())
+            ticket.loop = loop
+            ticket.future = loop.create_future()
+            self._dispatch()
+        remove = token.add_callback(lambda: self._abandon(ticket)) if token is not None else None
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if not ticket.granted:
+                    if not ticket.cancelled:
+                        ticket.cancelled = True
+                        self._classes[ticket.flow[1]]["queued"] -= 1
+                    return_slot = False
+                else:
+                    return_slot = True
+            if return_slot:
+                self.release(ticket)
+            raise
+        finally:
+            if remove is not None:
+                remove()
+        if ticket.cancelled:
+            raise RequestCancelled(token.reason if token is not None else "cancelled")
+        return ticket
+
+    def release(self, ticket: _Ticket) -> None:
+        with self._lock:
+            self._in_use -= 1
+            self._classes[ticket.flow[1]]["in_flight"] -= 1
+            self._dispatch()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            classes = {name: dict(stats) for name, stats in self._classes.items()}
+            waits = {name: sorted(samples) for name, samples in self._waits.items()}
+            active_clients = len({ticket.flow[0] for _, _, ticket in self._heap if not ticket.cancelled})
+            in_use = self._in_use
+        for name, stats in classes.items():
+            samples = waits[name]
+            stats["weight"] = self.weights[name]
+            stats["mean_wait_seconds"] = round(stats["wait_seconds"] / stats["granted"], 3) if stats["granted"] else 0.0
+            stats["p95_wait_seconds"] = round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 3) if samples else 0.0
+            stats["wait_seconds"] = round(stats["wait_seconds"], 3)
+            stats["max_wait_seconds"] = round(stats["max_wait_seconds"], 3)
+        return {"capacity": self.capacity, "in_use": in_use, "queued_clients": active_clients, "classes": classes}
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
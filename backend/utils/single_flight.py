@@ -0,0 +1,165 @@
+"""
+Single-flight coalescing of identical concurrent analyses.
+When several clients submit the same paper within seconds, the first request
+starts the analysis and the others attach to it instead of starting their own:
+all of them receive its result, and the progress/stream events it emits are
+fanned out to every attached caller (late joiners get the earlier events
+replayed first). The shared run has its own cancel token and is only cancelled
+once every caller waiting for it has gone away.
+The shared run's Claude requests are queued as the leader's client and class
+(see utils/scheduler.py), so callers only attach to runs of their own priority
+class: an interactive request never waits on a run queued as batch work.
+The result store (result_store.py) already covers repeats of a finished paper;
+this covers the ones that arrive while it is still running.
+"""
+
+import asyncio
+import copy
+import inspect
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from backend.config import ANALYSIS_MODE
+from backend.utils.cancellation import CancelToken, cancellation_scope
+from backend.utils.result_store import text_hash
+from backend.utils.scheduler import current_flow
+
+logger = logging.getLogger(__name__)
+
+# emit(event) forwards an event of the shared run to every attached caller
+Emit = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+def analysis_key(kind: str, paper_text: str, authors_text: str = "", agents_to_run: Optional[List[str]] = None,
+                 mode: Optional[str] = None) -> str:
+    """Content hash + agent set + mode; `kind` keeps differently shaped runs (plain, streamed) apart"""
+    agents = ",".join(sorted(agents_to_run)) if agents_to_run else "*"
+    return f"{kind}:{text_hash(paper_text, authors_text)}:{agents}:{mode or ANALYSIS_MODE}"
+
+
+async def _call(callback: Callable[[Dict[str, Any]], Any], event: Dict[str, Any]) -> None:
+    try:
+        outcome = callback(event)
+        if inspect.isawaitable(outcome):
+            await outcome
+    except Exception as e:
+        logger.warning(f"Coalesced event callback failed: {e}")
+
+
+class _Flight:
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self.token = CancelToken()
+        self.events: List[Dict[str, Any]] = []
+        self.listeners: List[Callable[[Dict[str, Any]], Awaitable[None]]] = []
+        self.waiters = 0
+
+    async def emit(self, event: Dict[str, Any]) -> None:
+        self.events.append(event)
+        for listener in list(self.listeners):
+            await listener(event)
+
+
+class SingleFlight:
+    """One in-flight computation per key on the event loop; duplicate callers attach to it"""
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "started": 0, "coalesced": 0, "abandoned": 0}
+
+    async def _attach(self, flight: _Flight, on_event: Callable[[Dict[str, Any]], Any]) -> Callable:
+        lock = asyncio.Lock()
+
+        async def listener(event: Dict[str, Any]) -> None:
+            async with lock:
+                await _call(on_event, event)
+
+        # Live events wait on the lock until the history has been replayed, so order is kept
+        async with lock:
+            history = list(flight.events)
+            flight.listeners.append(listener)
+            try:
+                for event in history:
+                    await _call(on_event, event)
+            except BaseException:
+                flight.listeners.remove(listener)
+                raise
+        return listener
+
+    def _detach(self, key: str, flight: _Flight, listener: Optional[Callable]) -> None:
+        """Drop one waiter; the run is abandoned if it was the last one and the run is not finished"""
+        flight.waiters -= 1
+        if listener in flight.listeners:
+            flight.listeners.remove(listener)
+        if flight.waiters == 0 and not flight.task.done():
+            # Everyone waiting for it has gone away
+            flight.token.cancel("all requesters disconnected")
+            flight.task.cancel()
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+            with self._lock:
+                self._stats["abandoned"] += 1
+
+    async def do(self, key: str, fn: Callable[[Emit], Awaitable[Any]],
+                 on_event: Optional[Callable[[Dict[str, Any]], Any]] = None) -> Any:
+        """
+        Await fn(emit) for `key`, or the run already in flight for it in the caller's
+        priority class. Followers get a deep copy of the result so callers can't see
+        each other's changes.
+        """
+        key = f"{key}:{current_flow()[1]}"
+        flight = self._flights.get(key)
+        if flight is not None and flight.task.get_loop() is not asyncio.get_running_loop():
+            flight = None
+        leader = flight is None
+        if leader:
+            flight = _Flight()
+            with cancellation_scope(flight.token):
+                flight.task = asyncio.create_task(fn(flight.emit))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda task: self._flights.pop(key, None) if self._flights.get(key) is flight else None)
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["started" if leader else "coalesced"] += 1
+
+        flight.waiters += 1
+        listener = None
+        try:
+            if on_event is not None:
+                listener = await self._attach(flight, on_event)
+            result = await asyncio.shield(flight.task)
+        finally:
+            self._detach(key, flight, listener)
+        if leader:
+            return result
+        result = copy.deepcopy(result)
+        if isinstance(result, dict):
+            result["coalesced"] = True
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["in_flight"] = len(self._flights)
+        stats["coalesce_rate"] = round(stats["coalesced"] / stats["requests"], 3) if stats["requests"] else 0.0
+        return stats
+
+
+_FLIGHTS: Optional[SingleFlight] = None
+_FLIGHTS_LOCK = threading.Lock()
+
+
+def get_analysis_flights() -> SingleFlight:
+    """Process-wide single-flight group for analyses"""
+    global _FLIGHTS
+    if _FLIGHTS is None:
+        with _FLIGHTS_LOCK:
+            if _FLIGHTS is None:
+                _FLIGHTS = SingleFlight()
+    return _FLIGHTS
+
+
+def get_single_flight_stats() -> Dict[str, Any]:
+    return get_analysis_flights().stats()
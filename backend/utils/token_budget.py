@@ -0,0 +1,207 @@
+"""
+Token-aware input budgeting.
+Fits paper text into a token budget instead of cutting at a fixed character
+offset. When a paper is too long, whole sections are kept by value (abstract,
+conclusion, results ...) and references/appendices are dropped first, so the
+conclusions survive truncation.
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
+
+from backend.utils.artifacts import shared_artifact
+
+# Context windows per model (input + output tokens)
+MODEL_CONTEXT_LIMITS = {
+    "claude-3-haiku-20240307": 200000,
+    "claude-3-5-haiku-20241022": 200000,
+    "claude-3-5-sonnet-20241022": 200000,
+    "claude-3-opus-20240229": 200000,
+}
+DEFAULT_CONTEXT_LIMIT = 200000
+
+# Lower rank = kept first when the budget is tight
+SECTION_PRIORITY = {
+    "abstract": 0,
+    "conclusion": 1,
+    "introduction": 2,
+    "results": 3,
+    "discussion": 3,
+    "evaluation": 3,
+    "body": 4,
+    "applications": 4,
+    "methods": 5,
+    "background": 6,
+    "related work": 6,
+    "acknowledgements": 8,
+    "appendix": 9,
+    "references": 9,
+}
+
+_SECTION_ALIASES = [
+    ("abstract", r"abstract|summary"),
+    ("introduction", r"introduction|motivation"),
+    ("related work", r"related work|prior work|literature review|state of the art"),
+    ("background", r"background|preliminaries"),
+    ("methods", r"methods?|methodology|materials and methods|approach|experimental setup|experiments?"),
+    ("results", r"results?|findings"),
+    ("evaluation", r"evaluation|experimental results"),
+    ("discussion", r"discussion|limitations"),
+    ("applications", r"applications?|use cases|commercial(?:ization)? potential"),
+    ("conclusion", r"conclusions?|concluding remarks|summary and outlook|outlook|future work"),
+    ("acknowledgements", r"acknowledge?ments?"),
+    ("references", r"references|bibliography"),
+    ("appendix", r"appendix|appendices|supplementary material"),
+]
+
+# A heading on its own line, optionally numbered ("2.", "III.", "4.1")
+_HEADING_RE = re.compile(
+    r"^[ \t]*(?:(?:\d+(?:\.\d+)*|[IVXLC]+)\.?[ \t]+)?(" +
+    "|".join(pattern for _, pattern in _SECTION_ALIASES) +
+    r")[ \t]*:?[ \t]*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+# Word pieces, digit runs (tokenized ~3 digits at a time) and single symbols
+_TOKEN_PIECE_RE = re.compile(r"[A-Za-z]+|\d{1,3}|[^\sA-Za-z\d]")
+
+OMISSION_MARKER = "\n[...]\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Local approximation of the Claude tokenizer: common words are one token,
+    long words roughly one per 4 letters, symbols and short digit runs one each.
+    """
+    if not text:
+        return 0
+    return sum(max(1, (len(piece) + 3) // 4) if piece[0].isalpha() else 1
+               for piece in _TOKEN_PIECE_RE.findall(text))
+
+
+def context_limit(model: str) -> int:
+    return MODEL_CONTEXT_LIMITS.get(model, DEFAULT_CONTEXT_LIMIT)
+
+
+def input_budget(requested: int, model: str, reserved_tokens: int = 0) -> int:
+    """Clamp a requested input budget to what the model's context window leaves after reserved_tokens"""
+    return max(0, min(requested, context_limit(model) - reserved_tokens))
+
+
+def _section_kind(heading: str) -> str:
+    for kind, pattern in _SECTION_ALIASES:
+        if re.fullmatch(pattern, heading.strip(), re.IGNORECASE):
+            return kind
+    return "body"
+
+
+def split_sections(text: str) -> List[Tuple[str, str]]:
+    """Split text into (kind, section_text) in document order; text before the first heading counts as the abstract"""
+    matches = list(_HEADING_RE.finditer(text))
+    if not matches:
+        return [("body", text)]
+    sections = []
+    if matches[0].start() > 0:
+        # Title, authors and usually the abstract precede the first recognised heading
+        sections.append(("abstract", text[:matches[0].start()]))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        sections.append((_section_kind(match.group(1)), text[match.start():end]))
+    return sections
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Keep the head of text within max_tokens, cut at a word boundary"""
+    if max_tokens <= 0:
+        return ""
+    tokens = estimate_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    end = int(len(text) * max_tokens / tokens)
+    # The chars/token ratio is not uniform, so shrink until it fits
+    while end > 0 and estimate_tokens(text[:end]) > max_tokens:
+        end = int(end * 0.95)
+    cut = text.rfind(" ", 0, end)
+    return text[:cut if cut > end // 2 else end]
+
+
+def _head_and_tail(text: str, max_tokens: int) -> str:
+    """Without section headings keep the beginning and the end (where conclusions usually are)"""
+    marker_tokens = estimate_tokens(OMISSION_MARKER)
+    head = truncate_to_tokens(text, int(max_tokens * 0.7))
+    tail_budget = max_tokens - estimate_tokens(head) - marker_tokens
+    if tail_budget <= 0:
+        return head
+    tail = text[len(head):]
+    # Walk back from the end until the tail fills its budget
+    start = len(tail) - int(len(tail) * tail_budget / max(estimate_tokens(tail), 1))
+    while start < len(tail) and estimate_tokens(tail[start:]) > tail_budget:
+        start += max(1, (len(tail) - start) // 20)
+    space = tail.find(" ", start)
+    tail = tail[space + 1 if 0 <= space < start + 50 else start:]
+    return head + OMISSION_MARKER + tail if tail else head
+
+
+# Every agent fits the same paper: fitted texts are kept by (sha256 of the text, budget),
+# so the cache holds at most _FIT_CACHE_SIZE budget-sized strings and never the full papers
+_FIT_CACHE_SIZE = 64
+_FIT_CACHE: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+_FIT_LOCK = threading.Lock()
+
+
+def fit_to_budget(text: str, max_tokens: int) -> str:
+    """
+    Return text reduced to at most ~max_tokens estimated tokens.
+    Sections are admitted by priority and emitted in document order; the last
+    admitted section may be truncated, omitted spans are marked with "[...]".
+    """
+    if not text:
+        return ""
+    key = (hashlib.sha256(text.encode("utf-8")).hexdigest(), max_tokens)
+    with _FIT_LOCK:
+        fitted = _FIT_CACHE.get(key)
+        if fitted is not None:
+            _FIT_CACHE.move_to_end(key)
+            return fitted
+    fitted = _fit(text, max_tokens)
+    with _FIT_LOCK:
+        _FIT_CACHE[key] = fitted
+        while len(_FIT_CACHE) > _FIT_CACHE_SIZE:
+            _FIT_CACHE.popitem(last=False)
+    return fitted
+
+
+def _fit(text: str, max_tokens: int) -> str:
+    if estimate_tokens(text) <= max_tokens:
+        return text or ""
+
+    sections = shared_artifact("sections", text, lambda: split_sections(text))
+    if len(sections) == 1:
+        return _head_and_tail(text, max_tokens)
+
+    marker_tokens = estimate_tokens(OMISSION_MARKER)
+    remaining = max_tokens
+    kept = {}
+    order = sorted(range(len(sections)), key=lambda i: (SECTION_PRIORITY.get(sections[i][0], 4), i))
+    for i in order:
+        if remaining <= marker_tokens:
+            break
+        section_text = sections[i][1]
+        cost = estimate_tokens(section_text)
+        if cost + marker_tokens <= remaining:
+            kept[i] = section_text
+            remaining -= cost + marker_tokens
+        elif SECTION_PRIORITY.get(sections[i][0], 4) < 9:
+            kept[i] = truncate_to_tokens(section_text, remaining - marker_tokens)
+            remaining = 0
+
+    parts = []
+    for i in range(len(sections)):
+        if i in kept:
+            parts.append(kept[i])
+        elif not parts or parts[-1] != OMISSION_MARKER:
+            parts.append(OMISSION_MARKER)
+    return "".join(parts).strip()
@@ -148,6 +148,9 @@ export function useWebSocket(url = 'ws://localhost:8000/ws') {
         
       case 'analysis_progress':
         actions.updateAnalysisProgress(data.progress)
+        if (data.agent) {
+          actions.updateRealTimeAnalysis({ [data.agent]: data.result })
+        }
         break
         
       case 'real_time_update':